@@ -30,7 +30,7 @@ class PromptTemplate(db.Model):
     cfg = db.Column(db.Float, nullable=True)
     sampler = db.Column(db.String(80), nullable=True)
     tags = db.Column(db.String(200), nullable=True)  # comma-separated
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f"<User {self.email}>"
@@ -58,14 +58,14 @@ class Palette(db.Model):
     max_colors = db.Column(db.Integer, nullable=False, default=256)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    colors = db.relationship("Color", backref="palette", lazy=True, cascade="all, delete-orphan")
+    colors = db.relationship("Color", backref="palette", lazy=True, cascade="all, delete-orphan", order_by="Color.id")
     designs = db.relationship("Design", backref="palette", lazy=True)
 
 class Color(db.Model):
     __tablename__ = "colors"
 
     id = db.Column(db.Integer, primary_key=True)
-    palette_id = db.Column(db.Integer, db.ForeignKey("palettes.id"), nullable=False)
+    palette_id = db.Column(db.Integer, db.ForeignKey("palettes.id"), nullable=False, index=True)
     r = db.Column(db.Integer, nullable=False)
     g = db.Column(db.Integer, nullable=False)
     b = db.Column(db.Integer, nullable=False)
@@ -79,9 +79,10 @@ class Design(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     original_image = db.Column(db.String(255), nullable=True)
-    loom_id = db.Column(db.Integer, db.ForeignKey("looms.id"), nullable=True)
-    palette_id = db.Column(db.Integer, db.ForeignKey("palettes.id"), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # sha256 of the image file
+    loom_id = db.Column(db.Integer, db.ForeignKey("looms.id"), nullable=True, index=True)
+    palette_id = db.Column(db.Integer, db.ForeignKey("palettes.id"), nullable=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     patterns = db.relationship("PatternVersion", backref="design", lazy=True)
 
@@ -89,20 +90,50 @@ class PatternVersion(db.Model):
     __tablename__ = "pattern_versions"
 
     id = db.Column(db.Integer, primary_key=True)
-    design_id = db.Column(db.Integer, db.ForeignKey("designs.id"), nullable=False)
+    design_id = db.Column(db.Integer, db.ForeignKey("designs.id"), nullable=False, index=True)
     params = db.Column(db.Text, nullable=True)
     preview_path = db.Column(db.String(255), nullable=True)
     matrix_path = db.Column(db.String(255), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     exports = db.relationship("ExportJob", backref="pattern_version", lazy=True)
 
+    __table_args__ = (db.Index("ix_pattern_versions_created_at_id", "created_at", "id"),)
+
 class ExportJob(db.Model):
     __tablename__ = "export_jobs"
 
     id = db.Column(db.Integer, primary_key=True)
-    pattern_version_id = db.Column(db.Integer, db.ForeignKey("pattern_versions.id"), nullable=False)
+    pattern_version_id = db.Column(db.Integer, db.ForeignKey("pattern_versions.id"), nullable=False, index=True)
     format = db.Column(db.String(20), nullable=False)
     file_path = db.Column(db.String(255), nullable=True)
     status = db.Column(db.String(20), nullable=False, default="pending")
+    has_meta = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (db.Index("ix_export_jobs_created_at_id", "created_at", "id"),)
+
+class GenerationJob(db.Model):
+    __tablename__ = "generation_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # txt2img | img2img
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)  # queued|running|done|error
+    params = db.Column(db.Text, nullable=False)  # JSON request body
+    result = db.Column(db.Text, nullable=True)  # JSON {"results": [...], "meta": {...}}
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+class GenerationCache(db.Model):
+    __tablename__ = "generation_cache"
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(64), nullable=False, unique=True)  # sha256 of kind + payload (+ reference image hash)
+    kind = db.Column(db.String(20), nullable=False)
+    results = db.Column(db.Text, nullable=False)  # JSON list of saved result dicts
+    hits = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
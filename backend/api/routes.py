@@ -82,17 +82,6 @@ def _read_openai_meta():
         except Exception:
             continue
     return meta
-def ensure_user_role_column():
-    try:
-        engine = db.get_engine()
-        if engine.url.get_backend_name() == 'sqlite':
-            with engine.connect() as conn:
-                cols = [r[1] for r in conn.exec_driver_sql('PRAGMA table_info(users)').fetchall()]
-                if 'role' not in cols:
-                    conn.exec_driver_sql("ALTER TABLE users ADD COLUMN role VARCHAR(20) NULL")
-    except Exception:
-        pass
-
 def current_user_obj():
     try:
         uid = get_jwt_identity()
@@ -108,7 +97,6 @@ def admin_required():
 
 def ensure_admin_seed():
     try:
-        ensure_user_role_column()
         # if there is no admin at all, promote the oldest user as admin
         any_admin = User.query.filter_by(role='admin').first()
         if not any_admin:
@@ -118,45 +106,59 @@ def ensure_admin_seed():
                 db.session.commit()
     except Exception:
         pass
-def ensure_color_yarn_columns():
-    try:
-        engine = db.get_engine()
-        if engine.url.get_backend_name() == 'sqlite':
-            with engine.connect() as conn:
-                cols = [r[1] for r in conn.exec_driver_sql('PRAGMA table_info(colors)').fetchall()]
-                to_add = []
-                if 'yarn_code' not in cols:
-                    to_add.append("ALTER TABLE colors ADD COLUMN yarn_code VARCHAR(80) NULL")
-                if 'yarn_name' not in cols:
-                    to_add.append("ALTER TABLE colors ADD COLUMN yarn_name VARCHAR(120) NULL")
-                for sql in to_add:
-                    conn.exec_driver_sql(sql)
-    except Exception:
-        # Best-effort; if migration fails we'll rely on existing schema
-        pass
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, jsonify, request, send_file, current_app, Response, stream_with_context, g
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
 from werkzeug.utils import secure_filename
+from sqlalchemy import or_, and_, cast, insert, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from datetime import datetime, timedelta
+import time
 
 from extensions import db
-from .models import User, Loom, Palette, Color, Design, PatternVersion, ExportJob, PromptTemplate, AppSetting
-from services.image_processing import quantize_to_palette
-from services.pattern_ops import make_repeat
-from services.exporters.bmp import save_bmp8
-from PIL import Image, ImageOps
+from .models import User, Loom, Palette, Color, Design, PatternVersion, ExportJob, PromptTemplate, AppSetting, GenerationJob, GenerationCache
+from services import metrics, profiling, progress, workpool
+from services.catalog_import import iter_catalog_rows, normalize_row
+from services.stream_json import iter_json_array
+from services.b64_stream import stream_b64_images
+from services.zip_stream import iter_zip
+from services.lazy import lazy_module
+from config.settings import settings
 import os
 import base64
-import requests
 import uuid
 import sqlite3
 import json
+import hashlib
+import hmac
+import logging
+import mimetypes
 import string
 import platform
 import math
 import re
+import threading
+import io
+import itertools
 
 api_bp = Blueprint('api', __name__)
+
+# numpy/PIL/requests-backed modules load on first use (or in warm_up()), not at import
+Image = lazy_module('PIL.Image')
+image_processing = lazy_module('services.image_processing')
+image_cache = lazy_module('services.image_cache')
+ingest = lazy_module('services.ingest')
+pattern_ops = lazy_module('services.pattern_ops')
+bmp_export = lazy_module('services.exporters.bmp')
+sd_pool = lazy_module('services.sd_pool')
+color_stats = lazy_module('services.color_stats')
+palette_extract = lazy_module('services.palette_extract')
+gen_postprocess = lazy_module('services.gen_postprocess')
+openai_images = lazy_module('services.openai_images')
+uploads = lazy_module('services.uploads')
+LAZY_MODULES = (Image, image_processing, image_cache, ingest, pattern_ops, bmp_export, sd_pool,
+                color_stats, palette_extract, gen_postprocess, openai_images, uploads)
 ALLOWED_COLORS = {8, 12, 16}
 SD_URL = os.environ.get('SD_URL', 'http://127.0.0.1:7860')
 SD_TIMEOUT_SEC = int(os.environ.get('SD_TIMEOUT_SEC', '300'))
@@ -209,6 +211,40 @@ def storage_path(*parts):
 def get_sd_url():
     return os.environ.get('SD_URL') or _get_setting('sd_url') or SD_URL
 
+# SD backend pool. Built from settings.SD_NODES when set, otherwise a single node
+# at get_sd_url(); rebuilt when the configured node list changes.
+_sd_pool = {"key": None, "pool": None}
+_sd_pool_lock = threading.Lock()
+
+def get_sd_pool() -> 'sd_pool.SDPool':
+    nodes = sd_pool.parse_nodes(os.environ.get('SD_NODES') or settings.SD_NODES or _get_setting('sd_nodes') or '') or [(get_sd_url(), 1.0)]
+    key = tuple(nodes)
+    with _sd_pool_lock:
+        if _sd_pool["key"] != key:
+            if _sd_pool["pool"]:
+                _sd_pool["pool"].stop()
+            _sd_pool["pool"] = sd_pool.SDPool(nodes, probe_interval=settings.SD_PROBE_INTERVAL_SEC,
+                                      retries=settings.SD_NODE_RETRIES).start()
+            _sd_pool["key"] = key
+        return _sd_pool["pool"]
+
+# OpenAI image client, reused across requests; rebuilt when key/base URL/org/project change.
+_openai_client = {"key": None, "client": None}
+_openai_client_lock = threading.Lock()
+
+def get_openai_client(api_key: str, base_url=None, organization=None, project=None) -> 'openai_images.OpenAIImageClient':
+    key = (api_key, base_url, organization, project)
+    with _openai_client_lock:
+        if _openai_client["key"] != key:
+            if _openai_client["client"]:
+                _openai_client["client"].shutdown()
+            _openai_client["client"] = openai_images.OpenAIImageClient(
+                api_key, base_url, organization, project, timeout=SD_TIMEOUT_SEC,
+                concurrency=settings.OPENAI_IMAGE_CONCURRENCY, retries=settings.OPENAI_IMAGE_RETRIES,
+            )
+            _openai_client["key"] = key
+        return _openai_client["client"]
+
 def get_generation_settings():
     def _int(name, default=None):
         v = _get_setting(name)
@@ -272,6 +308,247 @@ def set_preset_settings():
         return jsonify({"error": f"Ayar kaydedilemedi (DB): {err}"}), 500
     return jsonify({"featured_prompt_ids": ids}), 200
 
+# Request metrics (per worker process): latency histogram and counts per route.
+# Off entirely when METRICS_ENABLED=0.
+@api_bp.before_request
+def _metrics_start():
+    if metrics.enabled():
+        g._metrics_t0 = time.perf_counter()
+
+@api_bp.after_request
+def _metrics_finish(resp):
+    t0 = g.pop('_metrics_t0', None)
+    if t0 is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.observe('dunyatek_http_request_seconds', time.perf_counter() - t0, endpoint=endpoint)
+        metrics.inc('dunyatek_http_requests_total', endpoint=endpoint, method=request.method, status=resp.status_code)
+    return resp
+
+# On-demand profiling (admin only): "X-Profile: cprofile|sample" (or ?_profile=...)
+# runs this one request under the profiler; "X-Profile-Memory: 1" adds tracemalloc
+# peaks for the quantize/export stages. The response carries X-Profile-Id.
+@api_bp.before_request
+def _profile_start():
+    mode = (request.headers.get('X-Profile') or request.args.get('_profile') or '').strip().lower()
+    if not mode or not settings.PROFILING_ENABLED:
+        return
+    if mode not in profiling.MODES:
+        return jsonify({"error": f"Profil modu {', '.join(profiling.MODES)} olmalı"}), 400
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return
+    if not admin_required():
+        return jsonify({"error":"Yetki yok"}), 403
+    memory = str(request.headers.get('X-Profile-Memory') or request.args.get('_profile_mem') or '').lower() in ('1', 'true', 'yes')
+    label = request.url_rule.rule if request.url_rule is not None else request.path
+    session = profiling.ProfileSession(storage_path('profiles'), mode, f"{request.method} {label}", memory=memory,
+                                       interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000.0)
+    if not session.start():
+        return jsonify({"error": "Başka bir profil çalışıyor"}), 409
+    g._profile = session
+
+@api_bp.after_request
+def _profile_finish(resp):
+    session = g.pop('_profile', None)
+    if session is not None:
+        meta = session.finish(resp.status_code)
+        resp.headers['X-Profile-Id'] = meta['id']
+        profiling.prune(session.root, settings.PROFILE_KEEP)
+    return resp
+
+@api_bp.teardown_request
+def _profile_teardown(exc):
+    # after_request is skipped when the view raised; never leave the profiler running
+    session = g.pop('_profile', None)
+    if session is not None:
+        session.finish(500)
+        profiling.prune(session.root, settings.PROFILE_KEEP)
+
+# Job progress (SSE at /events/<kind>/<key>). Sync endpoints take a client "progress_id";
+# numeric keys are reserved for job / pattern version / export ids.
+GEN_STAGES = {"queued": 0, "sd": 5, "postprocess": 90}
+PATTERN_STAGES = {"decode": 0, "quantize": 10, "make_repeat": 65, "png_encode": 75, "preview": 85}
+EXPORT_STAGES = {"load": 0, "encode": 10, "meta": 95}
+
+def _progress_tracker(kind: str, keys, stages):
+    root = storage_path('progress')
+    progress.prune(root, settings.PROGRESS_TTL_HOURS * 3600)
+    return progress.ProgressTracker(root, kind, keys, stages)
+
+def _client_progress_id(data):
+    pid = str((data or {}).get('progress_id') or request.headers.get('X-Progress-Id') or '').strip()
+    return pid if progress.valid_key(pid) and not pid.isdigit() else None
+
+def _track_request(kind: str, stages, *ids):
+    """Tracker for this request (client progress_id plus any ids); failed if the view errors out."""
+    keys = [k for k in (_client_progress_id(request.get_json(silent=True)),) + ids if k]
+    tracker = _progress_tracker(kind, keys, stages)
+    g._progress = tracker
+    return tracker
+
+@api_bp.teardown_request
+def _progress_teardown(exc):
+    tracker = g.pop('_progress', None)
+    if tracker is not None and tracker.state.get('status') == 'running':
+        tracker.fail(f"{exc}" if exc else "İşlem tamamlanamadı")
+
+def _progress_from_db(kind: str, key: str):
+    """Terminal state from the DB for numeric keys (progress file missing, stale or never written)."""
+    if not key.isdigit():
+        return None
+    try:
+        if kind == 'generation':
+            job = db.session.get(GenerationJob, int(key))
+            if job is not None and job.status == 'done':
+                return {"kind": kind, "status": "done", "stage": "done", "percent": 100, "job_id": job.id}
+            if job is not None and job.status == 'error':
+                return {"kind": kind, "status": "error", "error": job.error, "job_id": job.id}
+        elif kind == 'export':
+            job = db.session.get(ExportJob, int(key))
+            if job is not None and job.status == 'done':
+                return {"kind": kind, "status": "done", "stage": "done", "percent": 100, "export_job_id": job.id}
+        elif db.session.get(PatternVersion, int(key)) is not None:
+            return {"kind": kind, "status": "done", "stage": "done", "percent": 100, "pattern_version_id": int(key)}
+        return None
+    finally:
+        db.session.close()  # don't hold a connection (or a SQLite read snapshot) between polls
+
+def _with_sd_progress(state: dict) -> dict:
+    """While a generation sits on an SD node, interpolate the 'sd' stage from the node's own progress."""
+    pool = _sd_pool.get("pool")
+    if pool is None:  # this worker hasn't proxied to SD yet
+        pool = get_sd_pool()
+        db.session.close()
+    live = pool.live_progress(state['node'])
+    if not live:
+        return state
+    frac = max(0.0, min(1.0, float(live.get('progress') or 0)))
+    sd_state = live.get('state') or {}
+    lo, hi = GEN_STAGES['sd'], GEN_STAGES['postprocess']
+    return dict(state, percent=round(lo + (hi - lo) * frac, 1),
+                sd={"progress": frac, "eta_relative": live.get('eta_relative'),
+                    "step": sd_state.get('sampling_step'), "steps": sd_state.get('sampling_steps')})
+
+@api_bp.route('/events/<kind>/<key>', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_progress(kind: str, key: str):
+    """Server-sent events for one job: `progress` on every change, then `done` or `error` and the
+    stream ends. kind: generation (job id), pattern / export (client progress_id, pattern version
+    id or export job id). EventSource cannot set headers, so the token may come as ?jwt=<token>.
+    """
+    if kind not in progress.KINDS or not progress.valid_key(key):
+        return jsonify({"error": "Geçersiz ilerleme anahtarı"}), 400
+    root = storage_path('progress')
+    poll = max(0.05, settings.PROGRESS_POLL_MS / 1000.0)
+
+    def gen():
+        seq, last, db_state = 0, None, None
+        started = last_sent = time.monotonic()
+        next_db = 0.0
+        yield f"retry: {max(1000, settings.PROGRESS_POLL_MS * 4)}\n\n"
+        while True:
+            now = time.monotonic()
+            state = progress.read_progress(root, kind, key)
+            if db_state is None and now >= next_db and (state is None or state.get('status') == 'running'):
+                next_db = now + 2.0
+                db_state = _progress_from_db(kind, key)
+            state = db_state or state or {"kind": kind, "status": "waiting", "stage": None, "percent": 0}
+            state.pop('updated_at', None)
+            if state.get('status') == 'running' and state.get('stage') == 'sd' and state.get('node'):
+                state = _with_sd_progress(state)
+            status = state.get('status')
+            if state != last:
+                seq, last, last_sent = seq + 1, state, now
+                yield progress.sse(state, event=status if status in ('done', 'error') else 'progress', event_id=seq)
+                if status in ('done', 'error'):
+                    return
+            elif now - last_sent >= settings.SSE_HEARTBEAT_SEC:
+                last_sent = now
+                yield ": keep-alive\n\n"
+            if now - started >= settings.SSE_MAX_SEC:
+                yield progress.sse({"kind": kind, "status": "timeout"}, event='timeout', event_id=seq + 1)
+                return
+            time.sleep(poll)
+
+    resp = Response(stream_with_context(gen()), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'  # nginx: don't buffer the stream
+    return resp
+
+@api_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+def list_request_profiles():
+    if not admin_required():
+        return jsonify({"error":"Yetki yok"}), 403
+    return jsonify(profiling.list_profiles(storage_path('profiles'))), 200
+
+@api_bp.route('/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+def get_request_profile(profile_id: str):
+    """format=json (summary, default), pstats (cProfile dump), text (top functions) or speedscope."""
+    if not admin_required():
+        return jsonify({"error":"Yetki yok"}), 403
+    if not re.fullmatch(r'[\w-]+', profile_id):
+        return jsonify({"error": "Geçersiz profil"}), 400
+    root = storage_path('profiles')
+    meta_path = os.path.join(root, f'{profile_id}.json')
+    if not os.path.exists(meta_path):
+        return jsonify({"error": "Profil yok"}), 404
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    fmt = request.args.get('format', 'json')
+    files = meta.get('files') or {}
+    if fmt == 'json':
+        return jsonify(meta), 200
+    if fmt in ('pstats', 'text') and files.get('pstats'):
+        path = os.path.join(root, files['pstats'])
+        if fmt == 'text':
+            return Response(profiling.pstats_text(path, sort=request.args.get('sort', 'cumulative')), mimetype='text/plain')
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=files['pstats'])
+    if fmt == 'speedscope' and files.get('speedscope'):
+        return send_file(os.path.join(root, files['speedscope']), mimetype='application/json',
+                         as_attachment=True, download_name=files['speedscope'])
+    return jsonify({"error": "Bu profilde istenen format yok"}), 404
+
+def _runtime_samples():
+    st = image_cache.get_image_cache().stats()
+    out = [
+        ("dunyatek_image_cache_bytes", "gauge", {}, st["bytes"]),
+        ("dunyatek_image_cache_entries", "gauge", {}, st["entries"]),
+        ("dunyatek_cache_requests_total", "counter", {"cache": "image", "result": "hit"}, st["hits"] + st["shm_hits"]),
+        ("dunyatek_cache_requests_total", "counter", {"cache": "image", "result": "miss"}, st["misses"]),
+    ]
+    pool = _sd_pool.get("pool")
+    if pool is not None:
+        # Nodes are labelled by their position in SD_NODES: the URLs are internal addresses
+        for i, n in enumerate(pool.status()):
+            out.append(("dunyatek_sd_node_inflight", "gauge", {"node": str(i)}, n["inflight"]))
+            out.append(("dunyatek_sd_node_healthy", "gauge", {"node": str(i)}, 1 if n["healthy"] else 0))
+    return out
+
+metrics.registry.add_collector(_runtime_samples)
+
+def _metrics_authorized() -> bool:
+    """Scrapers send "Authorization: Bearer <METRICS_TOKEN>"; otherwise an admin JWT is required."""
+    if settings.METRICS_TOKEN and hmac.compare_digest(
+            request.headers.get('Authorization', '').encode('utf-8'), f"Bearer {settings.METRICS_TOKEN}".encode('utf-8')):
+        return True
+    try:
+        verify_jwt_in_request()
+    except Exception:
+        return False
+    return admin_required()
+
+# Prometheus text format, for the METRICS_TOKEN bearer or an admin session.
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    if not metrics.enabled():
+        return jsonify({"error": "Metrikler kapalı"}), 404
+    if not _metrics_authorized():
+        return jsonify({"error": "Yetki yok"}), 403
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
 # Basit ping testi
 @api_bp.route('/ping', methods=['GET'])
 def ping():
@@ -317,7 +594,7 @@ def set_storage_settings():
 def get_model_settings():
     if not admin_required():
         return jsonify({"error":"Yetki yok"}), 403
-    return jsonify({"sd_url": get_sd_url()}), 200
+    return jsonify({"sd_url": get_sd_url(), "sd_nodes": get_sd_pool().status()}), 200
 
 @api_bp.route('/settings/model', methods=['PUT'])
 @jwt_required()
@@ -329,7 +606,29 @@ def set_model_settings():
     if not sd_url or not isinstance(sd_url, str):
         return jsonify({"error":"sd_url gerekli"}), 400
     _set_setting('sd_url', sd_url)
-    return jsonify({"message":"Kaydedildi", "sd_url": sd_url}), 200
+    # Optional multi-node list in the SD_NODES format ("url|weight,url|weight")
+    if 'sd_nodes' in data:
+        raw = data.get('sd_nodes') or ''
+        if not isinstance(raw, str):
+            return jsonify({"error":"sd_nodes metin olmalı"}), 400
+        _set_setting('sd_nodes', raw)
+    return jsonify({"message":"Kaydedildi", "sd_url": sd_url, "sd_nodes": get_sd_pool().status()}), 200
+
+# Decoded-image cache status (admin-only); DELETE empties it
+@api_bp.route('/settings/image-cache', methods=['GET'])
+@jwt_required()
+def get_image_cache_stats():
+    if not admin_required():
+        return jsonify({"error":"Yetki yok"}), 403
+    return jsonify(image_cache.get_image_cache().stats()), 200
+
+@api_bp.route('/settings/image-cache', methods=['DELETE'])
+@jwt_required()
+def clear_image_cache():
+    if not admin_required():
+        return jsonify({"error":"Yetki yok"}), 403
+    image_cache.get_image_cache().clear()
+    return jsonify(image_cache.get_image_cache().stats()), 200
 
 # OpenAI settings (admin-only)
 @api_bp.route('/settings/openai', methods=['GET'])
@@ -471,7 +770,6 @@ def list_dir_api():
 # Kullanıcı Kaydı (Signup)
 @api_bp.route('/signup', methods=['POST'])
 def signup():
-    ensure_user_role_column()
     data = request.get_json()
 
     if not data or not data.get('name') or not data.get('email') or not data.get('password'):
@@ -527,7 +825,6 @@ def protected():
 @api_bp.route('/users', methods=['GET'])
 @jwt_required()
 def list_users():
-    ensure_user_role_column()
     users = User.query.all()
     return jsonify([{
         "id": u.id,
@@ -541,7 +838,7 @@ def list_users():
 @api_bp.route('/users', methods=['POST'])
 @jwt_required()
 def create_user():
-    ensure_user_role_column(); ensure_admin_seed()
+    ensure_admin_seed()
     if not admin_required():
         return jsonify({"error": "Yetki yok"}), 403
     data = request.get_json()
@@ -570,7 +867,7 @@ def create_user():
 @api_bp.route('/users/<int:user_id>', methods=['DELETE'])
 @jwt_required()
 def delete_user(user_id):
-    ensure_user_role_column(); ensure_admin_seed()
+    ensure_admin_seed()
     if not admin_required():
         return jsonify({"error": "Yetki yok"}), 403
     user = User.query.get(user_id)
@@ -585,7 +882,7 @@ def delete_user(user_id):
 @api_bp.route('/users/<int:user_id>', methods=['PUT'])
 @jwt_required()
 def update_user(user_id: int):
-    ensure_user_role_column(); ensure_admin_seed()
+    ensure_admin_seed()
     if not admin_required():
         return jsonify({"error": "Yetki yok"}), 403
     u = User.query.get(user_id)
@@ -662,35 +959,156 @@ def get_original_for_pv(pv_id: int):
         pass
     return send_file(d.original_image, mimetype=mime)
 
+# Bulk prompt-template import (JSON array or CSV). Legacy files use {"name", "text"}.
+PROMPT_BATCH_SIZE = 1000
+
+def _prompt_row(raw):
+    if not isinstance(raw, dict):
+        return None
+    name = str(raw.get('name') or '').strip()
+    prompt = str(raw.get('prompt') or raw.get('text') or '').strip()
+    if not name or not prompt:
+        return None
+
+    def _num(key, cast):
+        try:
+            v = raw.get(key)
+            return cast(v) if v not in (None, '') else None
+        except Exception:
+            return None
+    tags = raw.get('tags')
+    if isinstance(tags, (list, tuple)):
+        tags = ','.join(str(t).strip() for t in tags if str(t).strip())
+    return {
+        "name": name[:120],
+        "prompt": prompt,
+        "negative": (str(raw.get('negative')).strip() or None) if raw.get('negative') else None,
+        "width": _num('width', int),
+        "height": _num('height', int),
+        "steps": _num('steps', int),
+        "cfg": _num('cfg', float),
+        "sampler": (str(raw.get('sampler'))[:80] or None) if raw.get('sampler') else None,
+        "tags": (str(tags)[:200] or None) if tags else None,
+    }
+
+def _import_prompts(records, batch_size=PROMPT_BATCH_SIZE):
+    """Insert prompt templates in batches, skipping names that already exist; yields progress."""
+    stats = {"rows": 0, "inserted": 0, "duplicates": 0, "skipped": 0}
+    names = {n for (n,) in db.session.query(PromptTemplate.name)}
+    batch = []
+    for raw in records:
+        stats["rows"] += 1
+        row = _prompt_row(raw)
+        if not row:
+            stats["skipped"] += 1
+            continue
+        if row["name"] in names:
+            stats["duplicates"] += 1
+            continue
+        names.add(row["name"])
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(insert(PromptTemplate), batch)
+            stats["inserted"] += len(batch)
+            batch.clear()
+            yield dict(stats)
+    if batch:
+        db.session.execute(insert(PromptTemplate), batch)
+        stats["inserted"] += len(batch)
+    db.session.commit()
+    yield dict(stats, done=True)
+
 @api_bp.route('/prompts/import-old', methods=['POST'])
 @jwt_required()
 def import_old_prompts():
-    return jsonify({"error": "Bu uç devre dışı bırakıldı"}), 410
+    """Import the legacy prompts_bulk.json kept at the project root."""
+    if not admin_required():
+        return jsonify({"error":"Yetki yok"}), 403
+    path = os.path.join(_project_root(), 'prompts_bulk.json')
+    if not os.path.exists(path):
+        return jsonify({"error": "prompts_bulk.json bulunamadı"}), 404
+    def records():
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from iter_json_array(f)
+    try:
+        rows = _parse_start(records())
+    except Exception as e:
+        return jsonify({"error": f"Dosya okunamadı: {e}"}), 400
+    return _import_response(_import_prompts(rows))
 
 @api_bp.route('/prompts/bulk', methods=['POST'])
 @jwt_required()
 def import_prompts_bulk():
-    return jsonify({"error": "Bu uç devre dışı bırakıldı"}), 410
+    """Body: multipart `file` (.json/.csv) or raw application/json array / text/csv."""
+    try:
+        fp, fmt = _open_upload_text()
+        if fmt not in ('csv', 'json'):
+            return jsonify({"error": "format csv veya json olmalı"}), 400
+        rows = _parse_start(iter_catalog_rows(fp, fmt))
+    except Exception as e:
+        return jsonify({"error": f"Dosya okunamadı: {e}"}), 400
+    return _import_response(_import_prompts(rows))
 
-@api_bp.route('/palettes', methods=['GET'])
-@jwt_required()
-def list_palettes():
-    ensure_color_yarn_columns()
-    palettes = Palette.query.all()
+# Palette catalog snapshot: serialized once per palette revision.
+# The revision lives in AppSetting so every worker sees writes from the others.
+_palette_snapshot = {"rev": None, "body": None}
+_palette_snapshot_lock = threading.Lock()
+
+def _palette_revision() -> str:
+    return _get_setting('palette_revision') or '0'
+
+def _bump_palette_revision():
+    """Increment the palette revision inside the current session (caller commits).
+    A single UPDATE ... SET value = value + 1: it row-locks until commit, so concurrent
+    palette edits never commit the same revision.
+    """
+    bump = (update(AppSetting).where(AppSetting.key == 'palette_revision')
+            .values(value=cast(cast(AppSetting.value, db.Integer) + 1, db.Text))
+            .execution_options(synchronize_session=False))
+    if db.session.execute(bump).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(AppSetting(key='palette_revision', value='1'))
+    except IntegrityError:
+        db.session.execute(bump)  # another request created the row first
+
+def _serialize_palettes() -> str:
+    # Two queries: palettes, then all their colors via SELECT ... IN
+    palettes = Palette.query.options(selectinload(Palette.colors)).order_by(Palette.id.asc()).all()
     resp = []
     for p in palettes:
         resp.append({
             "id": p.id,
             "name": p.name,
             "max_colors": p.max_colors,
-            "colors": [{"id": c.id, "r": c.r, "g": c.g, "b": c.b, "label": c.label, "yarn_code": getattr(c, 'yarn_code', None), "yarn_name": getattr(c, 'yarn_name', None)} for c in p.colors]
+            "colors": [{"id": c.id, "r": c.r, "g": c.g, "b": c.b, "label": c.label, "yarn_code": c.yarn_code, "yarn_name": c.yarn_name} for c in p.colors]
         })
-    return jsonify(resp), 200
+    return json.dumps(resp)
+
+@api_bp.route('/palettes', methods=['GET'])
+@jwt_required()
+def list_palettes():
+    rev = _palette_revision()
+    etag = f"palettes-{rev}"
+    if request.if_none_match.contains(etag):
+        resp = current_app.response_class(status=304)
+    else:
+        with _palette_snapshot_lock:
+            body = _palette_snapshot["body"] if _palette_snapshot["rev"] == rev else None
+        if body is None:
+            body = _serialize_palettes()
+            with _palette_snapshot_lock:
+                _palette_snapshot.update(rev=rev, body=body)
+        resp = current_app.response_class(body, status=200, mimetype='application/json')
+    resp.set_etag(etag)
+    # Clients may cache but must revalidate with If-None-Match
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
 
 @api_bp.route('/palettes', methods=['POST'])
 @jwt_required()
 def create_palette():
-    ensure_color_yarn_columns()
     data = request.get_json()
     if not data or not data.get('name'):
         return jsonify({"error": "name gerekli"}), 400
@@ -710,13 +1128,13 @@ def create_palette():
             yarn_name=col.get('yarn_name')
         )
         db.session.add(color)
+    _bump_palette_revision()
     db.session.commit()
     return jsonify({"id": palette.id}), 201
 
 @api_bp.route('/palettes/<int:palette_id>', methods=['PUT'])
 @jwt_required()
 def update_palette(palette_id):
-    ensure_color_yarn_columns()
     palette = Palette.query.get(palette_id)
     if not palette:
         return jsonify({"error": "Palette bulunamadı"}), 404
@@ -737,6 +1155,7 @@ def update_palette(palette_id):
                 yarn_code=col.get('yarn_code'),
                 yarn_name=col.get('yarn_name')
             ))
+    _bump_palette_revision()
     db.session.commit()
     return jsonify({"message": "Güncellendi"}), 200
 
@@ -747,15 +1166,208 @@ def delete_palette(palette_id):
     if not palette:
         return jsonify({"error": "Palette bulunamadı"}), 404
     db.session.delete(palette)
+    _bump_palette_revision()
     db.session.commit()
     return jsonify({"message": "Silindi"}), 200
 
+# Bulk yarn-catalog import: CSV/JSON rows of palette,r,g,b,label,yarn_code,yarn_name
+CATALOG_BATCH_SIZE = 2000
+
+def _reopen_upload(stream):
+    """Independent binary handle on an uploaded file. Request teardown closes request.files
+    before a streamed (?progress=1) response reads it; a duplicated descriptor stays open.
+    """
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        # Small uploads are kept in memory by Werkzeug (<= 500 KB)
+        stream.seek(0)
+        return io.BytesIO(stream.read())
+    handle = os.fdopen(os.dup(fd), 'rb')
+    handle.seek(0)
+    return handle
+
+def _open_upload_text():
+    """Return (text_stream, fmt) for a multipart `file` or a raw CSV/JSON request body.
+    Neither path reads the whole payload into memory.
+    """
+    fmt = (request.args.get('format') or '').lower()
+    if 'file' in request.files:
+        f = request.files['file']
+        raw = _reopen_upload(f.stream)
+        if not fmt:
+            fmt = 'json' if os.path.splitext(f.filename or '')[1].lower() == '.json' else 'csv'
+    else:
+        raw = request.stream
+        if not fmt:
+            fmt = 'json' if 'json' in (request.mimetype or '') else 'csv'
+    return io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''), fmt
+
+def _parse_start(records):
+    """Parse the start of an upload (CSV header / opening bracket and the first record) now,
+    so a file that is malformed from the outset gets a 400 even with ?progress=1.
+    Returns an iterator over all records, the first one included.
+    """
+    it = iter(records)
+    for first in it:
+        return itertools.chain((first,), it)
+    return it
+
+def _import_catalog(records, default_palette=None, batch_size=CATALOG_BATCH_SIZE):
+    """Insert catalog colors in batched executemany statements, yielding progress after each batch.
+    Colors are deduplicated by yarn_code within each palette (including colors already stored).
+    Everything is committed in one transaction at the end.
+    """
+    stats = {"rows": 0, "inserted": 0, "duplicates": 0, "skipped": 0, "palettes_created": 0}
+    palettes = {}  # name -> (palette_id, set of yarn codes)
+    batch = []
+
+    def flush():
+        if batch:
+            db.session.execute(insert(Color), batch)
+            stats["inserted"] += len(batch)
+            batch.clear()
+
+    for raw in records:
+        stats["rows"] += 1
+        row = normalize_row(raw, default_palette)
+        if not row:
+            stats["skipped"] += 1
+            continue
+        name = row.pop('palette')
+        entry = palettes.get(name)
+        if entry is None:
+            pal = Palette.query.filter_by(name=name).first()
+            if pal:
+                codes = {c for (c,) in db.session.query(Color.yarn_code).filter(Color.palette_id == pal.id, Color.yarn_code.isnot(None))}
+            else:
+                pal = Palette(name=name, max_colors=256)
+                db.session.add(pal)
+                db.session.flush()
+                codes = set()
+                stats["palettes_created"] += 1
+            entry = palettes[name] = (pal.id, codes)
+        pid, codes = entry
+        code = row['yarn_code']
+        if code:
+            if code in codes:
+                stats["duplicates"] += 1
+                continue
+            codes.add(code)
+        row['palette_id'] = pid
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+            yield dict(stats)
+    flush()
+    if stats["inserted"] or stats["palettes_created"]:
+        _bump_palette_revision()
+    db.session.commit()
+    yield dict(stats, palettes=len(palettes), done=True)
+
+@api_bp.route('/palettes/import', methods=['POST'])
+@jwt_required()
+def import_palette_catalog():
+    """Bulk import. Body: multipart `file` (.csv/.json) or raw text/csv / application/json.
+    ?palette=<name> assigns rows without a palette column; ?progress=1 streams NDJSON progress lines.
+    """
+    try:
+        fp, fmt = _open_upload_text()
+        if fmt not in ('csv', 'json'):
+            return jsonify({"error": "format csv veya json olmalı"}), 400
+        rows = _parse_start(iter_catalog_rows(fp, fmt))
+    except Exception as e:
+        return jsonify({"error": f"Dosya okunamadı: {e}"}), 400
+    default_palette = request.args.get('palette') or request.form.get('palette')
+    try:
+        batch_size = max(100, min(20000, int(request.args.get('batch_size', CATALOG_BATCH_SIZE))))
+    except Exception:
+        batch_size = CATALOG_BATCH_SIZE
+    return _import_response(_import_catalog(rows, default_palette, batch_size))
+
+def _import_response(progress):
+    """Drain a bulk-import progress generator: one JSON summary, or NDJSON lines with ?progress=1.
+    The summary answers 201, or 400 when the import fails. A progress stream has already sent
+    200 when it starts, so a later failure (a bad row, a malformed array) ends it with an
+    {"error": ...} line instead and nothing is committed; see _parse_start for the early check.
+    """
+    if str(request.args.get('progress', '')).lower() in ('1', 'true', 'yes'):
+        def gen():
+            try:
+                for st in progress:
+                    yield json.dumps(st) + "\n"
+            except Exception as e:
+                db.session.rollback()
+                yield json.dumps({"error": f"İçe aktarma hatası: {e}"}) + "\n"
+        return Response(stream_with_context(gen()), mimetype='application/x-ndjson')
+    last = None
+    try:
+        for last in progress:
+            pass
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"İçe aktarma hatası: {e}"}), 400
+    return jsonify(last), 201
+
 @api_bp.route('/designs', methods=['GET'])
 @jwt_required()
 def list_designs():
     designs = Design.query.all()
     return jsonify([{ "id": d.id, "name": d.name, "original_image": d.original_image, "loom_id": d.loom_id, "palette_id": d.palette_id } for d in designs]), 200
 
+# Ingest: per content hash, a background pool precomputes the working copy and
+# unique-color table that generate_pattern starts from (see services/ingest.py).
+_ingest_executor = None
+_ingest_executor_lock = threading.Lock()
+
+def _ingest_pool():
+    global _ingest_executor
+    if _ingest_executor is None:
+        with _ingest_executor_lock:
+            if _ingest_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _ingest_executor = ThreadPoolExecutor(max_workers=max(1, settings.INGEST_WORKERS), thread_name_prefix='ingest')
+    return _ingest_executor
+
+def _run_ingest(src_path: str, out_dir: str):
+    try:
+        ingest.ingest_image(src_path, out_dir, settings.INGEST_MAX_SIDE)
+    except Exception as e:
+        logging.getLogger(__name__).warning("ingest failed for %s: %s", src_path, e)
+
+def submit_ingest(path, sha):
+    """Queue ingest for an image unless its artifacts already exist."""
+    if not path or not sha:
+        return
+    out_dir = ingest.ingest_dir(storage_path('ingest'), sha)
+    if ingest.IngestedImage.load(out_dir) is None:
+        _ingest_pool().submit(_run_ingest, path, out_dir)
+
+def _ingested(d: Design):
+    """Ingest artifacts for a design. If the background ingest has not finished
+    (or the design predates it) it runs inline, so every pattern of a design is
+    generated from the same working copy (quantize_to_palette decodes the original
+    instead when the copy was downscaled). None if the image cannot be ingested.
+    """
+    if not d.content_hash:
+        d.content_hash = _image_hash(d.original_image)
+        if not d.content_hash:
+            return None
+    out_dir = ingest.ingest_dir(storage_path('ingest'), d.content_hash)
+    src = ingest.IngestedImage.load(out_dir)
+    if src is None:
+        try:
+            src = ingest.IngestedImage(ingest.ingest_image(d.original_image, out_dir, settings.INGEST_MAX_SIDE))
+        except Exception:
+            return None
+    return src
+
+def _image_hash(path):
+    try:
+        return uploads.sha256_file(path) if path and os.path.isfile(path) else None
+    except OSError:
+        return None
+
 @api_bp.route('/designs', methods=['POST'])
 @jwt_required()
 def create_design():
@@ -763,8 +1375,10 @@ def create_design():
     if not data or not data.get('name'):
         return jsonify({"error": "name gerekli"}), 400
     d = Design(name=data['name'], original_image=data.get('original_image'), loom_id=data.get('loom_id'), palette_id=data.get('palette_id'))
+    d.content_hash = _image_hash(d.original_image)
     db.session.add(d)
     db.session.commit()
+    submit_ingest(d.original_image, d.content_hash)
     return jsonify({"id": d.id}), 201
 
 @api_bp.route('/designs/<int:design_id>', methods=['PUT'])
@@ -775,7 +1389,10 @@ def update_design(design_id):
         return jsonify({"error": "Design bulunamadı"}), 404
     data = request.get_json()
     if 'name' in data: d.name = data['name']
-    if 'original_image' in data: d.original_image = data['original_image']
+    if 'original_image' in data:
+        d.original_image = data['original_image']
+        d.content_hash = _image_hash(d.original_image)
+        submit_ingest(d.original_image, d.content_hash)
     if 'loom_id' in data: d.loom_id = data['loom_id']
     if 'palette_id' in data: d.palette_id = data['palette_id']
     db.session.commit()
@@ -816,7 +1433,7 @@ def generate_pattern():
     if d.palette_id:
         pal = Palette.query.get(d.palette_id)
         if pal:
-            cols = Color.query.filter_by(palette_id=pal.id).all()
+            cols = Color.query.filter_by(palette_id=pal.id).order_by(Color.id).all()
             palette = [(c.r, c.g, c.b) for c in cols]
             if len(palette) < 2:
                 palette = None
@@ -850,13 +1467,22 @@ def generate_pattern():
         except Exception:
             req_max = 16
 
-    qimg = quantize_to_palette(
-        d.original_image,
-        palette=palette,
-        max_colors=(req_max or 16),
-        dither=dither,
-        delta_e_tolerance=delta_e_val,
-    )
+    tracker = _track_request('pattern', PATTERN_STAGES)
+    tracker.stage('decode')
+    with metrics.stage('decode'):
+        source = _ingested(d)
+    tracker.stage('quantize')
+    with metrics.stage('quantize'), profiling.mem_stage('quantize'):
+        # CPU-bound: runs in the process pool so request threads stay free for I/O
+        qimg = workpool.run_cpu(
+            image_processing.quantize_to_palette,
+            d.original_image,
+            palette=palette,
+            max_colors=(req_max or 16),
+            dither=dither,
+            delta_e_tolerance=delta_e_val,
+            source=source,
+        )
     # Repeat to report if provided
     repeat_w = data.get('report_w')
     repeat_h = data.get('report_h')
@@ -867,26 +1493,35 @@ def generate_pattern():
             if l and l.report_w and l.report_h:
                 repeat_w, repeat_h = l.report_w, l.report_h
     if repeat_w and repeat_h:
-        qimg = make_repeat(qimg, (int(repeat_w), int(repeat_h)))
+        tracker.stage('make_repeat')
+        with metrics.stage('make_repeat'):
+            qimg = pattern_ops.make_repeat(qimg, (int(repeat_w), int(repeat_h)))
     # Save matrix (true-size) and a larger preview for UI
     os.makedirs(storage_path('matrices'), exist_ok=True)
     os.makedirs(storage_path('previews'), exist_ok=True)
     pv = PatternVersion(design_id=design_id, params=str(data.get('params') or {}), preview_path=None, matrix_path=None)
     db.session.add(pv)
     db.session.flush()
+    tracker.add_key(pv.id)
+    tracker.stage('png_encode', pattern_version_id=pv.id)
     matrix_path = storage_path('matrices', f'pv_{pv.id}.png')
-    qimg.save(matrix_path)
+    with metrics.stage('png_encode'):
+        qimg.save(matrix_path)
+    metrics.count_written(matrix_path, 'matrix')
     pv.matrix_path = matrix_path
     # Build preview (nearest-neighbor upscale for readability)
+    tracker.stage('preview')
     try:
-        w, h = qimg.width, qimg.height
-        target_max = int(defaults.get('preview_target') or 1600)
-        scale = 1
-        if max(w, h) < target_max:
-            scale = max(1, int(target_max / max(w, h)))
-        prev_img = qimg if scale == 1 else qimg.resize((w*scale, h*scale), Image.NEAREST)
-        preview_path = storage_path('previews', f'pv_{pv.id}.png')
-        prev_img.convert('P').save(preview_path)
+        with metrics.stage('preview'):
+            w, h = qimg.width, qimg.height
+            target_max = int(defaults.get('preview_target') or 1600)
+            scale = 1
+            if max(w, h) < target_max:
+                scale = max(1, int(target_max / max(w, h)))
+            prev_img = qimg if scale == 1 else qimg.resize((w*scale, h*scale), Image.NEAREST)
+            preview_path = storage_path('previews', f'pv_{pv.id}.png')
+            prev_img.convert('P').save(preview_path)
+        metrics.count_written(preview_path, 'preview')
         pv.preview_path = preview_path
     except Exception:
         # Fallback: store original as preview under configured output_root
@@ -897,6 +1532,7 @@ def generate_pattern():
         except Exception:
             pass
     db.session.commit()
+    tracker.done(pattern_version_id=pv.id)
     return jsonify({"pattern_version_id": pv.id, "preview_path": preview_path}), 201
 
 @api_bp.route('/export', methods=['POST'])
@@ -912,18 +1548,26 @@ def export_pattern():
     job = ExportJob(pattern_version_id=pv.id, format=fmt, file_path=None, status='processing')
     db.session.add(job)
     db.session.flush()
+    tracker = _track_request('export', EXPORT_STAGES, job.id)
+    tracker.stage('load', export_job_id=job.id)
     # Prepare source image: prefer matrix (true-size), fallback to preview
     src_path = pv.matrix_path if pv.matrix_path and os.path.exists(pv.matrix_path) else pv.preview_path
     if not src_path or not os.path.exists(src_path):
         return jsonify({"error": "Kaynak görsel bulunamadı"}), 400
-    img = Image.open(src_path)
+    with metrics.stage('export_load'), profiling.mem_stage('export_load'):
+        img = Image.open(src_path)
+        img.load()
     out_file = storage_path('exports', f'export_{job.id}.bmp')
     if fmt in ('bmp', 'bmp8'):
-        save_bmp8(img, out_file)
+        tracker.stage('encode', rows=0, rows_total=img.height)
+        with metrics.stage('export_encode'), profiling.mem_stage('export_encode'):
+            bmp_export.save_bmp8(img, out_file, progress=lambda done, total: tracker.update(done / total, rows=done))
+        metrics.count_written(out_file, 'export')
     else:
         return jsonify({"error": "Desteklenmeyen format"}), 400
     job.file_path = out_file
     job.status = 'done'
+    tracker.stage('meta')
     # Build metadata JSON (best-effort)
     try:
         meta = {
@@ -956,9 +1600,11 @@ def export_pattern():
         meta_path = storage_path('exports', f'export_{job.id}.json')
         with open(meta_path, 'w', encoding='utf-8') as f:
             json.dump(meta, f, ensure_ascii=False, indent=2)
+        job.has_meta = True
     except Exception:
         pass
     db.session.commit()
+    tracker.done()
     return jsonify({"export_job_id": job.id, "file_path": out_file}), 201
 
 @api_bp.route('/preview/<int:pv_id>', methods=['GET'])
@@ -1008,37 +1654,152 @@ def get_export_meta(job_id: int):
     return send_file(meta_path, mimetype='application/json', as_attachment=True, download_name=f'pattern_{job_id}.json')
 
 # Archive: list previews and exports, and allow deletion
+# Listings are keyset-paginated on (created_at, id) newest first. The body stays a
+# plain list; the cursor for the next page is returned in the X-Next-Cursor header.
+ARCHIVE_PAGE_DEFAULT = 100
+ARCHIVE_PAGE_MAX = 500
+
+def _page_limit(default=ARCHIVE_PAGE_DEFAULT, maximum=ARCHIVE_PAGE_MAX):
+    try:
+        limit = int(request.args.get('limit', default))
+    except Exception:
+        limit = default
+    return max(1, min(maximum, limit))
+
+def _keyset_page(query, created_col, id_col, default=ARCHIVE_PAGE_DEFAULT, maximum=ARCHIVE_PAGE_MAX):
+    """Apply ?cursor= / ?limit= to a query ordered by (created_at, id) desc.
+    Returns (rows, next_cursor) or raises ValueError on a malformed cursor.
+    """
+    limit = _page_limit(default, maximum)
+    cursor = request.args.get('cursor')
+    if cursor:
+        ts_raw, _, id_raw = cursor.rpartition('|')
+        ts, last_id = datetime.fromisoformat(ts_raw), int(id_raw)
+        query = query.filter(or_(created_col < ts, and_(created_col == ts, id_col < last_id)))
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = f"{last.created_at.isoformat()}|{last.id}"
+    return rows, next_cursor
+
+def _page_response(data, next_cursor):
+    resp = jsonify(data)
+    if next_cursor:
+        resp.headers['X-Next-Cursor'] = next_cursor
+    return resp, 200
+
 @api_bp.route('/archive/previews', methods=['GET'])
 @jwt_required()
 def list_previews():
-    pvs = PatternVersion.query.order_by(PatternVersion.created_at.desc()).all()
-    data = []
-    for pv in pvs:
-        data.append({
-            "id": pv.id,
-            "design_id": pv.design_id,
-            "design_name": pv.design.name if pv.design else None,
-            "preview_path": pv.preview_path,
-            "created_at": pv.created_at.isoformat(),
-        })
-    return jsonify(data), 200
+    q = db.session.query(
+        PatternVersion.id, PatternVersion.design_id, Design.name.label('design_name'),
+        PatternVersion.preview_path, PatternVersion.created_at,
+    ).outerjoin(Design, Design.id == PatternVersion.design_id)
+    try:
+        rows, next_cursor = _keyset_page(q, PatternVersion.created_at, PatternVersion.id)
+    except ValueError:
+        return jsonify({"error": "cursor geçersiz"}), 400
+    data = [{
+        "id": r.id,
+        "design_id": r.design_id,
+        "design_name": r.design_name,
+        "preview_path": r.preview_path,
+        "created_at": r.created_at.isoformat(),
+    } for r in rows]
+    return _page_response(data, next_cursor)
 
 @api_bp.route('/archive/exports', methods=['GET'])
 @jwt_required()
 def list_exports():
-    jobs = ExportJob.query.order_by(ExportJob.created_at.desc()).all()
-    data = []
-    for j in jobs:
-        data.append({
-            "id": j.id,
-            "pattern_version_id": j.pattern_version_id,
-            "file_path": j.file_path,
-            "format": j.format,
-            "status": j.status,
-            "created_at": j.created_at.isoformat(),
-            "has_meta": os.path.exists(storage_path('exports', f'export_{j.id}.json')),
-        })
-    return jsonify(data), 200
+    q = db.session.query(
+        ExportJob.id, ExportJob.pattern_version_id, ExportJob.file_path, ExportJob.format,
+        ExportJob.status, ExportJob.has_meta, ExportJob.created_at,
+    )
+    try:
+        rows, next_cursor = _keyset_page(q, ExportJob.created_at, ExportJob.id)
+    except ValueError:
+        return jsonify({"error": "cursor geçersiz"}), 400
+    data = [{
+        "id": r.id,
+        "pattern_version_id": r.pattern_version_id,
+        "file_path": r.file_path,
+        "format": r.format,
+        "status": r.status,
+        "created_at": r.created_at.isoformat(),
+        "has_meta": bool(r.has_meta),
+    } for r in rows]
+    return _page_response(data, next_cursor)
+
+def _id_list(data, key):
+    raw = data.get(key)
+    if raw is None:
+        raw = request.args.get(key, '')
+    if isinstance(raw, str):
+        raw = [p for p in raw.split(',') if p.strip()]
+    if not isinstance(raw, list):
+        raise ValueError(key)
+    return list(dict.fromkeys(int(v) for v in raw))
+
+# Bundle download: selected exports (BMP + meta JSON) and pattern versions (matrix +
+# preview PNG) as one ZIP, streamed while it is built (nothing staged on disk or in memory).
+@api_bp.route('/archive/bundle', methods=['GET', 'POST'])
+@jwt_required(locations=['headers', 'query_string'])
+def download_bundle():
+    """Body {"export_ids": [...], "pattern_version_ids": [...]} or the same keys as comma-separated
+    query params (with ?jwt=<token> for a plain download link). Missing files and unknown ids are
+    listed in the bundle's manifest.json.
+    """
+    data = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+    try:
+        export_ids = _id_list(data, 'export_ids')
+        pv_ids = _id_list(data, 'pattern_version_ids')
+    except (TypeError, ValueError):
+        return jsonify({"error": "Geçersiz id listesi"}), 400
+    if not export_ids and not pv_ids:
+        return jsonify({"error": "En az bir export veya desen seçilmeli"}), 400
+    if len(export_ids) + len(pv_ids) > settings.BUNDLE_MAX_ITEMS:
+        return jsonify({"error": f"En fazla {settings.BUNDLE_MAX_ITEMS} kayıt seçilebilir"}), 400
+
+    # Resolve every path now: the stream below runs after the request's DB session is gone
+    files, not_found = [], []
+    exports = {j.id: j for j in ExportJob.query.filter(ExportJob.id.in_(export_ids))} if export_ids else {}
+    for job_id in export_ids:
+        job = exports.get(job_id)
+        if job is None:
+            not_found.append(f"export:{job_id}")
+            continue
+        files.append((f"exports/pattern_{job_id}.bmp", job.file_path))
+        if job.has_meta:
+            files.append((f"exports/pattern_{job_id}.json", storage_path('exports', f'export_{job_id}.json')))
+    pvs = {pv.id: pv for pv in PatternVersion.query.filter(PatternVersion.id.in_(pv_ids))} if pv_ids else {}
+    for pv_id in pv_ids:
+        pv = pvs.get(pv_id)
+        if pv is None:
+            not_found.append(f"pattern_version:{pv_id}")
+            continue
+        files.append((f"patterns/pv_{pv_id}_matrix.png", pv.matrix_path))
+        files.append((f"patterns/pv_{pv_id}_preview.png", pv.preview_path))
+    if not any(path and os.path.isfile(path) for _, path in files):
+        return jsonify({"error": "Seçilen kayıtlar için dosya yok", "not_found": not_found}), 404
+    created = datetime.utcnow()
+
+    def entries():
+        missing = []
+        for arcname, path in files:
+            if path and os.path.isfile(path):
+                yield arcname, path
+            else:
+                missing.append(arcname)
+        manifest = {"created_at": created.isoformat(), "export_ids": export_ids, "pattern_version_ids": pv_ids,
+                    "files": [a for a, _ in files if a not in missing], "missing": missing, "not_found": not_found}
+        yield "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+
+    resp = Response(iter_zip(entries()), mimetype='application/zip')
+    resp.headers['Content-Disposition'] = f'attachment; filename="bundle_{created:%Y%m%d_%H%M%S}.zip"'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
 
 @api_bp.route('/archive/preview/<int:pv_id>', methods=['DELETE'])
 @jwt_required()
@@ -1081,27 +1842,45 @@ def delete_export(job_id: int):
 @api_bp.route('/upload-image', methods=['POST'])
 @jwt_required()
 def upload_image():
-    if 'file' not in request.files:
+    """Store an image content-addressed under images/sha256/. Accepts multipart `file`
+    or a raw image body (Content-Type image/*, ?filename=...), which is streamed
+    to disk without Werkzeug buffering it first. Identical content is stored once.
+    name/loom_id/palette_id (optional Design) come from request.values, i.e. form
+    fields or query string, for both upload kinds.
+    """
+    max_bytes = settings.UPLOAD_MAX_MB * 1024 * 1024
+    if request.content_length and request.content_length > max_bytes + 64 * 1024:
+        return jsonify({"error": f"Dosya çok büyük (en fazla {settings.UPLOAD_MAX_MB} MB)"}), 413
+    if request.mimetype.startswith('image/') or request.mimetype == 'application/octet-stream':
+        stream, filename = request.stream, request.args.get('filename') or ''
+        if not os.path.splitext(filename)[1]:
+            filename += mimetypes.guess_extension(request.mimetype) or ''
+    elif 'file' in request.files:
+        file = request.files['file']
+        stream, filename = file.stream, file.filename
+    else:
         return jsonify({"error": "Dosya yok"}), 400
-    file = request.files['file']
-    if file.filename == '':
+    if filename == '':
         return jsonify({"error": "Dosya adı boş"}), 400
-    filename = secure_filename(file.filename)
-    os.makedirs(storage_path('images'), exist_ok=True)
-    # Avoid overwrite by prefixing with user id and simple counter/time
-    uid = get_jwt_identity() or 'anon'
-    save_name = f"{uid}_{filename}"
-    save_path = storage_path('images', save_name)
-    file.save(save_path)
-    # Optional: auto create Design if form fields provided
-    name = request.form.get('name')
-    loom_id = request.form.get('loom_id')
-    palette_id = request.form.get('palette_id')
+    ext = os.path.splitext(secure_filename(filename))[1]
+    try:
+        save_path, sha, size, created = uploads.store_content_addressed(stream, storage_path('images', 'sha256'), ext, max_bytes)
+    except uploads.UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    submit_ingest(save_path, sha)
+    # Optional: auto create Design if fields provided
+    fields = request.values
+    name = fields.get('name')
+    loom_id = fields.get('loom_id')
+    palette_id = fields.get('palette_id')
     design_id = None
     if name:
         d = Design(
             name=name,
             original_image=save_path,
+            content_hash=sha,
             loom_id=int(loom_id) if loom_id and loom_id.isdigit() else None,
             palette_id=int(palette_id) if palette_id and palette_id.isdigit() else None,
         )
@@ -1109,7 +1888,8 @@ def upload_image():
         db.session.commit()
         design_id = d.id
     # Return saved path (and created design if any)
-    return jsonify({"path": save_path, "design_id": design_id}), 201
+    return jsonify({"path": save_path, "design_id": design_id, "sha256": sha, "size": size,
+                    "deduplicated": not created}), 201
 
 # Serve generated images from backend/data/generated safely
 @api_bp.route('/generated/<path:filename>', methods=['GET'])
@@ -1124,10 +1904,14 @@ def get_generated(filename: str):
         return jsonify({"error": "Dosya yok"}), 404
     return send_file(abs_full)
 
+# Color histograms of generated images live outside generated/, which is served publicly
+def _hist_dir() -> str:
+    return storage_path('cache', 'hist')
+
 # Analyze dominant colors of a generated image
 @api_bp.route('/generated/<path:filename>/colors', methods=['GET'])
 def get_generated_colors(filename: str):
-    root = os.path.join('backend', 'data', 'generated')
+    root = storage_path('generated')
     full = os.path.normpath(os.path.join(root, filename))
     abs_root = os.path.abspath(root)
     abs_full = os.path.abspath(full)
@@ -1139,40 +1923,89 @@ def get_generated_colors(filename: str):
         # number of colors to extract
         k = int(request.args.get('k', 12))
         k = max(2, min(32, k))
-        img = Image.open(abs_full).convert('RGB')
-        # quantize to k colors and get histogram
-        q = img.quantize(colors=k, method=Image.MEDIANCUT)
-        q = q.convert('RGB')
-        counts = q.getcolors(maxcolors=256*256)
-        if not counts:
-            return jsonify({"colors": []})
-        total = sum(c for c, _ in counts)
-        # sort by frequency desc
-        counts.sort(key=lambda x: x[0], reverse=True)
-        result = []
-        for c, rgb in counts[:k]:
-            r, g, b = rgb
-            hexv = f"#{r:02x}{g:02x}{b:02x}"
-            pct = round((c / total) * 100, 2)
-            result.append({"r": r, "g": g, "b": b, "hex": hexv, "percent": pct})
-        return jsonify({"colors": result}), 200
+        # Histogram of a downscaled copy is cached by content hash; any k is derived from it
+        return jsonify({"colors": color_stats.file_dominant_colors(_hist_dir(), abs_full, k)}), 200
     except Exception as e:
         return jsonify({"error": f"analyze failed: {e}"}), 500
 
-# SD WebUI txt2img proxy
-@api_bp.route('/ai/txt2img', methods=['POST'])
+# Palette suggestion: Lab k-means over the cached histogram, snapped to catalog yarns.
+# The yarn index is rebuilt only when the palette revision changes.
+_yarn_index = {"rev": None, "index": None}
+_yarn_index_lock = threading.Lock()
+
+def _get_yarn_index() -> 'palette_extract.YarnIndex':
+    rev = _palette_revision()
+    with _yarn_index_lock:
+        if _yarn_index["rev"] == rev:
+            return _yarn_index["index"]
+    rows = db.session.execute(
+        select(Color.id, Color.r, Color.g, Color.b, Color.yarn_code, Color.yarn_name)
+        .where(Color.yarn_code.isnot(None)).order_by(Color.id)
+    ).all()
+    index = palette_extract.YarnIndex([tuple(r) for r in rows])
+    with _yarn_index_lock:
+        _yarn_index.update(rev=rev, index=index)
+    return index
+
+def _suggest_palette(filename: str, k: int, snap: bool = True):
+    root = storage_path('generated')
+    abs_root = os.path.abspath(root)
+    abs_full = os.path.abspath(os.path.normpath(os.path.join(root, filename)))
+    if not abs_full.startswith(abs_root):
+        return None, (jsonify({"error": "Yetkisiz"}), 403)
+    if not os.path.exists(abs_full):
+        return None, (jsonify({"error": "Dosya yok"}), 404)
+    if k not in ALLOWED_COLORS:
+        return None, (jsonify({"error": "k 8/12/16 olmalı"}), 400)
+    colors = palette_extract.extract_palette(*color_stats.load_histogram(_hist_dir(), abs_full), k, _get_yarn_index() if snap else None)
+    for c in colors:
+        c["label"] = c.get("yarn_name") or c.get("yarn_code") or c["hex"]
+    return colors, None
+
+# Suggested palette (same shape as POST /palettes) for a generated image
+@api_bp.route('/generated/<path:filename>/palette', methods=['GET'])
 @jwt_required()
-def ai_txt2img():
+def suggest_generated_palette(filename: str):
+    try:
+        k = int(request.args.get('k', 12))
+    except ValueError:
+        return jsonify({"error": "k 8/12/16 olmalı"}), 400
+    snap = str(request.args.get('snap', '1')).lower() not in ('0', 'false', 'no')
+    colors, err = _suggest_palette(filename, k, snap)
+    if err:
+        return err
+    name = os.path.splitext(os.path.basename(filename))[0][:100]
+    return jsonify({"name": name, "max_colors": k, "colors": colors}), 200
+
+# Save the suggested palette as a Palette
+@api_bp.route('/generated/<path:filename>/palette', methods=['POST'])
+@jwt_required()
+def save_generated_palette(filename: str):
     data = request.get_json() or {}
-    prompt = data.get('prompt')
-    if not prompt:
-        return jsonify({"error": "prompt gerekli"}), 400
-    negative = data.get('negative', '')
-    width = int(data.get('width', 1024))
-    height = int(data.get('height', 1536))
-    steps = int(data.get('steps', 30))
-    cfg = float(data.get('cfg', 6))
-    seed = data.get('seed', -1)
+    try:
+        k = int(data.get('k', 12))
+    except (TypeError, ValueError):
+        return jsonify({"error": "k 8/12/16 olmalı"}), 400
+    colors, err = _suggest_palette(filename, k, bool(data.get('snap', True)))
+    if err:
+        return err
+    name = (data.get('name') or os.path.splitext(os.path.basename(filename))[0])[:100]
+    palette = Palette(name=name, max_colors=k)
+    db.session.add(palette)
+    db.session.flush()
+    for c in colors:
+        db.session.add(Color(palette_id=palette.id, r=c['r'], g=c['g'], b=c['b'], label=c['label'][:50],
+                             yarn_code=c.get('yarn_code'), yarn_name=c.get('yarn_name')))
+    _bump_palette_revision()
+    db.session.commit()
+    return jsonify({"id": palette.id, "colors": colors}), 201
+
+# SD WebUI proxies. Payload building and result saving are shared by the
+# synchronous endpoints and the background generation jobs (/ai/jobs).
+class SDRequestError(ValueError):
+    """Invalid generation request (HTTP 400)."""
+
+def _apply_forced_loras(prompt: str) -> str:
     # Backend safeguard: auto-append LoRA tag(s) if configured via env
     # Supports multiple: FORCE_LORA_NAMES="NameA,NameB" and optional FORCE_LORA_STRENGTHS="0.7,0.6"
     try:
@@ -1197,40 +2030,70 @@ def ai_txt2img():
                 if strengths_list and idx < len(strengths_list):
                     strength = strengths_list[idx] or '0.8'
                 final_prompt = f"{final_prompt} <lora:{n}:{strength}>".strip()
+        return final_prompt
     except Exception:
-        final_prompt = prompt
+        return prompt
+
+def _txt2img_payload(data: dict) -> dict:
+    prompt = data.get('prompt')
+    if not prompt:
+        raise SDRequestError("prompt gerekli")
     # Support tiling (seamless) generation; default True for pattern design
     try:
         tiling = bool(data.get('tiling', True))
     except Exception:
         tiling = True
-    payload = {
-        "prompt": final_prompt,
-        "negative_prompt": negative,
-        "width": width,
-        "height": height,
-        "steps": steps,
-        "cfg_scale": cfg,
-        "seed": seed,
+    return {
+        "prompt": _apply_forced_loras(prompt),
+        "negative_prompt": data.get('negative', ''),
+        "width": int(data.get('width', 1024)),
+        "height": int(data.get('height', 1536)),
+        "steps": int(data.get('steps', 30)),
+        "cfg_scale": float(data.get('cfg', 6)),
+        "seed": data.get('seed', -1),
         "sampler_name": data.get('sampler_name', 'DPM++ 2M Karras'),
         "n_iter": int(data.get('n_iter', 1)),
         "batch_size": int(data.get('batch_size', 1)),
         "tiling": tiling,
     }
+
+def _img2img_payload(data: dict) -> dict:
+    reference_path = data.get('reference_path')
+    if not reference_path or not os.path.exists(reference_path):
+        raise SDRequestError("reference_path geçersiz")
+    # tiling
+    try:
+        tiling = bool(data.get('tiling', True))
+    except Exception:
+        tiling = True
+    # denoising strength
     try:
-        resp = requests.post(f"{get_sd_url()}/sdapi/v1/txt2img", json=payload, timeout=SD_TIMEOUT_SEC)
-        resp.raise_for_status()
-        out = resp.json()
-        images_b64 = out.get('images', [])
+        denoise = float(data.get('denoising_strength', 0.55))
+    except Exception:
+        denoise = 0.55
+    # read image and b64 encode
+    try:
+        with open(reference_path, 'rb') as f:
+            ref_b64 = base64.b64encode(f.read()).decode('utf-8')
     except Exception as e:
-        return jsonify({"error": f"SD hatası: {e}"}), 502
+        raise SDRequestError(f"Referans okunamadı: {e}")
+    return {
+        "prompt": _apply_forced_loras(data.get('prompt') or ''),
+        "negative_prompt": data.get('negative', ''),
+        "init_images": [ref_b64],
+        "steps": int(data.get('steps', 30)),
+        "cfg_scale": float(data.get('cfg', 6)),
+        "seed": data.get('seed', -1),
+        "sampler_name": data.get('sampler_name', 'DPM++ 2M Karras'),
+        "denoising_strength": denoise,
+        "width": int(data.get('width', 1024)),
+        "height": int(data.get('height', 1024)),
+        "tiling": tiling,
+        # Resize to target size (0: Just resize)
+        "resize_mode": 0,
+    }
 
-    os.makedirs(storage_path('generated'), exist_ok=True)
-    loom_id = data.get('loom_id')
-    epi = data.get('epi')
-    ppi = data.get('ppi')
-    report_w = data.get('report_w')
-    report_h = data.get('report_h')
+def _txt2img_meta(data: dict) -> dict:
     sel_palette_id = data.get('palette_id')
     sel_max_colors = int(data.get('max_colors', 0) or 0)
     palette_colors_override = data.get('palette_colors') or None
@@ -1247,132 +2110,408 @@ def ai_txt2img():
                 palette_colors = [(c.r, c.g, c.b) for c in pal.colors]
         except Exception:
             palette_colors = None
-    frame = data.get('frame') or {}
-    frame_w = int(frame.get('width', 0) or 0)
-    frame_color = frame.get('color') or None
-    saved = []
-    for idx, b64img in enumerate(images_b64):
-        raw = base64.b64decode(b64img.split(',')[-1])
-        fname = f"ai_{uuid.uuid4().hex}_{idx}.png"
-        path = storage_path('generated', fname)
-        with open(path, 'wb') as f:
-            f.write(raw)
-        # Do NOT quantize here. Keep full-color result; palette reduction will happen at pattern generation.
-        try:
-            out_path = path
-            if frame_w > 0 and frame_color:
-                try:
-                    img0 = Image.open(path).convert('RGB')
-                    img1 = ImageOps.expand(img0, border=frame_w, fill=frame_color)
-                    fname2 = fname.replace('.png', '_fr.png')
-                    out_file_path = storage_path('generated', fname2)
-                    img1.save(out_file_path, format='PNG')
-                    saved.append({"filename": fname2, "path": out_file_path, "url": f"/api/generated/{fname2}"})
-                    continue
-                except Exception:
-                    out_file_path = path
-            saved.append({"filename": fname, "path": out_file_path, "url": f"/api/generated/{fname if out_file_path==path else fname.replace('.png','_fr.png') }"})
-        except Exception:
-            saved.append({"filename": fname, "path": path, "url": f"/api/generated/{fname}"})
-    meta = {
-        "loom_id": loom_id,
-        "epi": epi,
-        "ppi": ppi,
-        "report_w": report_w,
-        "report_h": report_h,
+    frame_w, frame_color = _frame_params(data)
+    return {
+        "loom_id": data.get('loom_id'),
+        "epi": data.get('epi'),
+        "ppi": data.get('ppi'),
+        "report_w": data.get('report_w'),
+        "report_h": data.get('report_h'),
         "palette_id": sel_palette_id,
         "max_colors": sel_max_colors if sel_max_colors else (len(palette_colors) if palette_colors else None),
         "frame": {"width": frame_w, "color": frame_color} if frame_w and frame_color else None,
     }
-    return jsonify({"results": saved, "meta": meta}), 201
 
-# SD WebUI img2img proxy (supports reference image path)
-@api_bp.route('/ai/img2img', methods=['POST'])
-@jwt_required()
-def ai_img2img():
-    data = request.get_json() or {}
-    prompt = data.get('prompt') or ''
-    negative = data.get('negative', '')
-    width = int(data.get('width', 1024))
-    height = int(data.get('height', 1024))
-    steps = int(data.get('steps', 30))
-    cfg = float(data.get('cfg', 6))
-    seed = data.get('seed', -1)
-    reference_path = data.get('reference_path')
-    if not reference_path or not os.path.exists(reference_path):
-        return jsonify({"error": "reference_path geçersiz"}), 400
-    # Auto-append LoRA tags like txt2img
+def _frame_params(data: dict):
+    frame = data.get('frame') or {}
+    return int(frame.get('width', 0) or 0), (frame.get('color') or None)
+
+# Generated images are decoded from the HTTP response stream straight into files,
+# so peak memory is one chunk rather than the whole batch of base64 images.
+B64_STREAM_CHUNK = 64 * 1024
+
+def _stream_generated(resp, prefix: str = 'ai'):
+    """Write every image embedded in a streamed SD/OpenAI JSON response under generated/."""
+    os.makedirs(storage_path('generated'), exist_ok=True)
+    return stream_b64_images(
+        resp.iter_content(B64_STREAM_CHUNK),
+        lambda idx: storage_path('generated', f"{prefix}_{uuid.uuid4().hex}_{idx}.png"),
+    )
+
+def _finish_generated(paths, frame_w: int = 0, frame_color=None):
+    """Build result dicts for written images. Each image is decoded once; the optional
+    frame, the thumbnail and the dominant-color stats all come from that decode.
+    """
+    # Do NOT quantize here. Keep full-color result; palette reduction will happen at pattern generation.
+    done = gen_postprocess.postprocess_batch(
+        list(paths), workers=settings.GEN_POSTPROCESS_WORKERS,
+        frame_w=frame_w, frame_color=frame_color, thumb_size=settings.GEN_THUMB_SIZE, hist_dir=_hist_dir(),
+    )
+    saved = []
+    for item in done:
+        fname = os.path.basename(item['path'])
+        entry = {"filename": fname, "path": item['path'], "url": f"/api/generated/{fname}"}
+        if item.get('thumb_path'):
+            entry["thumb_url"] = f"/api/generated/thumbs/{os.path.basename(item['thumb_path'])}"
+            entry["colors"] = item.get('colors') or []
+        metrics.count_written(item['path'], 'generated')
+        saved.append(entry)
+    return saved
+
+# Deterministic generation cache: with a fixed seed SD returns the same images for
+# the same payload, so identical requests reuse the saved files instead of the GPU.
+# Entries beyond GEN_CACHE_MAX_ENTRIES are evicted least-recently-used first; the
+# image files themselves stay, since earlier responses/designs may reference them.
+def _generation_cache_key(kind: str, payload: dict, frame_w: int = 0, frame_color=None):
+    """sha256 fingerprint of the exact SD request and of the backend that would serve it
+    (node URLs and their loaded checkpoints), or None when it is not cacheable (seed -1).
+    """
+    if settings.GEN_CACHE_MAX_ENTRIES <= 0:
+        return None
     try:
-        final_prompt = prompt or ''
-        names_raw = os.environ.get('FORCE_LORA_NAMES')
-        strengths_raw = os.environ.get('FORCE_LORA_STRENGTHS')
-        if not names_raw:
-            legacy = os.environ.get('FORCE_LORA_NAME')
-            if legacy:
-                names_raw = legacy
-                strengths_raw = os.environ.get('FORCE_LORA_STRENGTH', '0.8')
-        if names_raw:
-            names = [n.strip() for n in names_raw.split(',') if n.strip()]
-            strengths_list = None
-            if strengths_raw:
-                strengths_list = [s.strip() for s in strengths_raw.split(',')]
-            for idx, n in enumerate(names):
-                if f"<lora:{n}:" in final_prompt:
-                    continue
-                strength = '0.8'
-                if strengths_list and idx < len(strengths_list):
-                    strength = strengths_list[idx] or '0.8'
-                final_prompt = f"{final_prompt} <lora:{n}:{strength}>".strip()
-    except Exception:
-        final_prompt = prompt
-    # tiling
+        if int(payload.get('seed', -1)) == -1:
+            return None
+    except (TypeError, ValueError):
+        return None
+    fp = {k: v for k, v in payload.items() if k != 'init_images'}
+    # img2img: the reference image enters the key by content hash
+    fp['init_images'] = [hashlib.sha256(img.encode('ascii')).hexdigest() for img in payload.get('init_images') or []]
+    fp['_kind'] = kind
+    fp['_frame'] = [frame_w, frame_color] if frame_w > 0 and frame_color else None
+    # Same payload, other node set or model => other images
+    fp['_sd'] = get_sd_pool().checkpoints()
+    return hashlib.sha256(json.dumps(fp, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _cache_lookup(key: str):
     try:
-        tiling = bool(data.get('tiling', True))
+        entry = GenerationCache.query.filter_by(key=key).first()
+        if not entry:
+            metrics.inc('dunyatek_cache_requests_total', cache='generation', result='miss')
+            return None
+        results = json.loads(entry.results)
+        if not results or not all(os.path.exists(r.get('path') or '') for r in results):
+            # Files were cleaned up: forget the entry and generate again
+            db.session.delete(entry)
+            db.session.commit()
+            return None
+        entry.hits = (entry.hits or 0) + 1
+        entry.last_used_at = datetime.utcnow()
+        db.session.commit()
+        metrics.inc('dunyatek_cache_requests_total', cache='generation', result='hit')
+        return results
     except Exception:
-        tiling = True
-    # denoising strength
+        db.session.rollback()
+        return None
+
+def _cache_store(key: str, kind: str, results: list):
+    if not results:
+        return
     try:
-        denoise = float(data.get('denoising_strength', 0.55))
+        db.session.add(GenerationCache(key=key, kind=kind, results=json.dumps(results)))
+        db.session.commit()
+        over = GenerationCache.query.count() - settings.GEN_CACHE_MAX_ENTRIES
+        if over > 0:
+            stale = [e.id for e in GenerationCache.query.order_by(GenerationCache.last_used_at.asc()).limit(over)]
+            GenerationCache.query.filter(GenerationCache.id.in_(stale)).delete(synchronize_session=False)
+            db.session.commit()
     except Exception:
-        denoise = 0.55
-    # read image and b64 encode
+        # e.g. an identical request finished first and stored the same key
+        db.session.rollback()
+
+def _run_sd_generation(kind: str, data: dict, tracker=None) -> dict:
+    """Run one txt2img/img2img generation end to end and return the response body.
+    Raises SDRequestError for bad input; any other exception is an SD/backend failure.
+    tracker (progress.ProgressTracker over GEN_STAGES) gets the SD node and stage changes.
+    """
     try:
-        with open(reference_path, 'rb') as f:
-            ref_b64 = base64.b64encode(f.read()).decode('utf-8')
+        if kind == 'txt2img':
+            payload = _txt2img_payload(data)
+        elif kind == 'img2img':
+            payload = _img2img_payload(data)
+        else:
+            raise SDRequestError("kind txt2img veya img2img olmalı")
+    except SDRequestError:
+        raise
+    except (TypeError, ValueError) as e:
+        raise SDRequestError(f"Geçersiz parametre: {e}")
+    frame_w, frame_color = _frame_params(data) if kind == 'txt2img' else (0, None)
+    key = _generation_cache_key(kind, payload, frame_w, frame_color)
+    results = _cache_lookup(key) if key else None
+    cached = results is not None
+    if not cached:
+        on_dispatch = (lambda url: tracker.stage('sd', node=url)) if tracker else None
+        with metrics.stage(f'sd_{kind}'):
+            paths = get_sd_pool().post(f"/sdapi/v1/{kind}", payload, SD_TIMEOUT_SEC, consume=_stream_generated,
+                                       on_dispatch=on_dispatch)
+        if tracker:
+            tracker.stage('postprocess')
+        with metrics.stage('postprocess'):
+            results = _finish_generated(paths, frame_w, frame_color)
+        if key:
+            _cache_store(key, kind, results)
+    body = {"results": results, "cached": cached}
+    if kind == 'txt2img':
+        body["meta"] = _txt2img_meta(data)
+    return body
+
+def _sd_endpoint(kind: str):
+    data = request.get_json() or {}
+    tracker = _track_request('generation', GEN_STAGES)
+    try:
+        body = _run_sd_generation(kind, data, tracker)
+    except SDRequestError as e:
+        tracker.fail(str(e))
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": f"Referans okunamadı: {e}"}), 400
-    payload = {
-        "prompt": final_prompt,
-        "negative_prompt": negative,
-        "init_images": [ref_b64],
-        "steps": steps,
-        "cfg_scale": cfg,
-        "seed": seed,
-        "sampler_name": data.get('sampler_name', 'DPM++ 2M Karras'),
-        "denoising_strength": denoise,
-        "width": width,
-        "height": height,
-        "tiling": tiling,
-        # Resize to target size (0: Just resize)
-        "resize_mode": 0,
+        tracker.fail(f"SD hatası: {e}")
+        return jsonify({"error": f"SD hatası: {e}"}), 502
+    tracker.done(cached=body.get("cached"))
+    return jsonify(body), 201
+
+# SD WebUI txt2img proxy
+@api_bp.route('/ai/txt2img', methods=['POST'])
+@jwt_required()
+def ai_txt2img():
+    return _sd_endpoint('txt2img')
+
+# SD WebUI img2img proxy (supports reference image path)
+@api_bp.route('/ai/img2img', methods=['POST'])
+@jwt_required()
+def ai_img2img():
+    return _sd_endpoint('img2img')
+
+# Background generation jobs: submit returns immediately, a thread pool with a
+# shared HTTP session talks to SD, clients poll status/result.
+_gen_executor = None
+_gen_executor_lock = threading.Lock()
+
+def _generation_executor():
+    global _gen_executor
+    if _gen_executor is None:
+        with _gen_executor_lock:
+            if _gen_executor is None:
+                # Daemon workers: a job still running after drain_background_jobs() is requeued
+                # and abandoned, and must not keep the exiting worker process alive
+                from services.workpool import DaemonThreadPool
+                _gen_executor = DaemonThreadPool(max_workers=settings.SD_JOB_WORKERS, thread_name_prefix='sd-job')
+    return _gen_executor
+
+def _run_generation_job(app, job_id: int):
+    with app.app_context():
+        # Atomic claim so a job re-submitted by another worker process runs only once.
+        # started_at identifies this run (whole seconds: some backends drop microseconds).
+        claimed_at = datetime.utcnow().replace(microsecond=0)
+        claimed = GenerationJob.query.filter_by(id=job_id, status='queued').update(
+            {"status": "running", "started_at": claimed_at})
+        db.session.commit()
+        if not claimed:
+            return
+        job = db.session.get(GenerationJob, job_id)
+        tracker = _progress_tracker('generation', [job_id], GEN_STAGES)
+        tracker.stage('sd')
+        try:
+            body = _run_sd_generation(job.kind, json.loads(job.params), tracker)
+            outcome = {"status": "done", "result": json.dumps(body)}
+        except Exception as e:
+            db.session.rollback()
+            outcome = {"status": "error", "error": str(e) if isinstance(e, SDRequestError) else f"SD hatası: {e}"}
+        if job_id in _requeued:
+            db.session.rollback()  # handed back to the queue by drain_background_jobs()
+            return
+        # Only while this run still owns the job: requeue_stale_jobs() may have handed it on
+        owned = GenerationJob.query.filter_by(id=job_id, status='running', started_at=claimed_at).update(
+            dict(outcome, finished_at=datetime.utcnow()), synchronize_session=False)
+        db.session.commit()
+        if not owned:
+            return
+        if outcome["status"] == 'done':
+            tracker.done(job_id=job_id)
+        else:
+            tracker.fail(outcome["error"])
+
+# In-flight job futures of this process, so a stopping worker can drain them.
+# Read and written under _gen_executor_lock (submits, done-callbacks and sweeps race).
+_gen_futures = {}
+_requeued = set()
+_draining = threading.Event()
+
+def _submit_job(app, job_id: int):
+    if _draining.is_set():
+        return  # stays 'queued'; resume_generation_jobs() in another worker picks it up
+    executor = _generation_executor()
+    with _gen_executor_lock:
+        if job_id in _gen_futures.values():
+            return
+        fut = executor.submit(_run_generation_job, app, job_id)
+        _gen_futures[fut] = job_id
+    # Outside the lock: a future that is already done runs the callback right here
+    fut.add_done_callback(_forget_job_future)
+
+def _forget_job_future(fut):
+    with _gen_executor_lock:
+        _gen_futures.pop(fut, None)
+
+def submit_generation_job(job_id: int):
+    _submit_job(current_app._get_current_object(), job_id)
+
+def _job_stale_sec() -> float:
+    # Longest a healthy run can take: every SD attempt timing out, plus post-processing
+    return settings.JOB_STALE_SEC or SD_TIMEOUT_SEC * (settings.SD_NODE_RETRIES + 1) + 60
+
+def requeue_stale_jobs(app) -> int:
+    """Put 'running' jobs whose worker died (crash, OOM kill, SIGKILL after graceful_timeout)
+    back to 'queued'. Jobs running in this process are left alone; a stale run that does
+    finish later finds it no longer owns the job and discards its result.
+    """
+    with _gen_executor_lock:
+        local = set(_gen_futures.values())
+    with app.app_context():
+        q = GenerationJob.query.filter(
+            GenerationJob.status == 'running',
+            or_(GenerationJob.started_at.is_(None),
+                GenerationJob.started_at < datetime.utcnow() - timedelta(seconds=_job_stale_sec())))
+        if local:
+            q = q.filter(GenerationJob.id.notin_(local))
+        n = q.update({"status": "queued", "started_at": None}, synchronize_session=False)
+        db.session.commit()
+    return n
+
+def resume_generation_jobs(app):
+    """Re-submit jobs still queued from a previous run, or stuck 'running' past _job_stale_sec()
+    (claims are atomic, duplicates are harmless).
+    """
+    requeue_stale_jobs(app)
+    with app.app_context():
+        ids = [j.id for j in GenerationJob.query.filter_by(status='queued').order_by(GenerationJob.id.asc())]
+    for jid in ids:
+        _submit_job(app, jid)
+    return len(ids)
+
+def drain_background_jobs(app, timeout: float) -> dict:
+    """Stop taking generation jobs and wait up to `timeout` seconds for the running ones.
+    Jobs not started yet stay 'queued'; jobs still running at the deadline are put back to
+    'queued'. Either way the next worker's resume_generation_jobs() runs them.
+    """
+    from concurrent.futures import wait
+    _draining.set()
+    with _gen_executor_lock:
+        executor = _gen_executor
+        futures = dict(_gen_futures)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+    if _ingest_executor is not None:
+        _ingest_executor.shutdown(wait=False, cancel_futures=True)  # rebuilt inline on demand
+    running = [f for f in futures if not f.cancelled()]
+    done, not_done = wait(running, timeout=timeout) if running else (set(), set())
+    stuck = [futures[f] for f in not_done]
+    _requeued.update(stuck)
+    if stuck:
+        with app.app_context():
+            GenerationJob.query.filter(GenerationJob.id.in_(stuck), GenerationJob.status == 'running').update(
+                {"status": "queued", "started_at": None}, synchronize_session=False)
+            db.session.commit()
+    return {"finished": len(done), "requeued": len(stuck), "cancelled": len(futures) - len(running)}
+
+WARMUP_STEPS = ('imports', 'palettes', 'db', 'http')
+
+def warm_up(app, steps=WARMUP_STEPS):
+    """Pay first-request costs up front; returns {step: seconds}. Steps:
+      imports   load the lazily imported numpy/PIL/requests-backed services
+      palettes  pre-build Lab tables for stored palettes and the yarn index
+      db        open connections up to the pool size
+      http      build the shared SD/OpenAI keep-alive session
+    """
+    timings = {}
+    for step in steps:
+        t0 = time.perf_counter()
+        try:
+            if step == 'imports':
+                for m in LAZY_MODULES:
+                    m._load()
+            elif step == 'palettes':
+                with app.app_context():
+                    for p in Palette.query.options(selectinload(Palette.colors)).all():
+                        rgb = [(c.r, c.g, c.b) for c in p.colors]
+                        if len(rgb) >= 2:
+                            image_processing.palette_lab(rgb)
+                    _get_yarn_index()
+            elif step == 'db':
+                with app.app_context():
+                    engine = db.engine
+                    size = engine.pool.size() if hasattr(engine.pool, 'size') else 1
+                    conns = [engine.connect() for _ in range(max(1, min(size, settings.DB_POOL_SIZE)))]
+                    for c in conns:
+                        c.execute(text('SELECT 1'))
+                    for c in conns:
+                        c.close()
+            elif step == 'http':
+                from services.sd_client import get_session
+                get_session()
+            else:
+                continue
+        except Exception as e:
+            app.logger.warning(f"Warm-up adımı başarısız ({step}): {e}")
+        timings[step] = round(time.perf_counter() - t0, 4)
+    return timings
+
+def _job_json(job: GenerationJob, with_result: bool = True):
+    out = {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
     }
+    if with_result and job.status == 'done' and job.result:
+        out.update(json.loads(job.result))
+    return out
+
+@api_bp.route('/ai/jobs', methods=['POST'])
+@jwt_required()
+def submit_ai_job():
+    data = request.get_json() or {}
+    kind = data.get('kind', 'txt2img')
+    if kind not in ('txt2img', 'img2img'):
+        return jsonify({"error": "kind txt2img veya img2img olmalı"}), 400
+    # Validate up front so bad requests fail fast instead of as an errored job
     try:
-        resp = requests.post(f"{get_sd_url()}/sdapi/v1/img2img", json=payload, timeout=SD_TIMEOUT_SEC)
-        resp.raise_for_status()
-        out = resp.json()
-        images_b64 = out.get('images', [])
+        if kind == 'txt2img':
+            _txt2img_payload(data)
+        elif not data.get('reference_path') or not os.path.exists(data.get('reference_path')):
+            raise SDRequestError("reference_path geçersiz")
+    except SDRequestError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": f"SD hatası: {e}"}), 502
-    os.makedirs(storage_path('generated'), exist_ok=True)
-    saved = []
-    for idx, b64img in enumerate(images_b64):
-        raw = base64.b64decode(b64img.split(',')[-1])
-        fname = f"ai_{uuid.uuid4().hex}_{idx}.png"
-        path = storage_path('generated', fname)
-        with open(path, 'wb') as f:
-            f.write(raw)
-        saved.append({"filename": fname, "path": path, "url": f"/api/generated/{fname}"})
-    return jsonify({"results": saved}), 201
+        return jsonify({"error": f"Geçersiz parametre: {e}"}), 400
+    uid = get_jwt_identity()
+    job = GenerationJob(user_id=int(uid) if uid and str(uid).isdigit() else None, kind=kind, status='queued', params=json.dumps(data))
+    db.session.add(job)
+    db.session.commit()
+    _progress_tracker('generation', [job.id], GEN_STAGES).stage('queued', job_id=job.id)
+    submit_generation_job(job.id)
+    return jsonify({"job_id": job.id, "status": job.status}), 202
+
+@api_bp.route('/ai/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_ai_job(job_id: int):
+    job = db.session.get(GenerationJob, job_id)
+    if not job:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    return jsonify(_job_json(job, with_result=False)), 200
+
+@api_bp.route('/ai/jobs/<int:job_id>/result', methods=['GET'])
+@jwt_required()
+def get_ai_job_result(job_id: int):
+    job = db.session.get(GenerationJob, job_id)
+    if not job:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    if job.status == 'error':
+        return jsonify(_job_json(job)), 502
+    if job.status != 'done':
+        return jsonify(_job_json(job)), 202
+    return jsonify(_job_json(job)), 200
 
 @api_bp.route('/v2/ai/txt2img', methods=['POST'])
 @jwt_required()
@@ -1408,94 +2547,139 @@ def v2_ai_txt2img():
     final_prompt = prompt
     if negative:
         final_prompt = f"{prompt}\nNegative: {negative}"
-    # Prefer OpenAI Python SDK (as in C:\desenrun) to avoid auth nuances
-    items = []
-    sdk_err = None
-    try:
-        import openai
-        openai.api_key = api_key
-        # Optional base_url / org from meta/env
-        if base_url and base_url.strip():
-            try:
-                openai.base_url = base_url.rstrip('/')
-            except Exception:
-                pass
-        org = meta.get('organization') or os.environ.get('OPENAI_ORG')
-        if org:
-            try:
-                openai.organization = org
-            except Exception:
-                pass
-        result = openai.images.generate(model=model, prompt=final_prompt, size=size, n=total)
-        items = getattr(result, 'data', []) or []
-    except Exception as e:
-        sdk_err = str(e)
-        items = []
-    if not items:
-        # Fallback: direct HTTP to generations endpoint
-        try:
-            url = f"{(base_url or 'https://api.openai.com').rstrip('/')}/v1/images/generations"
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-                "User-Agent": "dunyatek-v2/1.0"
-            }
-            if meta.get('project'):
-                headers['OpenAI-Project'] = meta['project']
-            org = meta.get('organization') or os.environ.get('OPENAI_ORG')
-            if org:
-                headers['OpenAI-Organization'] = org
-            payload = {"model": model, "prompt": final_prompt, "size": size, "n": total}
-            resp = requests.post(url, headers=headers, json=payload, timeout=SD_TIMEOUT_SEC)
-            try:
-                resp.raise_for_status()
-            except Exception as rexc:
-                # include response text for debugging
-                return jsonify({"error": f"OpenAI HTTP hatası: {rexc}; body={resp.text[:500]}"}), 502
-            js = resp.json()
-            items = js.get('data') or []
-        except Exception as e:
-            # Return combined error context
-            return jsonify({"error": f"OpenAI fallback hatası: {e}; sdk_err={sdk_err}"}), 502
-    os.makedirs(storage_path('generated'), exist_ok=True)
-    saved = []
-    for idx, it in enumerate(items):
-        b64 = it.get('b64_json')
-        if not b64:
-            continue
-        raw = base64.b64decode(b64)
-        fname = f"ai_v2_{uuid.uuid4().hex}_{idx}.png"
-        path = storage_path('generated', fname)
-        try:
-            with open(path, 'wb') as f:
-                f.write(raw)
-            saved.append({"filename": fname, "path": path, "url": f"/api/generated/{fname}"})
-        except Exception:
-            continue
+    client = get_openai_client(api_key, base_url, meta.get('organization') or os.environ.get('OPENAI_ORG'), meta.get('project'))
+    # Resolved here: file names are made on the client's worker threads (no app context there)
+    gen_dir = storage_path('generated')
+    os.makedirs(gen_dir, exist_ok=True)
+    run_id = uuid.uuid4().hex
+    events = client.generate_iter(
+        model, final_prompt, size, total,
+        lambda index, idx: os.path.join(gen_dir, f"ai_v2_{run_id}_{index}_{idx}.png"),
+    )
+
+    def _event(ev):
+        if 'paths' in ev:
+            return {"index": ev['index'], "results": _finish_generated(ev['paths'])}
+        return ev
+
+    if str(request.args.get('progress', '')).lower() in ('1', 'true', 'yes'):
+        # NDJSON: one line per image as it completes, then a summary line
+        def gen():
+            results, errors = [], []
+            for ev in events:
+                out = _event(ev)
+                results.extend(out.get('results') or [])
+                if 'error' in out:
+                    errors.append(out)
+                yield json.dumps(out) + "\n"
+            yield json.dumps({"done": True, "results": results, "errors": errors}) + "\n"
+        return Response(stream_with_context(gen()), mimetype='application/x-ndjson')
+    saved, errors = [], []
+    for ev in events:
+        out = _event(ev)
+        if 'error' in out:
+            errors.append(out)
+        else:
+            saved.append((out['index'], out['results']))
     if not saved:
-        return jsonify({"error": "OpenAI çıktı alınamadı"}), 502
-    return jsonify({"results": saved}), 201
+        return jsonify({"error": "OpenAI çıktı alınamadı", "errors": errors}), 502
+    saved.sort(key=lambda x: x[0])
+    # Partial success is still 201; failed items are listed in "errors"
+    return jsonify({"results": [r for _, rs in saved for r in rs], "errors": errors}), 201
 
 # Prompt Templates CRUD
+PROMPT_PAGE_DEFAULT = 200
+PROMPT_PAGE_MAX = 1000
+_prompt_search_mode = None  # 'fts5' | 'tsvector' | 'like'; resolved once per process
+
+def _prompt_search_backend():
+    global _prompt_search_mode
+    if _prompt_search_mode is None:
+        mode = 'like'
+        try:
+            insp = inspect(db.engine)
+            dialect = db.engine.dialect.name
+            if dialect == 'sqlite' and insp.has_table('prompt_templates_fts'):
+                mode = 'fts5'
+            elif dialect == 'postgresql' and 'search_tsv' in [c['name'] for c in insp.get_columns('prompt_templates')]:
+                mode = 'tsvector'
+        except Exception:
+            pass
+        _prompt_search_mode = mode
+    return _prompt_search_mode
+
+def _search_prompts(q, limit, offset):
+    """Ranked prompt search over name/prompt/negative/tags; every word is a prefix match."""
+    words = re.findall(r'\w+', q, re.UNICODE)
+    if not words:
+        return []
+    mode = _prompt_search_backend()
+    if mode == 'fts5':
+        sql = ("SELECT rowid FROM prompt_templates_fts WHERE prompt_templates_fts MATCH :q "
+               "ORDER BY rank LIMIT :limit OFFSET :offset")
+        params = {"q": ' '.join(f'"{w}"*' for w in words)}
+    elif mode == 'tsvector':
+        sql = ("SELECT id FROM prompt_templates WHERE search_tsv @@ to_tsquery('simple', :q) "
+               "ORDER BY ts_rank(search_tsv, to_tsquery('simple', :q)) DESC, id DESC LIMIT :limit OFFSET :offset")
+        params = {"q": ' & '.join(f'{w}:*' for w in words)}
+    else:
+        query = PromptTemplate.query
+        for w in words:
+            like = f"%{w}%"
+            query = query.filter(or_(PromptTemplate.name.ilike(like), PromptTemplate.prompt.ilike(like),
+                                     PromptTemplate.negative.ilike(like), PromptTemplate.tags.ilike(like)))
+        return query.order_by(PromptTemplate.created_at.desc(), PromptTemplate.id.desc()).offset(offset).limit(limit).all()
+    params.update(limit=limit, offset=offset)
+    ids = [r[0] for r in db.session.execute(text(sql), params)]
+    by_id = {p.id: p for p in PromptTemplate.query.filter(PromptTemplate.id.in_(ids)).all()} if ids else {}
+    return [by_id[i] for i in ids if i in by_id]
+
+def _prompt_json(p: PromptTemplate) -> dict:
+    return {
+        "id": p.id,
+        "name": p.name,
+        "prompt": p.prompt,
+        "negative": p.negative,
+        "width": p.width,
+        "height": p.height,
+        "steps": p.steps,
+        "cfg": p.cfg,
+        "sampler": p.sampler,
+        "tags": p.tags,
+        "created_at": p.created_at.isoformat() if p.created_at else None,
+    }
+
 @api_bp.route('/prompts', methods=['GET'])
 @jwt_required()
 def list_prompts():
-    items = PromptTemplate.query.order_by(PromptTemplate.created_at.desc()).all()
-    return jsonify([
-        {
-            "id": p.id,
-            "name": p.name,
-            "prompt": p.prompt,
-            "negative": p.negative,
-            "width": p.width,
-            "height": p.height,
-            "steps": p.steps,
-            "cfg": p.cfg,
-            "sampler": p.sampler,
-            "tags": p.tags,
-            "created_at": p.created_at.isoformat() if p.created_at else None,
-        } for p in items
-    ]), 200
+    """Newest-first listing, keyset-paginated like the archive (X-Next-Cursor).
+    With ?q= runs a ranked full-text search; the cursor is then the next offset.
+    """
+    q = (request.args.get('q') or '').strip()
+    if q:
+        limit = _page_limit(PROMPT_PAGE_DEFAULT, PROMPT_PAGE_MAX)
+        try:
+            offset = max(0, int(request.args.get('cursor') or 0))
+        except Exception:
+            return jsonify({"error": "cursor geçersiz"}), 400
+        items = _search_prompts(q, limit + 1, offset)
+        next_cursor = str(offset + limit) if len(items) > limit else None
+        items = items[:limit]
+    else:
+        try:
+            items, next_cursor = _keyset_page(PromptTemplate.query, PromptTemplate.created_at, PromptTemplate.id,
+                                              PROMPT_PAGE_DEFAULT, PROMPT_PAGE_MAX)
+        except ValueError:
+            return jsonify({"error": "cursor geçersiz"}), 400
+    return _page_response([_prompt_json(p) for p in items], next_cursor)
+
+@api_bp.route('/prompts/<int:pid>', methods=['GET'])
+@jwt_required()
+def get_prompt(pid: int):
+    p = db.session.get(PromptTemplate, pid)
+    if not p:
+        return jsonify({"error": "Prompt bulunamadı"}), 404
+    return jsonify(_prompt_json(p)), 200
 
 @api_bp.route('/prompts', methods=['POST'])
 @jwt_required()
@@ -1,26 +1,77 @@
+import time
+
 from flask import Flask
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 
 from config.settings import settings  # settings.py config klasöründe
+from config.db_profiles import engine_options, install_sqlite_pragmas
 from extensions import db
-from api.routes import api_bp
 
-app = Flask(__name__)
 
-# Config yükleme
-app.config['SECRET_KEY'] = settings.SECRET_KEY
-app.config['SQLALCHEMY_DATABASE_URI'] = settings.SQLALCHEMY_DATABASE_URI
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = settings.SQLALCHEMY_TRACK_MODIFICATIONS
-app.config['JWT_SECRET_KEY'] = settings.SECRET_KEY  # JWT için gizli anahtar
+def create_app(warmup=None, migrate=None, resume_jobs=True) -> Flask:
+    """Uygulamayı kur. warmup: çalıştırılacak warm-up adımları (None -> settings.APP_WARMUP),
+    migrate: None -> settings.AUTO_MIGRATE. Süreler app.config['STARTUP_TIMINGS'] içinde.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    from api.routes import api_bp, resume_generation_jobs, warm_up
+    from migrations import run_migrations
+    timings['import_routes'] = round(time.perf_counter() - t0, 4)
+
+    app = Flask(__name__)
+
+    # Config yükleme
+    app.config['SECRET_KEY'] = settings.SECRET_KEY
+    app.config['SQLALCHEMY_DATABASE_URI'] = settings.SQLALCHEMY_DATABASE_URI
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = settings.SQLALCHEMY_TRACK_MODIFICATIONS
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(settings)
+    app.config['JWT_SECRET_KEY'] = settings.SECRET_KEY  # JWT için gizli anahtar
+
+    # Eklentiler
+    install_sqlite_pragmas(settings)
+    db.init_app(app)
+    JWTManager(app)
+    CORS(app, expose_headers=['ETag', 'X-Next-Cursor', 'X-Profile-Id'])
+
+    # Blueprint
+    app.register_blueprint(api_bp, url_prefix='/api')
+
+    # Şema: tablolar + bekleyen migration'lar (başlangıçta bir kez).
+    # Hata yutulmaz: yarım kalmış bir şema ile servis başlamamalı.
+    if settings.AUTO_MIGRATE if migrate is None else migrate:
+        t1 = time.perf_counter()
+        with app.app_context():
+            run_migrations(log=app.logger.info)
+        timings['migrate'] = round(time.perf_counter() - t1, 4)
+
+    # Önceki çalıştırmadan kuyrukta kalan üretim işlerini yeniden başlat
+    if resume_jobs:
+        try:
+            resume_generation_jobs(app)
+        except Exception as e:
+            app.logger.warning(f"Üretim işleri devam ettirilemedi: {e}")
+
+    steps = settings.APP_WARMUP if warmup is None else warmup
+    if steps:
+        timings['warmup'] = warm_up(app, steps)
+    timings['total'] = round(time.perf_counter() - t0, 4)
+    app.config['STARTUP_TIMINGS'] = timings
+    return app
+
+
+_app = None
+
 
-# Eklentiler
-db.init_app(app)
-jwt = JWTManager(app)
-CORS(app)
+def __getattr__(name):
+    # `from app import app` (init_db.py, bench scripts) builds the default app on first use
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(name)
 
-# Blueprint
-app.register_blueprint(api_bp, url_prefix='/api')
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,133 @@
+"""Concurrency benchmark: hammer /generate-pattern and /export in parallel.
+
+Runs the Flask app in-process (one test client per thread) against the given
+database so the SQLite WAL profile and a PostgreSQL profile can be compared:
+
+    python bench/db_concurrency.py                      # temp SQLite file
+    python bench/db_concurrency.py --db sqlite:////tmp/x.db --no-wal
+    python bench/db_concurrency.py --db postgresql+psycopg2://u:p@localhost/dunyatek_bench
+
+Reports per-endpoint latency percentiles, throughput and error counts
+(including "database is locked").
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def _setup(app, size):
+    """Create a user, palette and design with a synthetic image; return (token, design_id)."""
+    import numpy as np
+    from PIL import Image
+    from flask_jwt_extended import create_access_token
+    from extensions import db
+    from api.models import User, Palette, Color, Design
+
+    with app.app_context():
+        user = User(name='bench', email=f'bench_{time.time_ns()}@local', password_hash='x', role='admin')
+        pal = Palette(name='bench', max_colors=8)
+        db.session.add_all([user, pal])
+        db.session.flush()
+        rng = np.random.default_rng(0)
+        for r, g, b in rng.integers(0, 256, size=(8, 3)):
+            db.session.add(Color(palette_id=pal.id, r=int(r), g=int(g), b=int(b)))
+        img_dir = os.path.join(os.environ['OUTPUT_ROOT'], 'images')
+        os.makedirs(img_dir, exist_ok=True)
+        img_path = os.path.join(img_dir, 'bench_src.png')
+        Image.fromarray(rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8), 'RGB').save(img_path)
+        d = Design(name='bench', original_image=img_path, palette_id=pal.id)
+        db.session.add(d)
+        db.session.commit()
+        return create_access_token(identity=str(user.id)), d.id
+
+
+def _call(client, url, payload, headers):
+    """POST and return (status, json, error_text); app exceptions propagate in testing mode."""
+    try:
+        r = client.post(url, json=payload, headers=headers)
+        body = r.get_json(silent=True) or {}
+        return r.status_code, body, (str(body.get('error')) if r.status_code >= 400 else '')
+    except Exception as e:
+        return 500, {}, str(e)
+
+
+def _worker(app, token, design_id, iterations, stats, lock):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        status, body, err = _call(client, '/api/generate-pattern', {"design_id": design_id}, headers)
+        _record(stats, lock, 'generate-pattern', time.perf_counter() - t0, status, err)
+        pv_id = body.get('pattern_version_id')
+        if status != 201 or not pv_id:
+            continue
+        t0 = time.perf_counter()
+        status, _, err = _call(client, '/api/export', {"pattern_version_id": pv_id}, headers)
+        _record(stats, lock, 'export', time.perf_counter() - t0, status, err)
+
+
+def _record(stats, lock, name, dt, status, err):
+    with lock:
+        s = stats.setdefault(name, {"lat": [], "errors": 0, "locked": 0})
+        s["lat"].append(dt)
+        if status >= 400:
+            s["errors"] += 1
+            if 'locked' in err.lower():
+                s["locked"] += 1
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--db', help='DATABASE_URL (default: temp SQLite file)')
+    ap.add_argument('--workers', type=int, default=8)
+    ap.add_argument('--iterations', type=int, default=10, help='generate+export rounds per worker')
+    ap.add_argument('--size', type=int, default=512, help='synthetic source image edge (px)')
+    ap.add_argument('--no-wal', action='store_true', help='disable the SQLite WAL profile (baseline)')
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='dunyatek_bench_')
+    os.environ['DATABASE_URL'] = args.db or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['OUTPUT_ROOT'] = os.path.join(tmp, 'output')
+    if args.no_wal:
+        os.environ['DB_SQLITE_WAL'] = '0'
+        os.environ['DB_SQLITE_MMAP_MB'] = '0'
+
+    from app import app  # imported after env so settings pick up the profile
+    app.testing = True  # surface DB errors ("database is locked") to the worker
+
+    token, design_id = _setup(app, args.size)
+    stats, lock = {}, threading.Lock()
+    threads = [threading.Thread(target=_worker, args=(app, token, design_id, args.iterations, stats, lock))
+               for _ in range(args.workers)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    print(f"db={os.environ['DATABASE_URL']} workers={args.workers} iterations={args.iterations} wall={wall:.2f}s")
+    for name, s in stats.items():
+        lat = [v * 1000 for v in s["lat"]]
+        print(f"{name:18s} n={len(lat):5d} rps={len(lat) / wall:7.2f} "
+              f"mean={statistics.mean(lat):8.1f}ms p50={_pct(lat, 50):8.1f}ms "
+              f"p95={_pct(lat, 95):8.1f}ms p99={_pct(lat, 99):8.1f}ms "
+              f"errors={s['errors']} locked={s['locked']}")
+
+
+if __name__ == '__main__':
+    main()
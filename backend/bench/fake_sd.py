@@ -0,0 +1,131 @@
+"""Local stand-in for the Stable Diffusion WebUI API.
+
+Answers /sdapi/v1/txt2img and /sdapi/v1/img2img with canned base64 PNGs after a
+configurable delay, /sdapi/v1/progress with the current load and
+/sdapi/v1/options with a fixed checkpoint name (FakeSD.model). Point the app
+at it with SD_URL=http://127.0.0.1:<port>. It also answers the OpenAI
+/v1/images/generations endpoint (OPENAI_BASE_URL=http://127.0.0.1:<port>).
+
+    python bench/fake_sd.py --port 7861 --latency 2.0 --size 512
+"""
+import argparse
+import base64
+import json
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_png(width: int, height: int, seed: int = 0) -> bytes:
+    """Build a small RGB gradient PNG with the standard library only."""
+    rows = []
+    for y in range(height):
+        row = bytearray([0])  # filter type None
+        for x in range(width):
+            row += bytes(((x * 255 // max(1, width - 1) + seed) & 255,
+                          (y * 255 // max(1, height - 1)) & 255,
+                          (seed * 37) & 255))
+        rows.append(bytes(row))
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr)
+            + chunk(b'IDAT', zlib.compress(b''.join(rows), 6)) + chunk(b'IEND', b''))
+
+
+class FakeSD:
+    def __init__(self, latency: float = 0.5, size: int = 256, fail_rate: float = 0.0, model: str = 'fake.safetensors'):
+        self.latency = latency
+        self.model = model
+        self.fail_rate = fail_rate
+        self.image_b64 = base64.b64encode(make_png(size, size)).decode('ascii')
+        self.active = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                raw = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                if self.path.startswith('/sdapi/v1/progress'):
+                    with fake.lock:
+                        active = fake.active
+                    self._send(200, {"progress": 0.5 if active else 0.0, "eta_relative": fake.latency if active else 0.0,
+                                     "state": {"job_count": active}})
+                elif self.path == '/sdapi/v1/options':
+                    self._send(200, {"sd_model_checkpoint": fake.model})
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if self.path not in ('/sdapi/v1/txt2img', '/sdapi/v1/img2img', '/v1/images/generations'):
+                    self._send(404, {"error": "not found"})
+                    return
+                with fake.lock:
+                    fake.active += 1
+                    fake.calls += 1
+                    n = fake.calls
+                try:
+                    time.sleep(fake.latency)
+                    if fake.fail_rate and (n * 7919 % 1000) / 1000.0 < fake.fail_rate:
+                        self._send(500, {"error": "fake failure"})
+                        return
+                    if self.path == '/v1/images/generations':
+                        count = max(1, int(payload.get('n', 1)))
+                        self._send(200, {"created": int(time.time()), "data": [{"b64_json": fake.image_b64}] * count})
+                        return
+                    count = max(1, int(payload.get('batch_size', 1))) * max(1, int(payload.get('n_iter', 1)))
+                    self._send(200, {"images": [fake.image_b64] * count, "parameters": payload, "info": "{}"})
+                finally:
+                    with fake.lock:
+                        fake.active -= 1
+
+        return Handler
+
+
+def serve(port: int = 0, **kwargs):
+    """Start a fake SD server in a daemon thread; returns (server, base_url, FakeSD)."""
+    fake = FakeSD(**kwargs)
+    server = ThreadingHTTPServer(('127.0.0.1', port), fake.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", fake
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--port', type=int, default=7861)
+    ap.add_argument('--latency', type=float, default=0.5, help='seconds per generation request')
+    ap.add_argument('--size', type=int, default=256, help='edge of the canned PNG (px)')
+    ap.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with HTTP 500')
+    args = ap.parse_args()
+    server, url, _ = serve(args.port, latency=args.latency, size=args.size, fail_rate=args.fail_rate)
+    print(f"fake SD WebUI listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
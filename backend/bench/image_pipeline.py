@@ -0,0 +1,228 @@
+"""Image pipeline benchmark: quantize / snap / make_repeat / save_bmp8 / preview.
+
+Every case runs in a forked child so peak RSS is measured per case. Throughput
+is reported as megapixels per second (best of --repeat runs). Results can be
+saved as a JSON baseline and later compared against it:
+
+    python bench/image_pipeline.py --sizes 256,1024,2048 --save-baseline bench/baseline.json
+    python bench/image_pipeline.py --sizes 256,1024,2048 --baseline bench/baseline.json --threshold 0.15
+    python bench/image_pipeline.py --sizes 8192 --palettes 16 --ops quantize,make_repeat,bmp8
+    python bench/image_pipeline.py --images scans/a.tif,scans/b.jpg
+
+Exit status is 1 when any case regresses by more than --threshold (slower
+throughput or higher peak RSS). Case ids: <op>/<image>/<colors>/<dither|nodither>.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import resource
+except ImportError:  # Windows: no per-case RSS
+    resource = None
+
+OPS = ('quantize', 'mediancut', 'snap', 'snap_ingest', 'make_repeat', 'bmp8', 'preview')
+DITHER_OPS = ('quantize', 'mediancut', 'snap')
+
+
+def synthetic_image(size: int, seed: int = 0):
+    """Deterministic carpet-like test image: smooth gradients, a tiled motif and noise."""
+    import numpy as np
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / max(1, size - 1)
+    motif = (np.sin(x * 40) * np.cos(y * 40) > 0.2).astype(np.float32)
+    r = 140 + 90 * x - 60 * motif
+    g = 60 + 80 * y + 50 * motif
+    b = 90 + 70 * (1 - x) * y
+    arr = np.stack([r, g, b], axis=-1) + rng.normal(0, 6, (size, size, 3))
+    return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8), 'RGB')
+
+
+def palette_for(k: int, seed: int = 1):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    return [tuple(int(c) for c in row) for row in rng.integers(0, 256, (k, 3))]
+
+
+def _rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    v = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(v / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _run_op(op, path, k, dither, workdir):
+    from PIL import Image
+    from services.image_processing import quantize_to_palette
+    from services.ingest import IngestedImage, ingest_image
+    from services.pattern_ops import make_repeat
+    from services.exporters.bmp import save_bmp8
+
+    pal = palette_for(k)
+    if op == 'quantize':
+        return lambda: quantize_to_palette(path, palette=pal, dither=dither)
+    if op == 'mediancut':
+        return lambda: quantize_to_palette(path, palette=None, max_colors=k, dither=dither)
+    if op == 'snap':
+        return lambda: quantize_to_palette(path, palette=pal, dither=dither, delta_e_tolerance=2.0)
+    if op == 'snap_ingest':
+        src = IngestedImage(ingest_image(path, os.path.join(workdir, 'ingest', os.path.basename(path)), 0))
+        return lambda: quantize_to_palette(path, palette=pal, delta_e_tolerance=2.0, source=src)
+    q = quantize_to_palette(path, palette=pal)
+    if op == 'make_repeat':
+        return lambda: make_repeat(q, (q.width * 2, q.height * 2))
+    if op == 'bmp8':
+        return lambda: save_bmp8(q, os.path.join(workdir, 'out.bmp'))
+    if op == 'preview':
+        def preview():
+            # Same steps as generate_pattern's preview
+            w, h = q.width, q.height
+            scale = max(1, int(1600 / max(w, h))) if max(w, h) < 1600 else 1
+            img = q if scale == 1 else q.resize((w * scale, h * scale), Image.NEAREST)
+            img.convert('P').save(os.path.join(workdir, 'preview.png'))
+        return preview
+    raise ValueError(op)
+
+
+def _case_child(conn, op, path, k, dither, repeat, workdir):
+    try:
+        fn = _run_op(op, path, k, dither, workdir)
+        base_rss = _rss_mb()
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        conn.send({"seconds": best, "peak_rss_mb": _rss_mb(), "base_rss_mb": base_rss})
+    except MemoryError:
+        conn.send({"error": "MemoryError"})
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def run_case(op, path, k, dither, repeat, workdir, timeout):
+    ctx = mp.get_context('fork') if hasattr(os, 'fork') else mp.get_context('spawn')
+    parent, child = ctx.Pipe(duplex=False)
+    p = ctx.Process(target=_case_child, args=(child, op, path, k, dither, repeat, workdir))
+    p.start()
+    child.close()
+    res = parent.recv() if parent.poll(timeout) else {"error": "timeout"}
+    p.join(5)
+    if p.is_alive():
+        p.kill()
+    if p.exitcode and p.exitcode < 0 and 'error' not in res:
+        res = {"error": f"killed (signal {-p.exitcode})"}
+    return res
+
+
+def _snap_too_big(px, k, limit_mb):
+    # _snap_image_to_palette materialises an (N, K, 3) float64 distance block; peak RSS
+    # measures at roughly twice that with the temporaries
+    return 2 * px * k * 3 * 8 / (1024 * 1024) > limit_mb
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for cid, cur in results.items():
+        base = baseline.get(cid)
+        if not base or 'mpx_s' not in cur or 'mpx_s' not in base:
+            continue
+        if cur['mpx_s'] < base['mpx_s'] * (1 - threshold):
+            regressions.append(f"{cid}: {cur['mpx_s']:.2f} Mpx/s vs baseline {base['mpx_s']:.2f}")
+        if cur.get('peak_rss_mb') and base.get('peak_rss_mb') and cur['peak_rss_mb'] > base['peak_rss_mb'] * (1 + threshold):
+            regressions.append(f"{cid}: peak RSS {cur['peak_rss_mb']} MB vs baseline {base['peak_rss_mb']} MB")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--sizes', default='256,1024,2048,4096', help='synthetic image edges (px), e.g. 256,1024,8192')
+    ap.add_argument('--images', default='', help='comma-separated sample image files (used at native size)')
+    ap.add_argument('--palettes', default='8,12,16,256', help='palette sizes')
+    ap.add_argument('--ops', default=','.join(OPS), help=f"subset of {','.join(OPS)}")
+    ap.add_argument('--dither', default='off,on', help='off, on or off,on (quantize/mediancut/snap only)')
+    ap.add_argument('--repeat', type=int, default=3, help='timed runs per case (best is kept)')
+    ap.add_argument('--timeout', type=float, default=600, help='seconds per case')
+    ap.add_argument('--snap-limit-mb', type=float, default=4096,
+                    help='skip snap cases whose distance block would exceed this')
+    ap.add_argument('--json', help='write results JSON here')
+    ap.add_argument('--save-baseline', help='write results as the new baseline JSON')
+    ap.add_argument('--baseline', help='compare against this baseline JSON')
+    ap.add_argument('--threshold', type=float, default=0.10, help='allowed relative regression (0.10 = 10%%)')
+    args = ap.parse_args()
+
+    import numpy as np
+    import PIL
+    from PIL import Image
+
+    workdir = tempfile.mkdtemp(prefix='dunyatek_imgbench_')
+    os.environ.setdefault('IMAGE_CACHE_MB', '0')  # measure the pipeline, not the decode cache
+    images = []
+    for s in [int(v) for v in args.sizes.split(',') if v.strip()]:
+        path = os.path.join(workdir, f'synthetic_{s}.png')
+        synthetic_image(s).save(path, compress_level=1)
+        images.append((f'{s}x{s}', path, s * s))
+    for path in [p.strip() for p in args.images.split(',') if p.strip()]:
+        with Image.open(path) as im:
+            images.append((os.path.basename(path), path, im.width * im.height))
+    palettes = [int(v) for v in args.palettes.split(',') if v.strip()]
+    ops = [o.strip() for o in args.ops.split(',') if o.strip()]
+    dithers = [d.strip() == 'on' for d in args.dither.split(',') if d.strip()]
+
+    results = {}
+    print(f"{'case':44s} {'Mpx/s':>9s} {'sec':>8s} {'peakRSS':>9s}")
+    for name, path, px in images:
+        for op in ops:
+            for k in (palettes if op not in ('make_repeat', 'bmp8', 'preview') else [16]):
+                for dither in (dithers if op in DITHER_OPS else [False]):
+                    cid = f"{op}/{name}/{k}/{'dither' if dither else 'nodither'}"
+                    if op == 'snap' and _snap_too_big(px, k, args.snap_limit_mb):
+                        results[cid] = {"skipped": f"distance block > {args.snap_limit_mb:.0f} MB"}
+                        print(f"{cid:44s} {'skipped':>9s}")
+                        continue
+                    res = run_case(op, path, k, dither, args.repeat, workdir, args.timeout)
+                    if 'error' in res:
+                        results[cid] = res
+                        print(f"{cid:44s} {'error':>9s} {res['error']}")
+                        continue
+                    mpx = px / 1e6 / res['seconds'] if res['seconds'] > 0 else float('inf')
+                    results[cid] = {"mpx_s": round(mpx, 3), "seconds": round(res['seconds'], 4),
+                                    "peak_rss_mb": res['peak_rss_mb'], "megapixels": round(px / 1e6, 3)}
+                    print(f"{cid:44s} {mpx:9.2f} {res['seconds']:8.3f} {str(res['peak_rss_mb']):>9s}")
+
+    doc = {
+        "meta": {"python": platform.python_version(), "pillow": PIL.__version__, "numpy": np.__version__,
+                 "platform": platform.platform(), "cpus": os.cpu_count(), "repeat": args.repeat,
+                 "created_at": time.strftime('%Y-%m-%dT%H:%M:%S')},
+        "results": results,
+    }
+    for out in (args.json, args.save_baseline):
+        if out:
+            with open(out, 'w', encoding='utf-8') as f:
+                json.dump(doc, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            base = json.load(f).get('results', {})
+        regressions = compare(results, base, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print('  ' + line)
+            sys.exit(1)
+        print(f"\nno regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""End-to-end load test: the real HTTP stack against fake SD / OpenAI backends.
+
+Starts bench/fake_sd.py (SD WebUI + OpenAI images stand-in) and the Flask app
+on a threaded local HTTP server, then drives a weighted mix of endpoints from
+--concurrency client threads for --duration seconds:
+
+    python bench/load_test.py                                   # default mix, 8 clients, 30 s
+    python bench/load_test.py --concurrency 32 --duration 120 --sd-latency 2.0
+    python bench/load_test.py --mix generate=5,export=2,preview=5,archive=3
+    python bench/load_test.py --db postgresql+psycopg2://u:p@localhost/dunyatek_load --json load.json
+
+Mix keys: txt2img (/ai/txt2img), openai (/v2/ai/txt2img), generate
+(/generate-pattern), export (/export), preview (/preview/<id>), archive
+(/archive/previews and /archive/exports). Reports per-endpoint throughput,
+latency percentiles and error rates, plus the most frequent error messages.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench.db_concurrency import _pct, _setup  # noqa: E402
+from bench.fake_sd import serve as serve_fake  # noqa: E402
+
+DEFAULT_MIX = 'txt2img=2,openai=1,generate=3,export=2,preview=3,archive=2'
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('txt2img', 'openai', 'generate', 'export', 'preview', 'archive'):
+            raise SystemExit(f"unknown mix key: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def record(self, name, dt, status, err=''):
+        with self.lock:
+            s = self.data.setdefault(name, {"lat": [], "errors": 0, "messages": Counter()})
+            s["lat"].append(dt)
+            if status >= 400 or status == 0:
+                s["errors"] += 1
+                s["messages"][f"{status} {err}"[:160]] += 1
+
+
+class Client:
+    """One simulated user: keep-alive session, shares known pattern versions with the others."""
+
+    def __init__(self, base, token, design_id, pv_ids, pv_lock, stats, seed):
+        import requests
+        self.base = base + '/api'
+        self.http = requests.Session()
+        self.http.headers['Authorization'] = f"Bearer {token}"
+        self.design_id = design_id
+        self.pv_ids = pv_ids
+        self.pv_lock = pv_lock
+        self.stats = stats
+        self.rng = random.Random(seed)
+
+    def _call(self, name, method, path, **kw):
+        t0 = time.perf_counter()
+        try:
+            r = self.http.request(method, self.base + path, timeout=600, **kw)
+            status = r.status_code
+            body = r.json() if r.headers.get('Content-Type', '').startswith('application/json') else {}
+            err = str(body.get('error', '')) if status >= 400 and isinstance(body, dict) else ''
+        except Exception as e:
+            status, body, err = 0, {}, f"{type(e).__name__}: {e}"
+        self.stats.record(name, time.perf_counter() - t0, status, err)
+        return status, body
+
+    def _pv_id(self):
+        with self.pv_lock:
+            return self.rng.choice(self.pv_ids) if self.pv_ids else None
+
+    def txt2img(self):
+        self._call('txt2img', 'POST', '/ai/txt2img',
+                   json={"prompt": "load test carpet", "width": 512, "height": 512, "seed": -1})
+
+    def openai(self):
+        self._call('openai', 'POST', '/v2/ai/txt2img',
+                   json={"prompt": "load test carpet", "width": 1024, "height": 1024, "batch_size": 2})
+
+    def generate(self):
+        status, body = self._call('generate', 'POST', '/generate-pattern', json={"design_id": self.design_id})
+        pv_id = body.get('pattern_version_id') if status == 201 else None
+        if pv_id:
+            with self.pv_lock:
+                self.pv_ids.append(pv_id)
+
+    def export(self):
+        pv_id = self._pv_id()
+        if pv_id:
+            self._call('export', 'POST', '/export', json={"pattern_version_id": pv_id})
+
+    def preview(self):
+        pv_id = self._pv_id()
+        if pv_id:
+            self._call('preview', 'GET', f'/preview/{pv_id}')
+
+    def archive(self):
+        self._call('archive', 'GET', self.rng.choice(('/archive/previews', '/archive/exports')),
+                   params={"limit": 50})
+
+
+def _client_loop(client, mix, deadline):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        getattr(client, client.rng.choices(names, weights)[0])()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--db', help='DATABASE_URL (default: temp SQLite file)')
+    ap.add_argument('--concurrency', type=int, default=8, help='client threads')
+    ap.add_argument('--duration', type=float, default=30, help='seconds of load')
+    ap.add_argument('--mix', default=DEFAULT_MIX, help='endpoint weights, e.g. generate=3,export=1')
+    ap.add_argument('--size', type=int, default=512, help='synthetic design image edge (px)')
+    ap.add_argument('--sd-latency', type=float, default=0.5, help='fake SD / OpenAI seconds per request')
+    ap.add_argument('--sd-size', type=int, default=512, help='edge of the canned generated PNG (px)')
+    ap.add_argument('--fail-rate', type=float, default=0.0, help='fraction of fake backend requests answered 500')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--json', help='write the report as JSON here')
+    args = ap.parse_args()
+
+    fake_server, fake_url, _ = serve_fake(latency=args.sd_latency, size=args.sd_size, fail_rate=args.fail_rate)
+    tmp = tempfile.mkdtemp(prefix='dunyatek_load_')
+    os.environ['DATABASE_URL'] = args.db or f"sqlite:///{os.path.join(tmp, 'load.db')}"
+    os.environ['OUTPUT_ROOT'] = os.path.join(tmp, 'output')
+    os.environ['SD_URL'] = fake_url
+    os.environ['OPENAI_BASE_URL'] = fake_url
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-load-test')
+
+    from werkzeug.serving import make_server
+    from app import app  # imported after env so settings pick up the fakes
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no per-request access log
+    token, design_id = _setup(app, args.size)
+    http = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{http.server_port}"
+
+    mix = _parse_mix(args.mix)
+    stats = Stats()
+    pv_ids, pv_lock = [], threading.Lock()
+    # Seed one pattern version so export/preview have work from the first second
+    Client(base, token, design_id, pv_ids, pv_lock, Stats(), args.seed).generate()
+
+    clients = [Client(base, token, design_id, pv_ids, pv_lock, stats, args.seed + i + 1)
+               for i in range(args.concurrency)]
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=_client_loop, args=(c, mix, deadline)) for c in clients]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    http.shutdown()
+    fake_server.shutdown()
+
+    print(f"db={os.environ['DATABASE_URL']} concurrency={args.concurrency} wall={wall:.1f}s "
+          f"sd_latency={args.sd_latency}s mix={args.mix}")
+    report = {"wall_sec": round(wall, 3), "concurrency": args.concurrency, "mix": mix, "endpoints": {}}
+    for name in sorted(stats.data):
+        s = stats.data[name]
+        lat = [v * 1000 for v in s["lat"]]
+        n = len(lat)
+        row = {"requests": n, "rps": round(n / wall, 2), "error_rate": round(s["errors"] / n, 4),
+               "p50_ms": round(_pct(lat, 50), 1), "p90_ms": round(_pct(lat, 90), 1),
+               "p95_ms": round(_pct(lat, 95), 1), "p99_ms": round(_pct(lat, 99), 1),
+               "max_ms": round(max(lat), 1), "top_errors": s["messages"].most_common(3)}
+        report["endpoints"][name] = row
+        print(f"{name:9s} n={n:5d} rps={row['rps']:7.2f} p50={row['p50_ms']:8.1f}ms p90={row['p90_ms']:8.1f}ms "
+              f"p95={row['p95_ms']:8.1f}ms p99={row['p99_ms']:8.1f}ms max={row['max_ms']:8.1f}ms "
+              f"errors={s['errors']} ({row['error_rate']:.1%})")
+        for msg, count in row["top_errors"]:
+            print(f"          {count:5d} x {msg}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
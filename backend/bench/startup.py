@@ -0,0 +1,118 @@
+"""Startup benchmark: worker boot time and first-request latency, cold vs warmed.
+
+Each sample is a fresh interpreter (like a worker after deploy/restart). It
+measures `import app`, create_app() (with its per-phase STARTUP_TIMINGS) and
+the first and second /generate-pattern + /export round trips:
+
+    python bench/startup.py                         # warmup=none vs warmup=all, 5 runs each
+    python bench/startup.py --runs 10 --variants none,imports,all
+    python bench/startup.py --db postgresql+psycopg2://u:p@localhost/dunyatek_bench
+
+Variants name the APP_WARMUP steps (none, all, or a '+'-joined subset such
+as imports+palettes).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+ALL_STEPS = 'imports,palettes,db,http'
+
+
+def _child_prepare(size):
+    from bench.db_concurrency import _setup
+    from app import create_app
+    app = create_app(warmup=())
+    token, design_id = _setup(app, size)
+    print(json.dumps({"token": token, "design_id": design_id}))
+
+
+def _child_measure(token, design_id):
+    t0 = time.perf_counter()
+    import app as app_module
+    t_import = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    app = app_module.create_app(resume_jobs=False)
+    t_create = time.perf_counter() - t1
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    out = {"import_sec": t_import, "create_app_sec": t_create, "boot_sec": time.perf_counter() - t0,
+           "startup_timings": app.config.get('STARTUP_TIMINGS')}
+    for label in ('first', 'second'):
+        t = time.perf_counter()
+        r = client.post('/api/generate-pattern', json={"design_id": design_id}, headers=headers)
+        pv_id = (r.get_json(silent=True) or {}).get('pattern_version_id')
+        out[f'{label}_generate_sec'] = time.perf_counter() - t
+        t = time.perf_counter()
+        client.post('/api/export', json={"pattern_version_id": pv_id}, headers=headers)
+        out[f'{label}_export_sec'] = time.perf_counter() - t
+        if r.status_code != 201:
+            out['error'] = f"generate-pattern HTTP {r.status_code}"
+    print(json.dumps(out))
+
+
+def _run_child(args, env):
+    res = subprocess.run([sys.executable, os.path.abspath(__file__)] + args, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--db', help='DATABASE_URL (default: temp SQLite file)')
+    ap.add_argument('--runs', type=int, default=5, help='fresh processes per variant')
+    ap.add_argument('--variants', default='none,all', help='comma-separated warm-up variants')
+    ap.add_argument('--size', type=int, default=512, help='synthetic source image edge (px)')
+    ap.add_argument('--json', help='write raw samples as JSON here')
+    ap.add_argument('--child', help=argparse.SUPPRESS)
+    ap.add_argument('--token', help=argparse.SUPPRESS)
+    ap.add_argument('--design-id', type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child == 'prepare':
+        return _child_prepare(args.size)
+    if args.child == 'measure':
+        return _child_measure(args.token, args.design_id)
+
+    tmp = tempfile.mkdtemp(prefix='dunyatek_startup_')
+    env = dict(os.environ)
+    env['DATABASE_URL'] = args.db or f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+    env['OUTPUT_ROOT'] = os.path.join(tmp, 'output')
+    prep = _run_child(['--child', 'prepare', '--size', str(args.size)], env)
+
+    samples = {}
+    for variant in [v.strip() for v in args.variants.split(',') if v.strip()]:
+        steps = '' if variant == 'none' else ALL_STEPS if variant == 'all' else variant.replace('+', ',')
+        venv = dict(env, APP_WARMUP=steps)
+        samples[variant] = [
+            _run_child(['--child', 'measure', '--token', prep['token'], '--design-id', str(prep['design_id'])], venv)
+            for _ in range(args.runs)
+        ]
+
+    keys = ('import_sec', 'create_app_sec', 'boot_sec', 'first_generate_sec', 'second_generate_sec',
+            'first_export_sec', 'second_export_sec')
+    print(f"db={env['DATABASE_URL']} runs={args.runs} (median ms)")
+    print(f"{'variant':18s} " + ' '.join(f"{k[:-4]:>16s}" for k in keys))
+    for variant, rows in samples.items():
+        med = [statistics.median(r[k] for r in rows) * 1000 for k in keys]
+        print(f"{variant:18s} " + ' '.join(f"{v:16.1f}" for v in med))
+        errors = [r['error'] for r in rows if r.get('error')]
+        if errors:
+            print(f"{'':18s} errors: {errors[0]} (x{len(errors)})")
+        warm = [r['startup_timings'].get('warmup') for r in rows if r['startup_timings'].get('warmup')]
+        if warm:
+            print(f"{'':18s} warm-up: " + ', '.join(
+                f"{step}={statistics.median(w[step] for w in warm) * 1000:.1f}ms" for step in warm[0]))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(samples, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
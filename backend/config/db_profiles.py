@@ -0,0 +1,64 @@
+"""Database engine profiles.
+
+SQLite (default, single box): WAL journal so readers do not block the writer,
+synchronous=NORMAL (safe with WAL), a busy timeout instead of immediate
+"database is locked" errors, and mmap for reads.
+PostgreSQL (multi worker / multi host): sized connection pool with pre-ping
+so connections dropped by the server are replaced transparently.
+"""
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+_pragmas_installed = False
+
+
+def backend_name(uri: str) -> str:
+    try:
+        return make_url(uri).get_backend_name()
+    except Exception:
+        return 'sqlite'
+
+
+def engine_options(settings) -> dict:
+    """Return SQLALCHEMY_ENGINE_OPTIONS for the configured database URI."""
+    uri = settings.SQLALCHEMY_DATABASE_URI
+    name = backend_name(uri)
+    if name == 'sqlite':
+        # sqlite3's own timeout covers the connect/begin path, busy_timeout the rest
+        return {"connect_args": {"timeout": settings.DB_BUSY_TIMEOUT_MS / 1000.0}}
+    if name == 'postgresql':
+        return {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+        }
+    return {"pool_pre_ping": True}
+
+
+def install_sqlite_pragmas(settings):
+    """Apply per-connection SQLite pragmas to every new DB-API connection (idempotent)."""
+    global _pragmas_installed
+    if _pragmas_installed:
+        return
+    _pragmas_installed = True
+
+    @event.listens_for(Engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, _record):
+        if not isinstance(dbapi_conn, sqlite3.Connection):
+            return
+        cur = dbapi_conn.cursor()
+        try:
+            cur.execute(f"PRAGMA busy_timeout={int(settings.DB_BUSY_TIMEOUT_MS)}")
+            if settings.DB_SQLITE_WAL:
+                # journal_mode is persistent in the file; in-memory DBs silently keep 'memory'
+                cur.execute("PRAGMA journal_mode=WAL")
+                cur.execute("PRAGMA synchronous=NORMAL")
+            if settings.DB_SQLITE_MMAP_MB > 0:
+                cur.execute(f"PRAGMA mmap_size={int(settings.DB_SQLITE_MMAP_MB) * 1024 * 1024}")
+            cur.execute("PRAGMA temp_store=MEMORY")
+        finally:
+            cur.close()
@@ -11,5 +11,73 @@ class Settings:
     r"sqlite:///C:/dunyatek/dunyatek/backend/dunyatek.db"  # tam yol
 )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # DB engine profile (see config/db_profiles.py)
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "30000"))
+    DB_SQLITE_WAL = os.getenv("DB_SQLITE_WAL", "1").lower() in ("1", "true", "yes", "on")
+    DB_SQLITE_MMAP_MB = int(os.getenv("DB_SQLITE_MMAP_MB", "256"))
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Background SD generation jobs (/ai/jobs)
+    SD_JOB_WORKERS = int(os.getenv("SD_JOB_WORKERS", "4"))
+    SD_HTTP_POOL_SIZE = int(os.getenv("SD_HTTP_POOL_SIZE", "16"))
+    # SD backend pool: "http://gpu1:7860|2,http://gpu2:7860" (url|weight). Empty = single sd_url.
+    SD_NODES = os.getenv("SD_NODES", "")
+    SD_PROBE_INTERVAL_SEC = float(os.getenv("SD_PROBE_INTERVAL_SEC", "10"))
+    SD_NODE_RETRIES = int(os.getenv("SD_NODE_RETRIES", "2"))
+    # Generated image post-processing (frame, thumbnail, color stats)
+    GEN_POSTPROCESS_WORKERS = int(os.getenv("GEN_POSTPROCESS_WORKERS", "4"))
+    GEN_THUMB_SIZE = int(os.getenv("GEN_THUMB_SIZE", "384"))
+    # Fixed-seed generation cache size (entries, LRU); 0 disables
+    GEN_CACHE_MAX_ENTRIES = int(os.getenv("GEN_CACHE_MAX_ENTRIES", "500"))
+    # OpenAI image generation: parallel single-image requests and per-image retries
+    OPENAI_IMAGE_CONCURRENCY = int(os.getenv("OPENAI_IMAGE_CONCURRENCY", "4"))
+    OPENAI_IMAGE_RETRIES = int(os.getenv("OPENAI_IMAGE_RETRIES", "2"))
+    # Image uploads (/upload-image): size limit, stored content-addressed by sha256
+    UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "200"))
+    # Upload-time ingest: working copy cap (longest side, px) and background workers
+    INGEST_MAX_SIDE = int(os.getenv("INGEST_MAX_SIDE", "4096"))
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+    # Decoded-image LRU (MB, 0 disables); IMAGE_CACHE_SHM shares entries across worker processes
+    IMAGE_CACHE_MB = int(os.getenv("IMAGE_CACHE_MB", "512"))
+    IMAGE_CACHE_SHM = os.getenv("IMAGE_CACHE_SHM", "0").lower() in ("1", "true", "yes", "on")
+    # Prometheus metrics at /api/metrics (per worker): scraped with "Bearer <METRICS_TOKEN>", else admin JWT only
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes", "on")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    # Admin request profiling (X-Profile header), off unless enabled; sampler interval for "sample" mode
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0").lower() in ("1", "true", "yes", "on")
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "2"))
+    # Only the newest N profiles are kept on disk (0 = keep all)
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+    # Warm-up steps run by create_app(): imports,palettes,db,http (empty disables)
+    APP_WARMUP = tuple(s.strip() for s in os.getenv("APP_WARMUP", "imports,palettes,db,http").split(",") if s.strip())
+    # Production runner (serve.py): bind address, pre-forked worker processes and request
+    # threads per worker (I/O-bound SD/OpenAI proxy calls wait here)
+    WEB_BIND = os.getenv("WEB_BIND", "127.0.0.1:5000")
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", "2"))
+    WEB_THREADS = int(os.getenv("WEB_THREADS", "8"))
+    WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", "600"))
+    WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+    # Seconds a stopping worker waits for in-flight requests, then for running generation jobs
+    WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "60"))
+    JOB_DRAIN_TIMEOUT = int(os.getenv("JOB_DRAIN_TIMEOUT", "120"))
+    # Seconds between each worker's sweep for queued generation jobs (handed back by a draining worker)
+    JOB_RESUME_INTERVAL = int(os.getenv("JOB_RESUME_INTERVAL", "30"))
+    # 'running' generation jobs older than this are requeued by the resume sweep (0 = SD timeout x attempts + 60s)
+    JOB_STALE_SEC = int(os.getenv("JOB_STALE_SEC", "0"))
+    # CPU-bound image work (quantization) runs in this many processes per worker (0 = inline)
+    CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "2"))
+    # Job progress files (SSE /events) older than this are pruned
+    PROGRESS_TTL_HOURS = float(os.getenv("PROGRESS_TTL_HOURS", "24"))
+    # How often an SSE stream checks for new progress (ms)
+    PROGRESS_POLL_MS = int(os.getenv("PROGRESS_POLL_MS", "250"))
+    # SSE keep-alive comment interval and maximum stream length (seconds)
+    SSE_HEARTBEAT_SEC = int(os.getenv("SSE_HEARTBEAT_SEC", "15"))
+    SSE_MAX_SEC = int(os.getenv("SSE_MAX_SEC", "3600"))
+    # Most export + pattern ids accepted by one /archive/bundle download
+    BUNDLE_MAX_ITEMS = int(os.getenv("BUNDLE_MAX_ITEMS", "500"))
+    # Run pending schema migrations on startup (set 0 to run only via init_db.py)
+    AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1").lower() in ("1", "true", "yes", "on")
 
 settings = Settings()
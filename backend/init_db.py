@@ -1,9 +1,10 @@
 from app import app
 from extensions import db
+from migrations import run_migrations
 # Import models so SQLAlchemy sees them
 from api.models import User, Loom, Palette, Color, Design, PatternVersion, ExportJob
 
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
-        print("Database tables created.")
+        version = run_migrations(log=print)
+        print(f"Database tables created. Schema version: {version}")
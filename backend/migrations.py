@@ -0,0 +1,168 @@
+"""Versioned, run-once schema migrations.
+
+`db.create_all()` only creates missing tables; it never alters existing ones.
+Column additions and indexes for databases created by older versions are
+applied here, once, and the applied version is recorded in `schema_version`.
+Run at app startup (see app.py) or explicitly via `python init_db.py`.
+Several workers may start at once, so every step holds a database-wide lock:
+a transaction-level advisory lock on PostgreSQL, BEGIN IMMEDIATE on SQLite.
+"""
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from extensions import db
+
+
+def _add_column(conn, table: str, column: str, ddl: str):
+    cols = [c['name'] for c in inspect(conn).get_columns(table)]
+    if column not in cols:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _create_index(conn, name: str, table: str, columns: str):
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _m001_user_role(conn):
+    _add_column(conn, 'users', 'role', 'VARCHAR(20) NULL')
+
+
+def _m002_color_yarn(conn):
+    _add_column(conn, 'colors', 'yarn_code', 'VARCHAR(80) NULL')
+    _add_column(conn, 'colors', 'yarn_name', 'VARCHAR(120) NULL')
+
+
+def _m003_fk_and_created_at_indexes(conn):
+    # Names match SQLAlchemy's ix_<table>_<column> so create_all and this agree
+    _create_index(conn, 'ix_colors_palette_id', 'colors', 'palette_id')
+    _create_index(conn, 'ix_designs_loom_id', 'designs', 'loom_id')
+    _create_index(conn, 'ix_designs_palette_id', 'designs', 'palette_id')
+    _create_index(conn, 'ix_designs_created_at', 'designs', 'created_at')
+    _create_index(conn, 'ix_pattern_versions_design_id', 'pattern_versions', 'design_id')
+    _create_index(conn, 'ix_pattern_versions_created_at', 'pattern_versions', 'created_at')
+    _create_index(conn, 'ix_export_jobs_pattern_version_id', 'export_jobs', 'pattern_version_id')
+    _create_index(conn, 'ix_export_jobs_created_at', 'export_jobs', 'created_at')
+    _create_index(conn, 'ix_prompt_templates_created_at', 'prompt_templates', 'created_at')
+
+
+def _m004_archive_keyset(conn):
+    _add_column(conn, 'export_jobs', 'has_meta', 'BOOLEAN NOT NULL DEFAULT FALSE')
+    # Backfill from disk once; new exports set the flag when they write the meta JSON
+    rows = conn.execute(text("SELECT id, file_path FROM export_jobs WHERE file_path IS NOT NULL")).fetchall()
+    with_meta = [{"id": r[0]} for r in rows if os.path.exists(os.path.splitext(r[1])[0] + '.json')]
+    if with_meta:
+        conn.execute(text("UPDATE export_jobs SET has_meta = TRUE WHERE id = :id"), with_meta)
+    _create_index(conn, 'ix_pattern_versions_created_at_id', 'pattern_versions', 'created_at, id')
+    _create_index(conn, 'ix_export_jobs_created_at_id', 'export_jobs', 'created_at, id')
+
+
+def _m005_prompt_search(conn):
+    """Full-text index over prompt templates: FTS5 on SQLite, a tsvector + GIN on PostgreSQL.
+    If neither is available the /prompts?q= search falls back to LIKE.
+    """
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        if not conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+            return
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS prompt_templates_fts USING fts5("
+            "name, prompt, negative, tags, content='prompt_templates', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        ))
+        cols = "name, prompt, negative, tags"
+        new = "new.name, new.prompt, new.negative, new.tags"
+        old = "old.name, old.prompt, old.negative, old.tags"
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS prompt_templates_fts_ai AFTER INSERT ON prompt_templates BEGIN "
+            f"INSERT INTO prompt_templates_fts(rowid, {cols}) VALUES (new.id, {new}); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS prompt_templates_fts_ad AFTER DELETE ON prompt_templates BEGIN "
+            f"INSERT INTO prompt_templates_fts(prompt_templates_fts, rowid, {cols}) VALUES ('delete', old.id, {old}); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS prompt_templates_fts_au AFTER UPDATE ON prompt_templates BEGIN "
+            f"INSERT INTO prompt_templates_fts(prompt_templates_fts, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO prompt_templates_fts(rowid, {cols}) VALUES (new.id, {new}); END"
+        ))
+        conn.execute(text("INSERT INTO prompt_templates_fts(prompt_templates_fts) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        conn.execute(text(
+            "ALTER TABLE prompt_templates ADD COLUMN IF NOT EXISTS search_tsv tsvector GENERATED ALWAYS AS ("
+            "to_tsvector('simple', coalesce(name,'') || ' ' || coalesce(prompt,'') || ' ' || "
+            "coalesce(negative,'') || ' ' || coalesce(tags,''))) STORED"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_prompt_templates_search_tsv ON prompt_templates USING GIN (search_tsv)"))
+
+
+def _m006_design_content_hash(conn):
+    _add_column(conn, 'designs', 'content_hash', 'VARCHAR(64) NULL')
+    _create_index(conn, 'ix_designs_content_hash', 'designs', 'content_hash')
+
+
+# (version, description, fn). Append only; never renumber applied entries.
+MIGRATIONS = [
+    (1, 'users.role', _m001_user_role),
+    (2, 'colors.yarn_code / colors.yarn_name', _m002_color_yarn),
+    (3, 'foreign key and created_at indexes', _m003_fk_and_created_at_indexes),
+    (4, 'export_jobs.has_meta, (created_at, id) keyset indexes', _m004_archive_keyset),
+    (5, 'prompt template full-text search index', _m005_prompt_search),
+    (6, 'designs.content_hash', _m006_design_content_hash),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description VARCHAR(200), applied_at TIMESTAMP)"
+    ))
+
+
+def current_version(conn) -> int:
+    _ensure_version_table(conn)
+    v = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    return int(v or 0)
+
+
+# Arbitrary constant shared by every process of this app (pg_advisory_xact_lock key)
+MIGRATION_LOCK_KEY = 0x64756E79
+
+
+@contextmanager
+def _locked(conn):
+    """Transaction on conn that no other migration runner can enter concurrently."""
+    with conn.begin():
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": MIGRATION_LOCK_KEY})
+        elif conn.dialect.name == 'sqlite':
+            # pysqlite defers BEGIN until the first DML; take the write lock up front instead
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        yield
+
+
+def run_migrations(log=None) -> int:
+    """Create missing tables, apply pending migrations and return the schema version.
+    Must be called inside an app context. Each migration runs in its own locked
+    transaction and re-reads the version first, so a runner that waited on the lock
+    skips what another one already applied. Errors propagate to the caller.
+    """
+    with db.engine.connect() as conn:
+        with _locked(conn):
+            db.metadata.create_all(bind=conn)
+        while True:
+            with _locked(conn):
+                version = current_version(conn)
+                pending = [m for m in MIGRATIONS if m[0] > version]
+                if not pending:
+                    return version
+                num, desc, fn = pending[0]
+                fn(conn)
+                conn.execute(
+                    text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                    {"v": num, "d": desc, "t": datetime.utcnow()},
+                )
+            if log:
+                log(f"Migration {num} uygulandı: {desc}")
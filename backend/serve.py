@@ -0,0 +1,154 @@
+"""Production entry point (replaces `python app.py` outside development).
+
+POSIX: gunicorn with WEB_WORKERS pre-forked processes, each serving WEB_THREADS
+request threads (gthread). Threads cover the I/O-bound SD/OpenAI proxy calls;
+quantization goes to a per-worker process pool of CPU_POOL_WORKERS. The app is
+built once in the master (migrations, imports, palette tables) and inherited
+by the workers; DB connections and HTTP sessions are opened per worker.
+
+Windows (no fork): waitress if installed, else Werkzeug's threaded server,
+single process.
+
+    python serve.py
+    python serve.py --bind 0.0.0.0:5000 --workers 4 --threads 16 --cpu-workers 2
+
+Restart without dropping work: `kill -HUP <master>` replaces the workers, each old
+worker finishes in-flight requests (WEB_GRACEFUL_TIMEOUT), then waits for running
+generation jobs (JOB_DRAIN_TIMEOUT); unfinished jobs go back to the queue and are
+resumed by the new workers. SIGTERM drains the same way before exiting.
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from config.settings import settings
+
+log = logging.getLogger('dunyatek.serve')
+
+
+def _resume_loop(app):
+    from api.routes import resume_generation_jobs
+    while True:
+        try:
+            resume_generation_jobs(app)
+        except Exception as e:
+            app.logger.warning(f"Üretim işleri devam ettirilemedi: {e}")
+        if settings.JOB_RESUME_INTERVAL <= 0:
+            return
+        time.sleep(settings.JOB_RESUME_INTERVAL)
+
+
+def _after_fork(app):
+    """Per-worker setup: fresh DB connections, warm pool, resume queued jobs (then periodically)."""
+    from extensions import db
+    from api.routes import warm_up
+    with app.app_context():
+        db.engine.dispose(close=False)  # never reuse sockets opened in the master
+    warm_up(app, ('db', 'http'))
+    threading.Thread(target=_resume_loop, args=(app,), name='job-resume', daemon=True).start()
+
+
+def _drain(app):
+    """Bounded drain, then return so gunicorn finishes the worker's exit normally.
+    Jobs still running at JOB_DRAIN_TIMEOUT are requeued for other workers; their threads
+    are daemon threads (DaemonThreadPool), so interpreter exit does not wait for them.
+    """
+    from api.routes import drain_background_jobs
+    from services.workpool import shutdown_cpu_pool
+    try:
+        stats = drain_background_jobs(app, settings.JOB_DRAIN_TIMEOUT)
+        log.info("pid %s drained generation jobs: %s", os.getpid(), stats)
+    except Exception as e:
+        log.warning("pid %s job drain failed: %s", os.getpid(), e)
+    shutdown_cpu_pool(wait=True)
+
+
+def _build_app(warmup):
+    from app import create_app
+    # Workers resume jobs themselves after fork; threads started here would not survive it
+    return create_app(warmup=warmup, resume_jobs=False)
+
+
+def serve_gunicorn(opts):
+    from gunicorn.app.base import BaseApplication
+
+    app = _build_app(tuple(s for s in settings.APP_WARMUP if s in ('imports', 'palettes')))
+
+    class _Application(BaseApplication):
+        def load_config(self):
+            cfg = {
+                "bind": opts.bind,
+                "workers": opts.workers,
+                "threads": opts.threads,
+                "worker_class": "gthread",
+                "timeout": settings.WEB_TIMEOUT,
+                # the master SIGKILLs after this: leave room for requests and then jobs
+                "graceful_timeout": settings.WEB_GRACEFUL_TIMEOUT + settings.JOB_DRAIN_TIMEOUT,
+                "max_requests": settings.WEB_MAX_REQUESTS,
+                "max_requests_jitter": settings.WEB_MAX_REQUESTS // 10,
+                "preload_app": True,
+                "accesslog": "-" if opts.access_log else None,
+                "post_fork": lambda server, worker: _after_fork(app),
+                "worker_exit": lambda server, worker: _drain(app),
+            }
+            for key, value in cfg.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    _Application().run()
+
+
+def serve_single(opts):
+    app = _build_app(settings.APP_WARMUP)
+    from api.routes import resume_generation_jobs
+    resume_generation_jobs(app)
+    host, _, port = opts.bind.rpartition(':')
+
+    def _stop(signum, _frame):
+        _drain(app)
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        from waitress import serve
+        log.info("waitress on %s (%s threads, single process)", opts.bind, opts.threads)
+        serve(app, host=host or '127.0.0.1', port=int(port), threads=opts.threads)
+    except ImportError:
+        from werkzeug.serving import run_simple
+        log.warning("waitress yok; Werkzeug threaded server kullanılıyor (tek süreç)")
+        run_simple(host or '127.0.0.1', int(port), app, threaded=True, use_reloader=False, use_debugger=False)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--bind', default=settings.WEB_BIND, help='host:port')
+    ap.add_argument('--workers', type=int, default=settings.WEB_WORKERS, help='worker processes (POSIX)')
+    ap.add_argument('--threads', type=int, default=settings.WEB_THREADS, help='request threads per worker')
+    ap.add_argument('--cpu-workers', type=int, help='CPU pool processes per worker (overrides CPU_POOL_WORKERS)')
+    ap.add_argument('--access-log', action='store_true')
+    ap.add_argument('--single', action='store_true', help='force the single-process server')
+    opts = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if opts.cpu_workers is not None:
+        settings.CPU_POOL_WORKERS = opts.cpu_workers
+
+    if not opts.single and os.name == 'posix':
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            log.warning("gunicorn yok (pip install gunicorn); tek süreçli sunucuya geçiliyor")
+        else:
+            return serve_gunicorn(opts)
+    serve_single(opts)
+
+
+if __name__ == '__main__':
+    main()
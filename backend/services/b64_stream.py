@@ -0,0 +1,174 @@
+import base64
+import os
+import re
+from typing import Callable, Iterable, List, Optional
+
+# Strings we decode to files: SD WebUI {"images": ["<b64>", ...]} and
+# OpenAI {"data": [{"b64_json": "<b64>"}, ...]}. Everything else is skipped.
+_STRING_STOP = re.compile(rb'["\\]')
+
+
+def _is_image_path(path: tuple) -> bool:
+    if len(path) == 2 and path[0] == b'images' and isinstance(path[1], int):
+        return True
+    return len(path) == 3 and path[0] == b'data' and isinstance(path[1], int) and path[2] == b'b64_json'
+
+
+class _B64FileWriter:
+    """Decode base64 text incrementally into `path` (via a .part file renamed on success)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp = path + '.part'
+        self.fh = open(self.tmp, 'wb')
+        self.pending = b''
+        self.head = b''  # until a possible "data:image/png;base64," prefix is resolved
+
+    def write(self, data: bytes):
+        if self.head is not None:
+            self.head += data
+            if self.head.startswith(b'data:') or b'data:'.startswith(self.head):
+                comma = self.head.find(b',')
+                if comma < 0:
+                    return
+                data = self.head[comma + 1:]
+            else:
+                data = self.head
+            self.head = None
+        buf = self.pending + data
+        n = len(buf) - len(buf) % 4
+        if n:
+            self.fh.write(base64.b64decode(buf[:n]))
+        self.pending = buf[n:]
+
+    def close(self):
+        tail = (self.head or b'') + self.pending
+        if tail:
+            self.fh.write(base64.b64decode(tail + b'=' * (-len(tail) % 4)))
+        self.fh.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        try:
+            self.fh.close()
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+
+class B64ImageStreamParser:
+    """Minimal incremental JSON scanner that writes embedded base64 images to files.
+
+    Only the container structure and object keys are tracked; image strings are
+    decoded 4-byte-aligned as their bytes arrive, and other strings are skipped
+    without being buffered. Peak memory is bounded by the feed chunk size.
+    """
+
+    def __init__(self, make_path: Callable[[int], str]):
+        self.make_path = make_path
+        self.paths: List[str] = []
+        self.stack = []  # frames: [is_dict, key_or_index, expecting_key]
+        self.mode: Optional[str] = None  # None | 'key' | 'skip' | 'image' while inside a string
+        self.escape = False
+        self.key = b''
+        self.writer: Optional[_B64FileWriter] = None
+
+    def _path(self) -> tuple:
+        return tuple(f[1] for f in self.stack)
+
+    def feed(self, data: bytes):
+        i, n = 0, len(data)
+        while i < n:
+            if self.mode is not None:
+                i = self._feed_string(data, i)
+                continue
+            c = data[i]
+            i += 1
+            if c == 0x22:  # '"'
+                top = self.stack[-1] if self.stack else None
+                if top is not None and top[0] and top[2]:
+                    self.mode, self.key = 'key', b''
+                elif _is_image_path(self._path()):
+                    self.mode = 'image'
+                    self.writer = _B64FileWriter(self.make_path(len(self.paths)))
+                else:
+                    self.mode = 'skip'
+            elif c == 0x7b:  # '{'
+                self.stack.append([True, None, True])
+            elif c == 0x5b:  # '['
+                self.stack.append([False, 0, False])
+            elif c in (0x7d, 0x5d):  # '}' ']'
+                if self.stack:
+                    self.stack.pop()
+            elif c == 0x3a:  # ':'
+                if self.stack:
+                    self.stack[-1][2] = False
+            elif c == 0x2c:  # ','
+                if self.stack:
+                    top = self.stack[-1]
+                    if top[0]:
+                        top[2] = True
+                    else:
+                        top[1] += 1
+
+    def _feed_string(self, data: bytes, i: int) -> int:
+        if self.escape:
+            self.escape = False
+            ch = data[i:i + 1]
+            if self.mode == 'key':
+                self.key += ch
+            elif self.mode == 'image' and ch == b'/':
+                self.writer.write(b'/')
+            return i + 1  # \n, \r etc. inside base64 are line breaks: drop them
+        m = _STRING_STOP.search(data, i)
+        end = m.start() if m else len(data)
+        if end > i:
+            if self.mode == 'image':
+                self.writer.write(data[i:end])
+            elif self.mode == 'key':
+                self.key += data[i:end]
+        if not m:
+            return len(data)
+        if data[end] == 0x5c:  # backslash
+            self.escape = True
+            return end + 1
+        # closing quote
+        if self.mode == 'key':
+            self.stack[-1][1] = self.key
+        elif self.mode == 'image':
+            self.writer.close()
+            self.paths.append(self.writer.path)
+            self.writer = None
+        self.mode = None
+        return end + 1
+
+    def abort(self):
+        """Remove the image being written and every image already finished."""
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.paths = []
+
+
+def stream_b64_images(chunks: Iterable[bytes], make_path: Callable[[int], str]) -> List[str]:
+    """Consume a JSON response body in chunks and write every embedded image to
+    make_path(index). Returns the written paths in response order. If the body fails
+    or is cut short, no file is left behind, including images that were complete.
+    """
+    parser = B64ImageStreamParser(make_path)
+    try:
+        for chunk in chunks:
+            if chunk:
+                parser.feed(chunk)
+    except Exception:
+        parser.abort()
+        raise
+    if parser.mode is not None or parser.stack:
+        parser.abort()
+        raise ValueError('Yanıt eksik: JSON tamamlanmadı')
+    return parser.paths
@@ -0,0 +1,59 @@
+import csv
+from typing import IO, Dict, Iterator, Optional
+
+from services.stream_json import iter_json_array
+
+CATALOG_FIELDS = ('r', 'g', 'b', 'label', 'yarn_code', 'yarn_name')
+
+
+def _parse_hex(v: str):
+    v = (v or '').strip().lstrip('#')
+    if len(v) != 6:
+        raise ValueError('hex')
+    return int(v[0:2], 16), int(v[2:4], 16), int(v[4:6], 16)
+
+
+def normalize_row(raw: dict, default_palette: Optional[str] = None) -> Optional[Dict]:
+    """Return {palette, r, g, b, label, yarn_code, yarn_name} or None if the row is unusable.
+    Accepts r/g/b or a `hex` column; `palette` (or `palette_name`) groups rows into palettes.
+    """
+    if not isinstance(raw, dict):
+        return None
+    row = {str(k).strip().lower(): v for k, v in raw.items() if k is not None}
+    try:
+        if row.get('r') not in (None, '') and row.get('g') not in (None, '') and row.get('b') not in (None, ''):
+            r, g, b = int(row['r']), int(row['g']), int(row['b'])
+        elif row.get('hex'):
+            r, g, b = _parse_hex(str(row['hex']))
+        else:
+            return None
+    except Exception:
+        return None
+    if not all(0 <= c <= 255 for c in (r, g, b)):
+        return None
+    palette = (row.get('palette') or row.get('palette_name') or default_palette or '').strip()
+    if not palette:
+        return None
+
+    def _s(key, n):
+        v = row.get(key)
+        v = str(v).strip() if v is not None else ''
+        return v[:n] or None
+
+    return {
+        "palette": palette[:100],
+        "r": r, "g": g, "b": b,
+        "label": _s('label', 50),
+        "yarn_code": _s('yarn_code', 80),
+        "yarn_name": _s('yarn_name', 120),
+    }
+
+
+def iter_catalog_rows(fp: IO[str], fmt: str) -> Iterator[dict]:
+    """Stream raw catalog records from a text stream; fmt is 'csv' or 'json' (array of objects)."""
+    if fmt == 'csv':
+        yield from csv.DictReader(fp)
+    elif fmt == 'json':
+        yield from iter_json_array(fp)
+    else:
+        raise ValueError('format csv veya json olmalı')
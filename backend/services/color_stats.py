@@ -0,0 +1,149 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+HIST_MAX_SIDE = 256  # analysis works on a box-reduced copy no larger than this
+HIST_BITS = 5  # 32 levels per channel -> at most 32768 bins
+
+_mem_cache: "OrderedDict[tuple, tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+_mem_lock = threading.Lock()
+_MEM_MAX = 256
+
+
+def hist_path(cache_dir: str, sha: str) -> str:
+    """Cache file for a content hash; cache_dir must not be a publicly served directory."""
+    return os.path.join(cache_dir, sha[:2], sha + '.npz')
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def color_histogram(img: Image.Image, max_side: int = HIST_MAX_SIDE, bits: int = HIST_BITS):
+    """Weighted color histogram of a deterministic downscale of img.
+    Returns (colors float32 Nx3 = mean RGB per occupied bin, counts int64 N).
+    """
+    img = img.convert('RGB')
+    factor = -(-max(img.size) // max_side)
+    if factor > 1:
+        img = img.reduce(factor)  # box average: same input -> same output
+    px = np.asarray(img, dtype=np.uint8).reshape(-1, 3)
+    shift = 8 - bits
+    q = (px >> shift).astype(np.int64)
+    key = (q[:, 0] << (2 * bits)) | (q[:, 1] << bits) | q[:, 2]
+    nbins = 1 << (3 * bits)
+    counts = np.bincount(key, minlength=nbins)
+    used = np.nonzero(counts)[0]
+    sums = np.stack([np.bincount(key, weights=px[:, c], minlength=nbins)[used] for c in range(3)], axis=1)
+    counts = counts[used]
+    return (sums / counts[:, None]).astype(np.float32), counts.astype(np.int64)
+
+
+def median_cut(colors: np.ndarray, counts: np.ndarray, k: int) -> List[dict]:
+    """Weighted median cut over a histogram: split the most populated box along its
+    widest channel at the population median until there are k boxes.
+    """
+    k = max(2, min(32, int(k)))
+    total = int(counts.sum())
+    if total == 0:
+        return []
+    boxes = [np.arange(len(counts))]
+    while len(boxes) < k:
+        splittable = [i for i, b in enumerate(boxes) if len(b) > 1]
+        if not splittable:
+            break
+        bi = max(splittable, key=lambda i: counts[boxes[i]].sum())
+        idx = boxes.pop(bi)
+        c = colors[idx]
+        ch = int(np.argmax(c.max(axis=0) - c.min(axis=0)))
+        idx = idx[np.argsort(c[:, ch], kind='stable')]
+        cum = np.cumsum(counts[idx])
+        cut = int(np.clip(np.searchsorted(cum, cum[-1] / 2.0) + 1, 1, len(idx) - 1))
+        boxes.extend([idx[:cut], idx[cut:]])
+    result = []
+    for b in boxes:
+        w = counts[b]
+        r, g, bb = (np.round((colors[b] * w[:, None]).sum(axis=0) / w.sum())).astype(int).tolist()
+        result.append((int(w.sum()), r, g, bb))
+    # sort by frequency desc
+    result.sort(key=lambda x: x[0], reverse=True)
+    return [{"r": r, "g": g, "b": b, "hex": f"#{r:02x}{g:02x}{b:02x}", "percent": round((c / total) * 100, 2)}
+            for c, r, g, b in result]
+
+
+def dominant_colors(img: Image.Image, k: int = 12) -> List[dict]:
+    """Dominant colors of an already decoded image: [{"r","g","b","hex","percent"}] by frequency."""
+    return median_cut(*color_histogram(img), k)
+
+
+def save_histogram(cache_dir: str, image_path: str, colors: np.ndarray, counts: np.ndarray, sha: str = None) -> str:
+    """Persist the histogram of image_path under cache_dir, keyed by the file's content hash."""
+    path = hist_path(cache_dir, sha or _file_sha256(image_path))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    np.savez(tmp, colors=colors, counts=counts)
+    os.replace(tmp, path)
+    return path
+
+
+def load_histogram(cache_dir: str, image_path: str):
+    """Histogram for an image file, computed at most once per content hash.
+    The in-memory entry is trusted while path/size/mtime match; otherwise the file is
+    hashed and only decoded again if cache_dir has nothing for that content.
+    """
+    st = os.stat(image_path)
+    mem_key = (os.path.abspath(image_path), st.st_size, st.st_mtime_ns)
+    with _mem_lock:
+        hit = _mem_cache.get(mem_key)
+        if hit is not None:
+            _mem_cache.move_to_end(mem_key)
+            return hit
+    sha = _file_sha256(image_path)
+    try:
+        with np.load(hist_path(cache_dir, sha)) as z:
+            hist = (z['colors'], z['counts'])
+    except (OSError, ValueError, KeyError):
+        with Image.open(image_path) as im:
+            hist = color_histogram(im)
+        try:
+            save_histogram(cache_dir, image_path, hist[0], hist[1], sha)
+        except OSError:
+            pass
+    with _mem_lock:
+        _mem_cache[mem_key] = hist
+        while len(_mem_cache) > _MEM_MAX:
+            _mem_cache.popitem(last=False)
+    return hist
+
+
+def remove_histogram(cache_dir: str, image_path: str):
+    """Drop the cached histogram of an image that is about to be deleted.
+    Call it before removing the file, since the cache key is its content hash.
+    """
+    try:
+        os.remove(hist_path(cache_dir, _file_sha256(image_path)))
+    except OSError:
+        pass
+    abs_path = os.path.abspath(image_path)
+    with _mem_lock:
+        for key in [key for key in _mem_cache if key[0] == abs_path]:
+            del _mem_cache[key]
+
+
+def remove_image(cache_dir: str, image_path: str):
+    """Delete an image file together with its cached histogram."""
+    remove_histogram(cache_dir, image_path)
+    os.remove(image_path)
+
+
+def file_dominant_colors(cache_dir: str, image_path: str, k: int = 12) -> List[dict]:
+    return median_cut(*load_histogram(cache_dir, image_path), k)
@@ -1,14 +1,47 @@
+from typing import Callable, Optional
+
 from PIL import Image
+import numpy as np
 import os
+import struct
+
+BMP_PPM = int(96 * 39.3701 + 0.5)  # 96 dpi in pixels per meter, as Pillow writes it
 
-def save_bmp8(p_img: Image.Image, out_path: str) -> str:
+def save_bmp8(p_img: Image.Image, out_path: str, progress: Optional[Callable[[int, int], None]] = None,
+              chunk_rows: int = 256) -> str:
     """Save a palettized ('P' mode) image as 8-bit indexed BMP.
+    The file is byte-identical to p_img.save(out_path, format='BMP'), but rows are written
+    chunk_rows at a time so progress(rows_done, rows_total) can be called after each chunk.
     Returns the written path.
     """
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    # Ensure 'P' mode; Pillow will write indexed BMP
     img = p_img
     if img.mode != 'P':
         img = img.convert('P')
-    img.save(out_path, format='BMP')
+    w, h = img.size
+    pal = img.getpalette('RGB') or []
+    colors = len(pal) // 3
+    stride = (w + 3) & ~3
+    offset = 14 + 40 + colors * 4
+    if offset + stride * h > 2 ** 32 - 1:
+        raise ValueError('BMP için dosya boyutu çok büyük')
+    bgrx = bytearray()
+    for i in range(colors):
+        r, g, b = pal[3 * i:3 * i + 3]
+        bgrx += bytes((b, g, r, 0))
+    with open(out_path, 'wb') as f:
+        f.write(struct.pack('<2sIHHI', b'BM', offset + stride * h, 0, 0, offset))
+        f.write(struct.pack('<IiiHHIIiiII', 40, w, h, 1, 8, 0, stride * h, BMP_PPM, BMP_PPM, colors, colors))
+        f.write(bytes(bgrx))
+        done = 0
+        # BMP rows run bottom-up, each padded to 4 bytes. Only one chunk is copied at a time.
+        for end in range(h, 0, -chunk_rows):
+            top = max(0, end - chunk_rows)
+            block = np.frombuffer(img.crop((0, top, w, end)).tobytes(), dtype=np.uint8).reshape(end - top, w)[::-1]
+            if stride != w:
+                block = np.pad(block, ((0, 0), (0, stride - w)))
+            f.write(np.ascontiguousarray(block).tobytes())
+            done += end - top
+            if progress is not None:
+                progress(done, h)
     return out_path
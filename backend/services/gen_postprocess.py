@@ -0,0 +1,72 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from PIL import Image, ImageOps
+
+from services.color_stats import color_histogram, median_cut, remove_image, save_histogram
+
+log = logging.getLogger(__name__)
+
+
+def thumb_path(image_path: str) -> str:
+    d, name = os.path.split(image_path)
+    return os.path.join(d, 'thumbs', os.path.splitext(name)[0] + '.jpg')
+
+
+def postprocess_image(path: str, frame_w: int = 0, frame_color: Optional[str] = None,
+                      thumb_size: int = 384, colors_k: int = 12, hist_dir: Optional[str] = None) -> dict:
+    """Decode a generated image once and derive every artifact from that decode:
+    the framed PNG (replacing the raw file), a JPEG thumbnail and the color histogram
+    (saved under hist_dir, if given, for /generated/<file>/colors). Returns {"path", "thumb_path", "colors"}.
+    """
+    with Image.open(path) as im:
+        img = im.convert('RGB')
+    final_path = path
+    if frame_w > 0 and frame_color:
+        framed_path = os.path.splitext(path)[0] + '_fr.png'
+        try:
+            framed = ImageOps.expand(img, border=frame_w, fill=frame_color)
+            framed.save(framed_path, format='PNG')
+        except Exception as e:
+            log.warning("frame failed for %s, keeping it unframed: %s", path, e)
+            if os.path.exists(framed_path):
+                os.remove(framed_path)
+        else:
+            img, final_path = framed, framed_path
+            # only the framed result is referenced
+            if hist_dir:
+                remove_image(hist_dir, path)
+            else:
+                os.remove(path)
+    thumb = img.copy()
+    thumb.thumbnail((thumb_size, thumb_size), Image.BILINEAR)
+    tpath = thumb_path(final_path)
+    os.makedirs(os.path.dirname(tpath), exist_ok=True)
+    thumb.save(tpath, format='JPEG', quality=85)
+    hist = color_histogram(img)
+    if hist_dir:
+        try:
+            save_histogram(hist_dir, final_path, *hist)
+        except OSError as e:
+            # Only a cache: /colors recomputes it on demand
+            log.warning("histogram not saved for %s: %s", final_path, e)
+    colors = median_cut(*hist, colors_k)
+    return {"path": final_path, "thumb_path": tpath, "colors": colors}
+
+
+def postprocess_batch(paths: List[str], workers: int = 4, **kwargs) -> List[dict]:
+    """Run postprocess_image over a batch on a thread pool (PIL releases the GIL while
+    decoding, resizing and encoding). Results keep input order; a failed item yields
+    {"path": <raw path>, "error": ...} so one bad image does not sink the batch.
+    """
+    def one(p):
+        try:
+            return postprocess_image(p, **kwargs)
+        except Exception as e:
+            return {"path": p, "error": str(e)}
+    if len(paths) <= 1 or workers <= 1:
+        return [one(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as ex:
+        return list(ex.map(one, paths))
@@ -0,0 +1,199 @@
+import atexit
+import hashlib
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from config.settings import settings
+
+# Shared-memory segment layout: magic, height, width, channels, then the raw uint8 pixels.
+# The magic is written last, so a reader never attaches to a half-filled segment.
+_SHM_MAGIC = 0x44545931  # "DTY1"
+_SHM_HEADER = struct.Struct('<IIII')
+
+
+def _decode(path: str) -> np.ndarray:
+    if path.endswith('.npy'):
+        return np.ascontiguousarray(np.load(path))
+    with Image.open(path) as im:
+        return np.asarray(im.convert('RGB'))
+
+
+class _Entry:
+    __slots__ = ('array', 'nbytes', 'shm', 'owner')
+
+    def __init__(self, array, shm=None, owner=False):
+        self.array = array
+        self.nbytes = array.nbytes
+        self.shm = shm
+        self.owner = owner
+
+
+class DecodedImageCache:
+    """Bounded LRU of decoded RGB arrays keyed by (path, mtime, size).
+
+    With shared memory enabled, each decoded image is also published as a named
+    segment derived from its key, so other worker processes attach to it instead
+    of decoding the file again. Arrays handed out are read-only.
+    """
+
+    def __init__(self, max_bytes: int, use_shm: bool = False):
+        self.max_bytes = max_bytes
+        self.use_shm = use_shm
+        self._lru: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.shm_hits = self.evictions = 0
+        if use_shm:
+            atexit.register(self.clear)
+
+    @staticmethod
+    def _key(path: str) -> tuple:
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _shm_name(key: tuple) -> str:
+        return 'dty_' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:24]
+
+    def get_rgb(self, path: str) -> np.ndarray:
+        key = self._key(path)
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry.array
+        entry = self._attach(key) if self.use_shm else None
+        if entry is not None:
+            with self._lock:
+                self.shm_hits += 1
+        else:
+            arr = _decode(path)
+            with self._lock:
+                self.misses += 1
+            entry = self._publish(key, arr) if self.use_shm else None
+            if entry is None:
+                arr.setflags(write=False)
+                entry = _Entry(arr)
+        if entry.nbytes <= self.max_bytes:
+            self._insert(key, entry)
+        return entry.array
+
+    def _insert(self, key: tuple, entry: _Entry):
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+                self._release(old)
+            self._lru[key] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes and self._lru:
+                _, victim = self._lru.popitem(last=False)
+                self._bytes -= victim.nbytes
+                self.evictions += 1
+                self._release(victim)
+
+    def _attach(self, key: tuple) -> Optional[_Entry]:
+        from multiprocessing import resource_tracker, shared_memory
+        try:
+            shm = shared_memory.SharedMemory(name=self._shm_name(key))
+        except (FileNotFoundError, OSError):
+            return None
+        # Attaching must not make this process unlink the segment at exit (Python < 3.13)
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        magic, h, w, c = _SHM_HEADER.unpack_from(shm.buf, 0)
+        if magic != _SHM_MAGIC:
+            shm.close()
+            return None
+        arr = np.ndarray((h, w, c) if c > 1 else (h, w), dtype=np.uint8, buffer=shm.buf, offset=_SHM_HEADER.size)
+        arr.setflags(write=False)
+        return _Entry(arr, shm, owner=False)
+
+    def _publish(self, key: tuple, arr: np.ndarray) -> Optional[_Entry]:
+        from multiprocessing import resource_tracker, shared_memory
+        h, w = arr.shape[:2]
+        c = arr.shape[2] if arr.ndim == 3 else 1
+        try:
+            shm = shared_memory.SharedMemory(name=self._shm_name(key), create=True, size=_SHM_HEADER.size + arr.nbytes)
+        except (FileExistsError, OSError):
+            return None  # another worker is publishing the same image; keep the local copy
+        # Lifetime is managed here (eviction/atexit), not by the resource tracker that
+        # forked workers share; _release re-registers right before unlinking.
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        view = np.ndarray(arr.shape, dtype=np.uint8, buffer=shm.buf, offset=_SHM_HEADER.size)
+        view[...] = arr
+        _SHM_HEADER.pack_into(shm.buf, 0, _SHM_MAGIC, h, w, c)
+        view.setflags(write=False)
+        return _Entry(view, shm, owner=True)
+
+    @staticmethod
+    def _release(entry: _Entry):
+        if entry.shm is None:
+            return
+        entry.array = None
+        try:
+            # Unlink first: the name goes away, but mappings held elsewhere stay valid
+            if entry.owner:
+                from multiprocessing import resource_tracker
+                resource_tracker.register(entry.shm._name, 'shared_memory')
+                entry.shm.unlink()
+            entry.shm.close()
+        except Exception:
+            pass
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._lru.values())
+            self._lru.clear()
+            self._bytes = 0
+        for e in entries:
+            self._release(e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.shm_hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "shared_memory": self.use_shm,
+                "shm_bytes": sum(e.nbytes for e in self._lru.values() if e.owner),
+                "hits": self.hits,
+                "shm_hits": self.shm_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.shm_hits) / lookups, 4) if lookups else None,
+            }
+
+
+_cache: Optional[DecodedImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> DecodedImageCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DecodedImageCache(settings.IMAGE_CACHE_MB * 1024 * 1024, settings.IMAGE_CACHE_SHM)
+    return _cache
+
+
+def decoded_rgb(path: str) -> np.ndarray:
+    """Read-only decoded RGB array for an image (or .npy working copy), via the shared cache."""
+    cache = get_image_cache()
+    if cache.max_bytes <= 0:
+        return _decode(path)
+    return cache.get_rgb(path)
@@ -1,7 +1,13 @@
-from typing import List, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional
 from PIL import Image
 import numpy as np
 
+from services.image_cache import decoded_rgb
+
+if TYPE_CHECKING:
+    from services.ingest import IngestedImage
+
 
 def _srgb_to_xyz(c: np.ndarray) -> np.ndarray:
     c = c / 255.0
@@ -38,6 +44,18 @@ def _rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
     return _xyz_to_lab(xyz)
 
 
+@lru_cache(maxsize=128)
+def _palette_lab_cached(key: tuple) -> np.ndarray:
+    lab = _rgb_to_lab(np.array(key, dtype=np.uint8).reshape(-1, 3))
+    lab.setflags(write=False)
+    return lab
+
+
+def palette_lab(palette: List[tuple]) -> np.ndarray:
+    """Lab values of a palette (K,3), memoized per palette; warm_up() pre-builds the stored ones."""
+    return _palette_lab_cached(tuple((int(r), int(g), int(b)) for r, g, b in palette))
+
+
 def _build_palette_image(palette: List[tuple]) -> Image.Image:
     # palette: list of (r,g,b)
     pal_img = Image.new('P', (1, 1))
@@ -59,7 +77,7 @@ def _snap_image_to_palette(img: Image.Image, palette: List[tuple], dither: bool
     # Prepare distances in Lab if requested
     if delta_e_tolerance is not None:
         img_lab = _rgb_to_lab(arr.reshape(-1, 3))  # (N,3)
-        pal_lab = _rgb_to_lab(prgb.reshape(-1, 3))  # (K,3)
+        pal_lab = palette_lab(palette)  # (K,3)
         # compute squared distances
         # (N,1,3) - (1,K,3) -> (N,K,3)
         diff = img_lab[:, None, :] - pal_lab[None, :, :]
@@ -84,17 +102,43 @@ def _snap_image_to_palette(img: Image.Image, palette: List[tuple], dither: bool
     return out.quantize(palette=pal_img, dither=dither_mode)
 
 
+def _snap_unique_to_palette(source: 'IngestedImage', palette: List[tuple]) -> Image.Image:
+    """CIE76 snapping from ingest artifacts: distances are computed once per unique
+    color (with cached Lab) and spread to pixels through the inverse index."""
+    pal_lab = palette_lab(palette)
+    ulab = source.unique_lab().astype(np.float64)
+    idx = np.empty(len(ulab), dtype=np.intp)
+    for i in range(0, len(ulab), 65536):  # bound the (n,K) distance block
+        diff = ulab[i:i + 65536, None, :] - pal_lab[None, :, :]
+        idx[i:i + 65536] = np.argmin(np.sum(diff * diff, axis=-1), axis=1)
+    W, H = source.size
+    pix = idx[np.asarray(source.inverse())].reshape(H, W)
+    out = Image.fromarray(pix.astype(np.uint8), mode='P')
+    out.putpalette(_build_palette_image(palette).getpalette())
+    return out
+
+
 def quantize_to_palette(
     image_path: str,
     palette: Optional[List[tuple]] = None,
     max_colors: int = 256,
     dither: bool = False,
     delta_e_tolerance: Optional[float] = None,
+    source: Optional['IngestedImage'] = None,
 ) -> Image.Image:
     """Load image and return a palettized ('P' mode) image with up to 256 colors.
     If palette is provided, snap to that palette; otherwise use PIL quantize with k=max_colors.
+    With `source` (ingest artifacts) the working copy is used instead of decoding image_path,
+    unless ingest downscaled it: the result is the true-size matrix, so it decodes the original.
+    Palettes are clamped to their first 256 colors ('P' mode indices are one byte).
     """
-    img = Image.open(image_path).convert('RGB')
+    if source is not None and source.downscaled:
+        source = None
+    if palette:
+        palette = list(palette)[:256]
+    if source is not None and palette and delta_e_tolerance is not None and not dither:
+        return _snap_unique_to_palette(source, palette)
+    img = source.image() if source is not None else Image.fromarray(decoded_rgb(image_path), mode='RGB')
     if palette:
         # If delta_e_tolerance is provided, use CIE76 snapping; else use direct palette quantize
         if delta_e_tolerance is not None:
@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from services.image_cache import decoded_rgb
+from services.image_processing import _rgb_to_lab
+
+
+def ingest_dir(root: str, sha: str) -> str:
+    return os.path.join(root, sha[:2], sha)
+
+
+def ingest_image(src_path: str, out_dir: str, max_side: int = 4096) -> str:
+    """Precompute the artifacts pattern generation starts from, once per content hash:
+      rgb.npy      normalized RGB working copy (longest side <= max_side), memory-mappable
+      colors.npz   packed unique colors (0xRRGGBB), their pixel counts and Lab values
+      inverse.npy  per-pixel index into the unique-color table
+      meta.json    source/working sizes
+    Written to a temp dir and renamed into place, so readers never see a partial set.
+    """
+    if os.path.exists(os.path.join(out_dir, 'meta.json')):
+        return out_dir
+    parent = os.path.dirname(out_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, suffix='.part')
+    try:
+        with Image.open(src_path) as im:
+            src_size = im.size
+            if max_side and max(im.size) > max_side:
+                # JPEG can decode straight at a reduced scale
+                im.draft('RGB', (max_side, max_side))
+            img = im.convert('RGB')
+        if max_side and max(img.size) > max_side:
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+        rgb = np.asarray(img, dtype=np.uint8)
+        np.save(os.path.join(tmp, 'rgb.npy'), rgb)
+        packed = (rgb[..., 0].astype(np.uint32) << 16) | (rgb[..., 1].astype(np.uint32) << 8) | rgb[..., 2]
+        unique, inverse, counts = np.unique(packed.ravel(), return_inverse=True, return_counts=True)
+        inverse = inverse.astype(np.uint16 if len(unique) <= 0xFFFF else np.uint32)
+        np.save(os.path.join(tmp, 'inverse.npy'), inverse)
+        urgb = np.stack([(unique >> 16) & 255, (unique >> 8) & 255, unique & 255], axis=1)
+        np.savez(os.path.join(tmp, 'colors.npz'), colors=unique, counts=counts.astype(np.int64),
+                 lab=_rgb_to_lab(urgb).astype(np.float32))
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({"source": src_path, "source_size": list(src_size), "size": [img.width, img.height],
+                       "unique_colors": int(len(unique))}, f)
+        try:
+            os.rename(tmp, out_dir)
+        except OSError:
+            # Another worker finished the same hash first
+            shutil.rmtree(tmp, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return out_dir
+
+
+class IngestedImage:
+    """Read-only view of ingest artifacts; arrays are memory-mapped, nothing is decoded."""
+
+    def __init__(self, out_dir: str):
+        self.dir = out_dir
+        with open(os.path.join(out_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self._colors = None
+
+    def __reduce__(self):
+        # Pickled as its directory (for the CPU process pool), re-opened on the other side
+        return (IngestedImage, (self.dir,))
+
+    @classmethod
+    def load(cls, out_dir: str) -> Optional['IngestedImage']:
+        return cls(out_dir) if os.path.exists(os.path.join(out_dir, 'meta.json')) else None
+
+    @property
+    def size(self):
+        return tuple(self.meta['size'])
+
+    @property
+    def downscaled(self) -> bool:
+        """True when the working copy is smaller than the source (longest side > max_side)."""
+        return tuple(self.meta.get('source_size') or self.meta['size']) != tuple(self.meta['size'])
+
+    def rgb(self) -> np.ndarray:
+        return np.load(os.path.join(self.dir, 'rgb.npy'), mmap_mode='r')
+
+    def image(self) -> Image.Image:
+        # Through the decoded-image cache: repeated generations skip re-reading rgb.npy
+        return Image.fromarray(decoded_rgb(os.path.join(self.dir, 'rgb.npy')), mode='RGB')
+
+    def inverse(self) -> np.ndarray:
+        return np.load(os.path.join(self.dir, 'inverse.npy'), mmap_mode='r')
+
+    def _load_colors(self):
+        if self._colors is None:
+            with np.load(os.path.join(self.dir, 'colors.npz')) as z:
+                self._colors = {k: z[k] for k in ('colors', 'counts', 'lab')}
+        return self._colors
+
+    def unique_rgb(self) -> np.ndarray:
+        u = self._load_colors()['colors']
+        return np.stack([(u >> 16) & 255, (u >> 8) & 255, u & 255], axis=1).astype(np.uint8)
+
+    def unique_counts(self) -> np.ndarray:
+        return self._load_colors()['counts']
+
+    def unique_lab(self) -> np.ndarray:
+        return self._load_colors()['lab']
@@ -0,0 +1,41 @@
+import importlib
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access.
+
+    Keeps numpy/PIL/requests out of worker boot; warm_up() (or the first request
+    that needs them) pays the import. Thread-safe, unlike importlib's LazyLoader
+    on older Pythons.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        mod = self.__dict__['_lazy_module']
+        if mod is None:
+            with self.__dict__['_lazy_lock']:
+                mod = self.__dict__['_lazy_module']
+                if mod is None:
+                    mod = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = mod
+        return mod
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__['_lazy_module'] is not None
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
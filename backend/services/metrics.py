@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> _Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: _Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ''
+    esc = lambda v: v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{esc(v)}"' for k, v in items) + '}'
+
+
+class Registry:
+    """In-process counters and histograms rendered in the Prometheus text format.
+    Every worker process keeps its own; scrape each worker (or sum them) accordingly.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[_Labels, float]] = {}
+        self._hists: Dict[str, Dict[_Labels, list]] = {}
+        self._help: Dict[str, str] = {}
+        self._buckets: Dict[str, tuple] = {}
+        self._collectors: List[Callable[[], List[Tuple[str, str, dict, float]]]] = []
+
+    def describe(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self._help[name] = help_text
+        self._buckets[name] = buckets
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(labels)
+        buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+        with self._lock:
+            series = self._hists.setdefault(name, {})
+            h = series.get(key)
+            if h is None:
+                h = series[key] = [[0] * len(buckets), 0.0, 0]
+            for i, b in enumerate(buckets):
+                if value <= b:
+                    h[0][i] += 1
+            h[1] += value
+            h[2] += 1
+
+    def add_collector(self, fn: Callable[[], List[Tuple[str, str, dict, float]]]):
+        """fn() -> [(name, 'gauge'|'counter', labels, value)], sampled at scrape time."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        """Each family is written once (HELP/TYPE, then all its series), including collector
+        samples that share a name with a registry counter.
+        """
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            hists = {n: {k: [list(v[0]), v[1], v[2]] for k, v in s.items()} for n, s in self._hists.items()}
+        families: Dict[str, Tuple[str, List[str]]] = {}
+
+        def family(name: str, kind: str) -> Optional[List[str]]:
+            kind_lines = families.setdefault(name, (kind, []))
+            return kind_lines[1] if kind_lines[0] == kind else None
+
+        for name in sorted(counters):
+            lines = family(name, 'counter')
+            for key, v in counters[name].items():
+                lines.append(f"{name}{_fmt_labels(key)} {v:g}")
+        for name in sorted(hists):
+            buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+            lines = family(name, 'histogram')
+            for key, (counts, total, n) in hists[name].items():
+                for b, c in zip(buckets, counts):
+                    lines.append(f"{name}_bucket{_fmt_labels(key, ('le', f'{b:g}'))} {c}")
+                lines.append(f"{name}_bucket{_fmt_labels(key, ('le', '+Inf'))} {n}")
+                lines.append(f"{name}_sum{_fmt_labels(key)} {total:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(key)} {n}")
+        for fn in self._collectors:
+            try:
+                samples = fn()
+            except Exception:
+                continue
+            for name, kind, labels, value in samples:
+                lines = family(name, kind)
+                if lines is not None:  # a sample whose type clashes with the family is dropped
+                    lines.append(f"{name}{_fmt_labels(_labels(labels))} {value:g}")
+        out = []
+        for name, (kind, lines) in families.items():
+            if name in self._help:
+                out.append(f"# HELP {name} {self._help[name]}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return '\n'.join(out) + '\n'
+
+
+registry = Registry()
+registry.describe('dunyatek_http_requests_total', 'HTTP requests by endpoint, method and status')
+registry.describe('dunyatek_http_request_seconds', 'HTTP request latency by endpoint')
+registry.describe('dunyatek_stage_seconds', 'Time spent in a pipeline stage')
+registry.describe('dunyatek_bytes_written_total', 'Bytes of artifacts written, by kind')
+registry.describe('dunyatek_cache_requests_total', 'Cache lookups by cache and result (hit/miss)')
+
+
+def enabled() -> bool:
+    return settings.METRICS_ENABLED
+
+
+def inc(name: str, value: float = 1.0, **labels):
+    if settings.METRICS_ENABLED:
+        registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    if settings.METRICS_ENABLED:
+        registry.observe(name, value, **labels)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block into dunyatek_stage_seconds{stage=name}; a bare yield when metrics are off."""
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe('dunyatek_stage_seconds', time.perf_counter() - t0, stage=name)
+
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def count_written(path: str, kind: str):
+    if settings.METRICS_ENABLED:
+        try:
+            registry.inc('dunyatek_bytes_written_total', os.path.getsize(path), kind=kind)
+        except OSError:
+            pass
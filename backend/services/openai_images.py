@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, List, Optional
+
+import requests
+
+from services.b64_stream import stream_b64_images
+from services.metrics import timed
+from services.sd_client import get_session
+
+_RETRY_STATUS = frozenset((408, 409, 429, 500, 502, 503, 504))
+
+
+class OpenAIImageError(Exception):
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class OpenAIImageClient:
+    """Image generations over the shared keep-alive session (no per-call client/SDK globals).
+
+    A batch of n images is split into n single-image requests that run in parallel
+    (bounded by `concurrency`); each request is retried on its own, so one failure
+    only costs that image.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, organization: Optional[str] = None,
+                 project: Optional[str] = None, timeout: float = 180.0, concurrency: int = 4,
+                 retries: int = 2, backoff: float = 1.0):
+        base = (base_url or 'https://api.openai.com').rstrip('/')
+        if not base.endswith('/v1'):
+            base += '/v1'
+        self.url = f"{base}/images/generations"
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "User-Agent": "dunyatek-v2/1.0",
+        }
+        if project:
+            self.headers['OpenAI-Project'] = project
+        if organization:
+            self.headers['OpenAI-Organization'] = organization
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='openai-img')
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+    @timed('openai_image')
+    def _generate_one(self, payload: dict, make_path: Callable[[int], str]) -> List[str]:
+        attempt = 0
+        while True:
+            try:
+                resp = get_session().post(self.url, headers=self.headers, json=payload, timeout=self.timeout, stream=True)
+                try:
+                    if resp.status_code >= 400:
+                        raise OpenAIImageError(f"OpenAI HTTP {resp.status_code}: {resp.text[:300]}",
+                                               retryable=resp.status_code in _RETRY_STATUS)
+                    paths = stream_b64_images(resp.iter_content(64 * 1024), make_path)
+                finally:
+                    resp.close()
+                if not paths:
+                    raise OpenAIImageError("OpenAI yanıtında görsel yok")
+                return paths
+            except (requests.ConnectionError, requests.Timeout) as e:
+                err = OpenAIImageError(f"OpenAI bağlantı hatası: {e}", retryable=True)
+            except OpenAIImageError as e:
+                err = e
+            if not err.retryable or attempt >= self.retries:
+                raise err
+            attempt += 1
+            time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+    def generate_iter(self, model: str, prompt: str, size: str, n: int,
+                      make_path: Callable[[int, int], str]) -> Iterator[dict]:
+        """Yield {"index", "paths"} or {"index", "error"} per image, in completion order.
+        make_path(index, idx) names the file for image `index` of the batch.
+        """
+        futures = {}
+        for index in range(max(1, n)):
+            payload = {"model": model, "prompt": prompt, "size": size, "n": 1}
+            fut = self._pool.submit(self._generate_one, payload, lambda idx, i=index: make_path(i, idx))
+            futures[fut] = index
+        for fut in as_completed(futures):
+            index = futures[fut]
+            try:
+                yield {"index": index, "paths": fut.result()}
+            except Exception as e:
+                yield {"index": index, "error": str(e)}
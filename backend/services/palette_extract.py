@@ -0,0 +1,113 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from services.image_processing import _rgb_to_lab
+
+
+def _sq_dist(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # (N,3),(K,3) -> (N,K) squared distances without the (N,K,3) temporary
+    return np.maximum((a * a).sum(1)[:, None] - 2.0 * a @ b.T + (b * b).sum(1)[None, :], 0.0)
+
+
+def _kmeans_pp(points: np.ndarray, p: np.ndarray, k: int, rng) -> np.ndarray:
+    centers = [points[rng.choice(len(points), p=p)]]
+    d2 = _sq_dist(points, centers[0][None, :])[:, 0]
+    for _ in range(1, k):
+        w = p * d2
+        total = w.sum()
+        i = rng.choice(len(points), p=w / total) if total > 0 else rng.choice(len(points), p=p)
+        centers.append(points[i])
+        d2 = np.minimum(d2, _sq_dist(points, points[i][None, :])[:, 0])
+    return np.array(centers, dtype=np.float64)
+
+
+def kmeans_lab(points: np.ndarray, weights: np.ndarray, k: int, batch_size: int = 2048,
+               iters: int = 60, refine: int = 2, seed: int = 0):
+    """Weighted mini-batch k-means (k-means++ init) over Lab points.
+    Batches are sampled in proportion to the weights; a couple of full weighted
+    Lloyd passes finish it off. Deterministic for a given seed.
+    Returns (centers Kx3, labels N).
+    """
+    rng = np.random.default_rng(seed)
+    p = weights / weights.sum()
+    k = min(k, len(points))
+    centers = _kmeans_pp(points, p, k, rng)
+    seen = np.zeros(k)
+    for _ in range(iters):
+        b = points[rng.choice(len(points), size=batch_size, p=p)]
+        lab = np.argmin(_sq_dist(b, centers), axis=1)
+        n = np.bincount(lab, minlength=k).astype(np.float64)
+        sums = np.stack([np.bincount(lab, weights=b[:, c], minlength=k) for c in range(3)], axis=1)
+        seen += n
+        hit = n > 0
+        # per-center learning rate 1/count (Sculley), applied to the batch mean
+        centers[hit] += (sums[hit] - n[hit, None] * centers[hit]) / seen[hit, None]
+    for _ in range(refine + 1):
+        labels = np.argmin(_sq_dist(points, centers), axis=1)
+        w = np.bincount(labels, weights=weights, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=weights * points[:, c], minlength=k) for c in range(3)], axis=1)
+        hit = w > 0
+        centers[hit] = sums[hit] / w[hit, None]
+    return centers, labels
+
+
+class YarnIndex:
+    """Catalog colors that carry a yarn_code, pre-converted to Lab for nearest-yarn lookups."""
+
+    def __init__(self, rows: Sequence[tuple]):
+        # rows: (color_id, r, g, b, yarn_code, yarn_name), first occurrence of a yarn_code wins
+        seen, keep = set(), []
+        for row in rows:
+            if row[4] and row[4] not in seen:
+                seen.add(row[4])
+                keep.append(row)
+        self.rows = keep
+        rgb = np.array([r[1:4] for r in keep], dtype=np.float64).reshape(-1, 3)
+        self.lab = _rgb_to_lab(rgb) if keep else np.zeros((0, 3))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def snap(self, centers_lab: np.ndarray) -> List[Optional[tuple]]:
+        """Nearest yarn per center (given in priority order), each yarn used at most once.
+        Returns [(row, delta_e76)] or None where the catalog ran out.
+        """
+        if not len(self.rows):
+            return [None] * len(centers_lab)
+        d = np.sqrt(_sq_dist(centers_lab, self.lab))
+        used, out = set(), []
+        for i in range(len(centers_lab)):
+            for j in np.argsort(d[i]):
+                if int(j) not in used:
+                    used.add(int(j))
+                    out.append((self.rows[int(j)], float(d[i, j])))
+                    break
+            else:
+                out.append(None)
+        return out
+
+
+def extract_palette(colors: np.ndarray, counts: np.ndarray, k: int,
+                    yarns: Optional[YarnIndex] = None) -> List[dict]:
+    """k-color palette from a color histogram (see color_stats.load_histogram), most
+    frequent first. With a YarnIndex every color is replaced by its nearest yarn.
+    """
+    rgb = colors.astype(np.float64)
+    w = counts.astype(np.float64)
+    centers, labels = kmeans_lab(_rgb_to_lab(rgb), w, k)
+    weight = np.bincount(labels, weights=w, minlength=len(centers))
+    order = [i for i in np.argsort(-weight, kind='stable') if weight[i] > 0]
+    total = w.sum()
+    snapped = yarns.snap(centers[order]) if yarns is not None else [None] * len(order)
+    out = []
+    for i, snap in zip(order, snapped):
+        m = labels == i
+        r, g, b = np.round((rgb[m] * w[m, None]).sum(0) / weight[i]).astype(int).tolist()
+        item = {"percent": round(float(weight[i] / total) * 100, 2), "source": [r, g, b]}
+        if snap is not None:
+            (cid, r, g, b, code, name), de = snap
+            item.update({"color_id": cid, "yarn_code": code, "yarn_name": name, "delta_e": round(de, 2)})
+        item.update({"r": int(r), "g": int(g), "b": int(b), "hex": f"#{int(r):02x}{int(g):02x}{int(b):02x}"})
+        out.append(item)
+    return out
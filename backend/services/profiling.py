@@ -0,0 +1,205 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+MODES = ('cprofile', 'sample')
+
+# One profiled request at a time: cProfile and tracemalloc are process-wide
+_busy = threading.Lock()
+_local = threading.local()
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's Python stack every `interval` seconds (speedscope "sampled")."""
+
+    def __init__(self, target_ident: int, interval: float):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.target = target_ident
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.frames: Dict[tuple, int] = {}
+        self.samples: List[List[int]] = []
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        fid = self.frames.get(key)
+        if fid is None:
+            fid = self.frames[key] = len(self.frames)
+        return fid
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples.append(stack[::-1])  # root first
+
+    def speedscope(self, name: str) -> dict:
+        frames = [None] * len(self.frames)
+        for (fn, file, line), i in self.frames.items():
+            frames[i] = {"name": fn, "file": file, "line": line}
+        ms = self.interval * 1000.0
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled", "name": name, "unit": "milliseconds",
+                "startValue": 0, "endValue": ms * len(self.samples),
+                "samples": self.samples, "weights": [ms] * len(self.samples),
+            }],
+            "name": name,
+            "exporter": "dunyatek",
+        }
+
+
+class ProfileSession:
+    """Profiles the current request thread; artifacts go to <root>/<id>.{prof|speedscope.json,json}."""
+
+    def __init__(self, root: str, mode: str, label: str, memory: bool = False, interval: float = 0.002):
+        self.root = root
+        self.mode = mode
+        self.label = label
+        self.memory = memory
+        self.interval = interval
+        self.id = time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:8]
+        self.stages: Dict[str, dict] = {}
+        self._prof: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_Sampler] = None
+        self._t0 = 0.0
+
+    def start(self) -> bool:
+        if not _busy.acquire(blocking=False):
+            return False
+        try:
+            if self.memory:
+                tracemalloc.start()
+            if self.mode == 'cprofile':
+                self._prof = cProfile.Profile()
+                self._prof.enable()
+            else:
+                self._sampler = _Sampler(threading.get_ident(), self.interval)
+                self._sampler.start()
+        except Exception:
+            self._cleanup()
+            _busy.release()
+            return False
+        _local.session = self
+        self._t0 = time.perf_counter()
+        return True
+
+    def _cleanup(self):
+        if self._prof is not None:
+            self._prof.disable()
+        if self._sampler is not None:
+            self._sampler.stop_event.set()
+            self._sampler.join()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def finish(self, status: int = 0) -> dict:
+        duration = time.perf_counter() - self._t0
+        peak = tracemalloc.get_traced_memory()[1] if self.memory and tracemalloc.is_tracing() else None
+        try:
+            self._cleanup()
+        finally:
+            _local.session = None
+            _busy.release()
+        os.makedirs(self.root, exist_ok=True)
+        files = {}
+        if self._prof is not None:
+            files['pstats'] = f'{self.id}.prof'
+            self._prof.dump_stats(os.path.join(self.root, files['pstats']))
+        if self._sampler is not None:
+            files['speedscope'] = f'{self.id}.speedscope.json'
+            with open(os.path.join(self.root, files['speedscope']), 'w', encoding='utf-8') as f:
+                json.dump(self._sampler.speedscope(self.label), f)
+        meta = {
+            "id": self.id, "mode": self.mode, "endpoint": self.label, "status": status,
+            "duration_sec": round(duration, 4), "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "memory_peak_bytes": peak, "stages": self.stages, "files": files,
+        }
+        with open(os.path.join(self.root, f'{self.id}.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return meta
+
+
+def active() -> bool:
+    """True while the current thread's request is being profiled."""
+    return getattr(_local, 'session', None) is not None
+
+
+@contextmanager
+def mem_stage(name: str):
+    """Record tracemalloc peak and duration of a stage when the current request is profiled with memory."""
+    session = getattr(_local, 'session', None)
+    if session is None or not session.memory or not tracemalloc.is_tracing():
+        yield
+        return
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        cur, peak = tracemalloc.get_traced_memory()
+        session.stages[name] = {"duration_sec": round(time.perf_counter() - t0, 4),
+                                "peak_bytes": peak - base, "retained_bytes": cur - base}
+
+
+def pstats_text(path: str, limit: int = 60, sort: str = 'cumulative') -> str:
+    buf = io.StringIO()
+    pstats.Stats(path, stream=buf).sort_stats(sort).print_stats(limit)
+    return buf.getvalue()
+
+
+def list_profiles(root: str, limit: int = 100) -> List[dict]:
+    if not os.path.isdir(root):
+        return []
+    metas = []
+    for name in sorted(os.listdir(root), reverse=True):
+        if name.endswith('.json') and not name.endswith('.speedscope.json'):
+            try:
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    metas.append(json.load(f))
+            except Exception:
+                continue
+            if len(metas) >= limit:
+                break
+    return metas
+
+
+def prune(root: str, keep: int) -> int:
+    """Delete all but the newest `keep` profiles (meta json plus .prof / .speedscope.json).
+    keep <= 0 keeps everything. Returns the number of profiles removed.
+    """
+    if keep <= 0 or not os.path.isdir(root):
+        return 0
+    names = os.listdir(root)
+    metas = []
+    for name in names:
+        if name.endswith('.json') and not name.endswith('.speedscope.json'):
+            try:
+                metas.append((os.stat(os.path.join(root, name)).st_mtime_ns, name[:-len('.json')]))
+            except OSError:
+                continue
+    metas.sort(reverse=True)
+    old = {pid for _, pid in metas[keep:]}
+    for name in names:
+        if name.split('.', 1)[0] in old:
+            try:
+                os.remove(os.path.join(root, name))
+            except OSError:
+                pass
+    return len(old)
@@ -0,0 +1,124 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+KINDS = ('generation', 'pattern', 'export')
+_KEY_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def valid_key(key) -> bool:
+    return bool(key) and bool(_KEY_RE.match(str(key)))
+
+
+def progress_path(root: str, kind: str, key) -> str:
+    return os.path.join(root, kind, f'{key}.json')
+
+
+def read_progress(root: str, kind: str, key) -> Optional[dict]:
+    try:
+        with open(progress_path(root, kind, key), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def prune(root: str, max_age: float):
+    """Drop progress files older than max_age seconds (at most once every 10 minutes)."""
+    global _last_prune
+    now = time.time()
+    with _prune_lock:
+        if now - _last_prune < 600:
+            return
+        _last_prune = now
+    for kind in KINDS:
+        d = os.path.join(root, kind)
+        try:
+            names = os.listdir(d)
+        except OSError:
+            continue
+        for name in names:
+            p = os.path.join(d, name)
+            try:
+                if now - os.path.getmtime(p) > max_age:
+                    os.remove(p)
+            except OSError:
+                pass
+
+
+class ProgressTracker:
+    """Latest state of one job, published as <root>/<kind>/<key>.json (atomic replace) so any
+    worker process can stream it. Stages carry a base percent; update(fraction=...) interpolates
+    inside the current stage. Writes are throttled to one per `min_interval` unless the stage changes.
+    """
+
+    def __init__(self, root: str, kind: str, keys: Iterable, stages: Dict[str, int], min_interval: float = 0.2):
+        self.root = root
+        self.kind = kind
+        self.keys = [str(k) for k in keys if valid_key(k)]
+        self.stages = stages
+        self.order = list(stages)
+        self.min_interval = min_interval
+        self.state = {"kind": kind, "status": "running", "stage": None, "percent": 0}
+        self._last_write = 0.0
+        os.makedirs(os.path.join(root, kind), exist_ok=True)
+
+    def add_key(self, key):
+        if valid_key(key) and str(key) not in self.keys:
+            self.keys.append(str(key))
+            self._write()
+
+    def stage(self, name: str, **extra):
+        self.state.update(extra, stage=name, percent=self.stages.get(name, self.state["percent"]))
+        self._write()
+
+    def update(self, fraction: float, **extra):
+        """Progress inside the current stage: fraction 0..1 of the way to the next stage's percent."""
+        name = self.state["stage"]
+        lo = self.stages.get(name, 0)
+        i = self.order.index(name) if name in self.order else -1
+        hi = self.stages[self.order[i + 1]] if 0 <= i < len(self.order) - 1 else 100
+        self.state.update(extra, percent=round(lo + (hi - lo) * max(0.0, min(1.0, fraction)), 1))
+        if time.monotonic() - self._last_write >= self.min_interval:
+            self._write()
+
+    def done(self, **extra):
+        self.state.update(extra, status="done", stage="done", percent=100)
+        self._write()
+
+    def fail(self, error: str):
+        self.state.update(status="error", error=error)
+        self._write()
+
+    def _write(self):
+        self._last_write = time.monotonic()
+        self.state["updated_at"] = time.time()
+        raw = json.dumps(self.state, ensure_ascii=False)
+        for key in self.keys:
+            path = progress_path(self.root, self.kind, key)
+            tmp = None
+            try:
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(raw)
+                os.replace(tmp, path)
+            except OSError:
+                # best-effort (e.g. a reader holds the file on Windows); never fail the job over it
+                if tmp and os.path.exists(tmp):
+                    try:
+                        os.remove(tmp)
+                    except OSError:
+                        pass
+
+
+def sse(data: dict, event: str = 'progress', event_id=None) -> str:
+    out = f"event: {event}\n"
+    if event_id is not None:
+        out += f"id: {event_id}\n"
+    return out + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,28 @@
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import settings
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide requests.Session with a keep-alive connection pool.
+    Shared by the SD proxies and the generation job workers instead of a new
+    connection (and TCP/TLS handshake) per request.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.SD_HTTP_POOL_SIZE)
+                s.mount('http://', adapter)
+                s.mount('https://', adapter)
+                _session = s
+    return _session
+
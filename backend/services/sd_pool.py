@@ -0,0 +1,199 @@
+import random
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import requests
+
+from services.sd_client import get_session
+
+
+class SDNode:
+    def __init__(self, url: str, weight: float = 1.0):
+        self.url = url.rstrip('/')
+        self.weight = max(0.01, float(weight))
+        self.healthy = True
+        self.queue_depth = 0  # jobs on the WebUI from all clients, ours included (from /progress)
+        self.inflight = 0  # requests this process has outstanding on the node
+        self.failures = 0
+        self.last_probe = 0.0
+        self.last_error: Optional[str] = None
+        self.model: Optional[str] = None  # loaded sd_model_checkpoint (from /options)
+
+    def load(self) -> float:
+        return (max(self.inflight, self.queue_depth) + 1) / self.weight
+
+    def as_dict(self) -> dict:
+        return {
+            "url": self.url, "weight": self.weight, "healthy": self.healthy,
+            "queue_depth": self.queue_depth, "inflight": self.inflight,
+            "failures": self.failures, "last_error": self.last_error, "model": self.model,
+        }
+
+
+def parse_nodes(raw: str) -> List[Tuple[str, float]]:
+    """Parse "http://a:7860|2, http://b:7860" into [(url, weight)]; weight defaults to 1."""
+    nodes = []
+    for part in (raw or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        url, _, w = part.partition('|')
+        try:
+            weight = float(w) if w.strip() else 1.0
+        except ValueError:
+            weight = 1.0
+        nodes.append((url.strip(), weight))
+    return nodes
+
+
+class SDPool:
+    """Weighted least-loaded dispatch over several SD WebUI instances.
+
+    A daemon thread probes every node's /sdapi/v1/progress for health and queue
+    depth, and /sdapi/v1/options for the loaded checkpoint. A request goes to the
+    node with the lowest (queued jobs + 1) / weight and is retried on the next
+    node after a connection error or 5xx.
+    """
+
+    def __init__(self, nodes: List[Tuple[str, float]], probe_interval: float = 10.0,
+                 probe_timeout: float = 3.0, retries: int = 2):
+        self.nodes = [SDNode(u, w) for u, w in nodes]
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.retries = max(0, retries)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._live = {}
+        self._thread = None
+
+    def start(self):
+        # Also for a single node: the generation cache keys on the checkpoint it has loaded
+        if self._thread is None and self.probe_interval > 0:
+            self._thread = threading.Thread(target=self._probe_loop, name='sd-pool-probe', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _probe_loop(self):
+        while not self._stop.is_set():
+            self.probe_all()
+            self._stop.wait(self.probe_interval)
+
+    def probe(self, node: SDNode):
+        try:
+            r = get_session().get(f"{node.url}/sdapi/v1/progress", params={"skip_current_image": "true"},
+                                  timeout=self.probe_timeout)
+            r.raise_for_status()
+            js = r.json() or {}
+            depth = int((js.get('state') or {}).get('job_count') or 0)
+            with self._lock:
+                node.healthy, node.queue_depth, node.last_error = True, depth, None
+        except Exception as e:
+            with self._lock:
+                node.healthy, node.last_error = False, str(e)
+        else:
+            try:
+                r = get_session().get(f"{node.url}/sdapi/v1/options", timeout=self.probe_timeout)
+                r.raise_for_status()
+                model = (r.json() or {}).get('sd_model_checkpoint')
+            except Exception:
+                model = None  # still usable for generation; the cache just cannot tell models apart
+            with self._lock:
+                node.model = model
+        node.last_probe = time.time()
+
+    def live_progress(self, url: str, max_age: float = 1.0) -> Optional[dict]:
+        """A node's /sdapi/v1/progress body, fetched at most once per max_age however many
+        progress streams ask (None when unreachable). Node-wide: covers its current job.
+        """
+        now = time.monotonic()
+        with self._lock:
+            hit = self._live.get(url)
+            if hit is not None and now - hit[0] < max_age:
+                return hit[1]
+            self._live[url] = (now, hit[1] if hit else None)  # other streams reuse the old body meanwhile
+        try:
+            r = get_session().get(f"{url}/sdapi/v1/progress", params={"skip_current_image": "true"},
+                                  timeout=self.probe_timeout)
+            r.raise_for_status()
+            body = r.json() or {}
+        except Exception:
+            body = None
+        with self._lock:
+            self._live[url] = (time.monotonic(), body)
+        return body
+
+    def checkpoints(self) -> List[Tuple[str, Optional[str]]]:
+        """[(node url, loaded sd_model_checkpoint)] as last seen by the background probe
+        (None before the first probe). Never calls the nodes.
+        """
+        with self._lock:
+            return [(n.url, n.model) for n in self.nodes]
+
+    def probe_all(self):
+        for node in list(self.nodes):
+            self.probe(node)
+
+    def _pick(self, exclude) -> Optional[SDNode]:
+        with self._lock:
+            candidates = [n for n in self.nodes if n not in exclude and n.healthy]
+            if not candidates:
+                # All marked down: still try the untried ones rather than failing outright
+                candidates = [n for n in self.nodes if n not in exclude]
+            if not candidates:
+                return None
+            best = min(n.load() for n in candidates)
+            node = random.choice([n for n in candidates if n.load() == best])
+            node.inflight += 1
+            return node
+
+    def post(self, path: str, payload: dict, timeout: float, consume=None, on_dispatch=None):
+        """POST to the least-loaded node, failing over on connection errors and 5xx responses.
+        Returns the decoded JSON body, or consume(response) for a streamed response when given.
+        on_dispatch(node_url) is called before each attempt (progress relays poll that node).
+        """
+        tried, last_exc = [], None
+        for _ in range(self.retries + 1):
+            node = self._pick(tried)
+            if node is None:
+                break
+            tried.append(node)
+            try:
+                if on_dispatch is not None:
+                    on_dispatch(node.url)
+                resp = get_session().post(f"{node.url}{path}", json=payload, timeout=timeout, stream=consume is not None)
+                try:
+                    resp.raise_for_status()
+                    out = consume(resp) if consume is not None else resp.json()
+                finally:
+                    resp.close()
+                with self._lock:
+                    node.failures = 0
+                return out
+            except requests.HTTPError as e:
+                last_exc = e
+                if e.response is not None and e.response.status_code < 500:
+                    raise  # the request itself is bad; another node would reject it too
+                self._mark_failed(node, e)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_exc = e
+                self._mark_failed(node, e)
+            finally:
+                with self._lock:
+                    node.inflight -= 1
+                    # The probed depth counted this job; drop it until the next probe
+                    node.queue_depth = max(0, node.queue_depth - 1)
+        raise last_exc or RuntimeError('SD düğümü yok')
+
+    def _mark_failed(self, node: SDNode, exc: Exception):
+        with self._lock:
+            node.failures += 1
+            node.healthy = False  # until the next successful probe
+            node.last_error = str(exc)
+
+    def status(self) -> List[dict]:
+        with self._lock:
+            return [n.as_dict() for n in self.nodes]
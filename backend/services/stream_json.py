@@ -0,0 +1,72 @@
+import json
+import re
+from typing import IO, Any, Iterator
+
+_WS = re.compile(r'[ \t\r\n]*')
+_VALUE_START = frozenset('"{[-0123456789tfn')
+# Everything after a decoded number is still number text: the chunk may have cut it ("12.5e|3")
+_NUMBER_TAIL = re.compile(r'[0-9eE+.\-]*')
+
+
+def iter_json_array(fp: IO[str], chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the items of a top-level JSON array from a text stream one at a time.
+    Only one chunk plus the item being decoded is held in memory. A leading BOM is ignored.
+    Raises ValueError if the document is not exactly one array (missing or doubled commas,
+    trailing data after `]`) or is truncated.
+    """
+    dec = json.JSONDecoder()
+    buf = fp.read(chunk_size)
+    eof = not buf
+    buf = buf.lstrip('\ufeff')
+    pos = 0
+
+    def read_more():
+        nonlocal buf, pos, eof
+        more = fp.read(chunk_size)
+        eof = not more
+        buf, pos = buf[pos:] + more, 0
+
+    def peek() -> str:
+        # Next non-whitespace character, reading on as needed; '' at end of input
+        nonlocal pos
+        while True:
+            pos = _WS.match(buf, pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if eof:
+                return ''
+            read_more()
+
+    c = peek()
+    if not c:
+        raise ValueError('boş JSON')
+    if c != '[':
+        raise ValueError('JSON dizi (array) bekleniyor')
+    pos += 1
+    if peek() == ']':
+        pos += 1
+    else:
+        while True:
+            if peek() not in _VALUE_START:
+                raise ValueError('JSON eksik veya bozuk')
+            try:
+                item, end = dec.raw_decode(buf, pos)
+                if (not eof and isinstance(item, (int, float)) and not isinstance(item, bool)
+                        and _NUMBER_TAIL.fullmatch(buf, end)):
+                    raise json.JSONDecodeError('need more', buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError('JSON eksik veya bozuk')
+                read_more()
+                continue
+            yield item
+            pos = end
+            c = peek()
+            if c == ']':
+                pos += 1
+                break
+            if c != ',':
+                raise ValueError('JSON eksik veya bozuk')
+            pos += 1
+    if peek():
+        raise ValueError('JSON dizisinden sonra fazla veri')
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import tempfile
+from typing import IO, Tuple
+
+from PIL import Image
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def store_content_addressed(stream: IO[bytes], root: str, ext: str, max_bytes: int,
+                            chunk_size: int = 1 << 20) -> Tuple[str, str, int, bool]:
+    """Copy an upload stream to <root>/<sha[:2]>/<sha><ext>, hashing while it is written.
+    The bytes go to a temp file in `root` first (so the final rename is atomic) and are
+    never held in memory. An existing file with the same hash is reused as is.
+    Returns (path, sha256, size, created). Raises UploadTooLarge / ValueError.
+    """
+    os.makedirs(root, exist_ok=True)
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=root, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                block = stream.read(chunk_size)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Dosya çok büyük (en fazla {max_bytes // (1024 * 1024)} MB)")
+                h.update(block)
+                out.write(block)
+        if not size:
+            raise ValueError("Dosya boş")
+        try:
+            # verify() walks the file's structure (for PNG every chunk and its CRC) without
+            # keeping decoded pixels; the image must be reopened before any real use
+            with Image.open(tmp) as im:
+                im.verify()
+        except Exception:
+            raise ValueError("Geçersiz görsel dosyası")
+        sha = h.hexdigest()
+        dest = os.path.join(root, sha[:2], sha + ext.lower())
+        if os.path.exists(dest):
+            os.remove(tmp)
+            return dest, sha, size, False
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(tmp, dest)
+        return dest, sha, size, True
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,118 @@
+import multiprocessing as mp
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from config.settings import settings
+from services import profiling
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def cpu_pool() -> Optional[ProcessPoolExecutor]:
+    """Per-process pool for CPU-bound image work, separate from the request/I-O threads.
+    None when CPU_POOL_WORKERS is 0 (work runs inline).
+    """
+    global _pool
+    if settings.CPU_POOL_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Never fork a threaded web worker: children start from a clean interpreter
+                methods = mp.get_all_start_methods()
+                ctx = mp.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                _pool = ProcessPoolExecutor(max_workers=settings.CPU_POOL_WORKERS, mp_context=ctx)
+    return _pool
+
+
+def run_cpu(fn: Callable, *args, **kwargs):
+    """Run fn in the CPU pool and wait for the result (fn and its arguments must pickle).
+    Inline while the request is profiled, so cProfile and mem_stage() see the work itself.
+    """
+    pool = None if profiling.active() else cpu_pool()
+    if pool is None:
+        return fn(*args, **kwargs)
+    try:
+        return pool.submit(fn, *args, **kwargs).result()
+    except BrokenProcessPool:
+        # A child died (e.g. OOM-killed): drop the pool so the next call builds a fresh one
+        _discard(pool)
+        raise
+
+
+def _discard(pool: ProcessPoolExecutor):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_cpu_pool(wait: bool = True):
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+class DaemonThreadPool:
+    """Thread pool with the submit()/shutdown() surface of ThreadPoolExecutor, but with
+    daemon workers: interpreter exit does not join them, so a job still running after a
+    bounded drain is abandoned instead of holding the process (or needing os._exit).
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = 'worker'):
+        self._max_workers = max(1, max_workers)
+        self._prefix = thread_name_prefix
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        fut = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            self._queue.put((fut, fn, args, kwargs))
+            if len(self._threads) < self._max_workers:
+                t = threading.Thread(target=self._work, name=f"{self._prefix}_{len(self._threads)}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        return fut
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            fut, fn, args, kwargs = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for t in threads:
+                t.join()
@@ -0,0 +1,65 @@
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, Tuple, Union
+
+# Formats that are already compressed: deflating them again only costs CPU
+STORED_EXTS = frozenset({'.png', '.jpg', '.jpeg', '.webp', '.gif', '.zip', '.gz'})
+
+
+class _Sink:
+    """Write-only, non-seekable file object: ZipFile appends, iter_zip() hands the bytes out."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data) -> int:
+        if data:
+            self.chunks.append(bytes(data))
+            self.offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        out, self.chunks = b''.join(self.chunks), []
+        return out
+
+
+def compress_type_for(name: str) -> int:
+    return zipfile.ZIP_STORED if os.path.splitext(name)[1].lower() in STORED_EXTS else zipfile.ZIP_DEFLATED
+
+
+def iter_zip(entries: Iterable[Tuple[str, Union[str, bytes]]], chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    """Stream a ZIP built from (arcname, file path or bytes) entries, without seeking or staging.
+    Entries are stored or deflated by extension (compress_type_for). Sizes and CRCs go in data
+    descriptors after each entry, so memory stays around one chunk per entry being written.
+    `entries` may be a generator; it is consumed lazily.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as zf:
+        for arcname, src in entries:
+            if isinstance(src, (bytes, bytearray)):
+                info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+                info.file_size = len(src)
+            else:
+                info = zipfile.ZipInfo.from_file(src, arcname)
+            info.compress_type = compress_type_for(arcname)
+            # file_size is only a hint here; it decides whether the entry needs zip64 headers
+            with zf.open(info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as out:
+                if isinstance(src, (bytes, bytearray)):
+                    out.write(src)
+                else:
+                    with open(src, 'rb') as f:
+                        for block in iter(lambda: f.read(chunk_size), b''):
+                            out.write(block)
+                            if sink.chunks:
+                                yield sink.drain()
+            if sink.chunks:
+                yield sink.drain()
+    yield sink.drain()  # central directory
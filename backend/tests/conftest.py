@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND)
+
+# Settings are read at import time: point the app at a throwaway DB / output root first
+_TMP = tempfile.mkdtemp(prefix='dunyatek_tests_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ['OUTPUT_ROOT'] = os.path.join(_TMP, 'output')
+os.environ.setdefault('CPU_POOL_WORKERS', '0')
+os.environ.setdefault('APP_WARMUP', '')
+os.environ.setdefault('SECRET_KEY', 'test-secret-key-of-at-least-32-bytes')
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    return create_app(warmup=(), resume_jobs=False)
+
+
+@pytest.fixture(scope='session')
+def auth(app):
+    """(Authorization headers, design_id) for an admin user with a small palette and a 64x64 design."""
+    import numpy as np
+    from PIL import Image
+    from flask_jwt_extended import create_access_token
+    from extensions import db
+    from api.models import User, Palette, Color, Design
+
+    with app.app_context():
+        user = User(name='test', email='test@local', password_hash='x', role='admin')
+        pal = Palette(name='test', max_colors=8)
+        db.session.add_all([user, pal])
+        db.session.flush()
+        rng = np.random.default_rng(0)
+        for r, g, b in rng.integers(0, 256, size=(8, 3)):
+            db.session.add(Color(palette_id=pal.id, r=int(r), g=int(g), b=int(b)))
+        img_dir = os.path.join(os.environ['OUTPUT_ROOT'], 'images')
+        os.makedirs(img_dir, exist_ok=True)
+        img_path = os.path.join(img_dir, 'test_src.png')
+        Image.fromarray(rng.integers(0, 256, size=(64, 64, 3), dtype=np.uint8), 'RGB').save(img_path)
+        d = Design(name='test', original_image=img_path, palette_id=pal.id)
+        db.session.add(d)
+        db.session.commit()
+        return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}, d.id
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def fake_sd(monkeypatch):
+    """Factory for bench/fake_sd.py servers: start(**FakeSD options) -> (url, FakeSD).
+    The app's SD_URL and OPENAI_BASE_URL point at the last one started; all stop after the test.
+    """
+    from bench.fake_sd import serve
+    servers = []
+
+    def start(**kwargs):
+        server, url, fake = serve(**kwargs)
+        servers.append(server)
+        monkeypatch.setenv('SD_URL', url)
+        monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+        monkeypatch.setenv('OPENAI_BASE_URL', url)
+        return url, fake
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
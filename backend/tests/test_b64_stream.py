@@ -0,0 +1,45 @@
+import base64
+import json
+
+import pytest
+
+from services.b64_stream import stream_b64_images
+
+IMAGES = [bytes(range(256)) * 3, b'\x89PNG second image']
+
+
+def _body(key='images'):
+    encoded = [base64.b64encode(img).decode('ascii') for img in IMAGES]
+    if key == 'data':
+        return json.dumps({"created": 1, "data": [{"b64_json": e} for e in encoded]}).encode('ascii')
+    return json.dumps({"images": encoded, "info": "{\"seed\": 1}"}).encode('ascii')
+
+
+def _chunks(raw, size=7):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize('key', ['images', 'data'])
+def test_images_are_decoded_to_files(tmp_path, key):
+    paths = stream_b64_images(_chunks(_body(key)), lambda i: str(tmp_path / f'{i}.png'))
+    assert [open(p, 'rb').read() for p in paths] == IMAGES
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['0.png', '1.png']
+
+
+def test_truncated_after_first_image_leaves_nothing(tmp_path):
+    raw = _body()
+    cut = raw.index(b'"', raw.index(b'",') + 2) + 10  # a few bytes into the second image
+    with pytest.raises(ValueError):
+        stream_b64_images(_chunks(raw[:cut]), lambda i: str(tmp_path / f'{i}.png'))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failing_stream_after_first_image_leaves_nothing(tmp_path):
+    raw = _body()
+
+    def chunks():
+        yield raw[:raw.index(b'",') + 2]  # the first image is complete
+        raise ConnectionError('connection reset')
+    with pytest.raises(ConnectionError):
+        stream_b64_images(chunks(), lambda i: str(tmp_path / f'{i}.png'))
+    assert list(tmp_path.iterdir()) == []
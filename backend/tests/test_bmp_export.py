@@ -0,0 +1,45 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.exporters.bmp import save_bmp8
+
+
+def _palettized(w, h, colors):
+    rng = np.random.default_rng(w * 1000 + h)
+    img = Image.fromarray(rng.integers(0, colors, size=(h, w), dtype=np.uint8), 'P')
+    img.putpalette(rng.integers(0, 256, size=colors * 3, dtype=np.uint8).tolist())
+    return img
+
+
+# Widths cover every row-padding case; heights below, at and above a chunk boundary
+@pytest.mark.parametrize('w,h', [(1, 1), (5, 3), (6, 7), (7, 8), (64, 9), (333, 17)])
+@pytest.mark.parametrize('colors', [2, 16, 256])
+def test_bytes_match_pillow(tmp_path, w, h, colors):
+    img = _palettized(w, h, colors)
+    expected = io.BytesIO()
+    img.save(expected, format='BMP')
+    calls = []
+    out = save_bmp8(img, str(tmp_path / 'out' / 'x.bmp'), progress=lambda d, t: calls.append((d, t)), chunk_rows=8)
+    with open(out, 'rb') as f:
+        assert f.read() == expected.getvalue()
+    assert calls[-1] == (h, h) and len(calls) == -(-h // 8)
+
+
+def test_rgb_input_is_converted(tmp_path):
+    img = Image.new('RGB', (10, 4), (200, 10, 30))
+    expected = io.BytesIO()
+    img.convert('P').save(expected, format='BMP')
+    with open(save_bmp8(img, str(tmp_path / 'rgb.bmp')), 'rb') as f:
+        assert f.read() == expected.getvalue()
+
+
+def test_source_dpi_is_ignored_like_pillow(tmp_path):
+    img = _palettized(12, 5, 16)
+    img.info['dpi'] = (300, 300)  # e.g. carried over from a loaded PNG; Image.save does not use it
+    expected = io.BytesIO()
+    img.save(expected, format='BMP')
+    with open(save_bmp8(img, str(tmp_path / 'dpi.bmp')), 'rb') as f:
+        assert f.read() == expected.getvalue()
@@ -0,0 +1,70 @@
+import io
+import json
+
+import pytest
+
+from services.stream_json import iter_json_array
+
+
+def _items(text, chunk_size=4):
+    return list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+def test_iter_json_array_valid(chunk_size):
+    text = '\ufeff [ 1, -2.5e3 ,"a,]", {"k": [1, 2]}, true, null ] \n'
+    assert _items(text, chunk_size) == [1, -2500.0, "a,]", {"k": [1, 2]}, True, None]
+    assert _items('[]', chunk_size) == []
+    assert _items(' [ ] ', chunk_size) == []
+
+
+@pytest.mark.parametrize('text', [
+    '', '   ', '{"a": 1}', '[1,,2]', '[,1]', '[1 2]', '[1,]', '[1, 2', '[1] x', '[1]]', '[1][2]', '[1x]',
+])
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+def test_iter_json_array_rejects_malformed(text, chunk_size):
+    with pytest.raises(ValueError):
+        _items(text, chunk_size)
+
+
+@pytest.mark.parametrize('count', [10, 3000])  # in-memory upload / spooled to a temp file
+def test_catalog_upload_streams_progress(client, auth, count):
+    headers, _ = auth
+    rows = [{"palette": f"upload-{count}", "r": i % 256, "g": (i * 7) % 256, "b": (i * 13) % 256,
+             "yarn_code": f"Y{i}", "label": "x" * 200} for i in range(count)]
+    raw = json.dumps(rows).encode('utf-8')
+    r = client.post('/api/palettes/import?progress=1&batch_size=1000', headers=headers,
+                    data={"file": (io.BytesIO(raw), 'catalog.json')}, content_type='multipart/form-data')
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert 'error' not in lines[-1], lines[-1]
+    assert lines[-1]['inserted'] == count
+
+
+def _post_catalog(client, headers, body, progress):
+    return client.post('/api/palettes/import' + ('?progress=1' if progress else ''), headers=headers,
+                       data=body, content_type='application/json')
+
+
+@pytest.mark.parametrize('progress', [False, True])
+def test_catalog_malformed_from_the_start_is_400(client, auth, progress):
+    headers, _ = auth
+    for body in ('{"palette": "x"}', '[,1]', '[{"palette": "bad-start", "r": 1 "g": 2}]'):
+        r = _post_catalog(client, headers, body, progress)
+        assert r.status_code == 400, body
+        assert 'error' in r.get_json()
+
+
+def test_catalog_error_after_first_row(client, auth):
+    headers, _ = auth
+    body = '[{"palette": "late-error", "r": 1, "g": 2, "b": 3, "yarn_code": "A"}, oops]'
+    r = _post_catalog(client, headers, body, progress=False)
+    assert r.status_code == 400
+    # A progress stream has already answered 200: the failure is its last line, and nothing is kept
+    r = _post_catalog(client, headers, body, progress=True)
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    r.close()
+    assert 'error' in lines[-1]
+    names = [p['name'] for p in client.get('/api/palettes', headers=headers).get_json()]
+    assert 'late-error' not in names
@@ -0,0 +1,98 @@
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from config.settings import settings
+from extensions import db
+
+
+@pytest.fixture
+def archive(app, auth, tmp_path):
+    """A pattern version with matrix/preview files, an export with meta, and an export whose file is gone."""
+    from api.models import ExportJob, PatternVersion
+    _, design_id = auth
+    files = {}
+    for name, size in (('matrix.png', 3000), ('preview.png', 5000), ('export.bmp', 70000)):
+        files[name] = os.urandom(size)
+        (tmp_path / name).write_bytes(files[name])
+    with app.app_context():
+        pv = PatternVersion(design_id=design_id, matrix_path=str(tmp_path / 'matrix.png'),
+                            preview_path=str(tmp_path / 'preview.png'))
+        db.session.add(pv)
+        db.session.flush()
+        job = ExportJob(pattern_version_id=pv.id, format='bmp', status='done', has_meta=True,
+                        file_path=str(tmp_path / 'export.bmp'))
+        gone = ExportJob(pattern_version_id=pv.id, format='bmp', status='done', file_path=str(tmp_path / 'gone.bmp'))
+        db.session.add_all([job, gone])
+        db.session.commit()
+        ids = {"pv": pv.id, "export": job.id, "gone": gone.id}
+    meta_dir = os.path.join(os.environ['OUTPUT_ROOT'], 'exports')
+    os.makedirs(meta_dir, exist_ok=True)
+    files['meta'] = json.dumps({"export": ids['export']}).encode('utf-8')
+    with open(os.path.join(meta_dir, f"export_{ids['export']}.json"), 'wb') as f:
+        f.write(files['meta'])
+    return ids, files
+
+
+def _body(r):
+    assert r.status_code == 200, r.get_data(as_text=True)
+    assert r.is_streamed and r.mimetype == 'application/zip'
+    chunks = list(r.response)
+    r.close()
+    assert len(chunks) > 1  # written as it goes, not built in memory first
+    return b''.join(chunks)
+
+
+def test_bundle_streams_a_valid_zip(client, auth, archive):
+    headers, _ = auth
+    ids, files = archive
+    r = client.post('/api/archive/bundle', headers=headers, json={
+        "export_ids": [ids['export'], ids['gone'], 999999], "pattern_version_ids": [ids['pv']]})
+    assert r.headers['Content-Disposition'].startswith('attachment; filename="bundle_')
+    with zipfile.ZipFile(io.BytesIO(_body(r))) as zf:
+        assert zf.testzip() is None
+        e, g, pv = ids['export'], ids['gone'], ids['pv']
+        assert zf.namelist() == [f"exports/pattern_{e}.bmp", f"exports/pattern_{e}.json",
+                                 f"patterns/pv_{pv}_matrix.png", f"patterns/pv_{pv}_preview.png", "manifest.json"]
+        assert zf.read(f"exports/pattern_{e}.bmp") == files['export.bmp']
+        assert zf.read(f"exports/pattern_{e}.json") == files['meta']
+        assert zf.read(f"patterns/pv_{pv}_matrix.png") == files['matrix.png']
+        assert zf.read(f"patterns/pv_{pv}_preview.png") == files['preview.png']
+        manifest = json.loads(zf.read('manifest.json'))
+    assert manifest['missing'] == [f"exports/pattern_{g}.bmp"]
+    assert manifest['not_found'] == ["export:999999"]
+    assert manifest['export_ids'] == [e, g, 999999] and manifest['pattern_version_ids'] == [pv]
+
+
+def test_bundle_download_link_with_query_token(client, auth, archive):
+    headers, _ = auth
+    ids, files = archive
+    token = headers['Authorization'].split(' ', 1)[1]
+    r = client.get('/api/archive/bundle', query_string={"jwt": token, "pattern_version_ids": str(ids['pv'])})
+    with zipfile.ZipFile(io.BytesIO(_body(r))) as zf:
+        assert zf.testzip() is None
+        assert zf.read(f"patterns/pv_{ids['pv']}_preview.png") == files['preview.png']
+
+
+def test_bundle_max_items(client, auth, archive, monkeypatch):
+    headers, _ = auth
+    ids, _ = archive
+    monkeypatch.setattr(settings, 'BUNDLE_MAX_ITEMS', 2)
+    r = client.post('/api/archive/bundle', headers=headers,
+                    json={"export_ids": [ids['export'], ids['gone']], "pattern_version_ids": [ids['pv']]})
+    assert r.status_code == 400
+    assert r.get_json()['error'] == 'En fazla 2 kayıt seçilebilir'
+    r = client.post('/api/archive/bundle', headers=headers, json={"export_ids": [ids['export'], ids['gone']]})
+    _body(r)
+
+
+def test_bundle_rejects_empty_or_fileless_selection(client, auth, archive):
+    headers, _ = auth
+    ids, _ = archive
+    assert client.post('/api/archive/bundle', headers=headers, json={}).status_code == 400
+    assert client.post('/api/archive/bundle', headers=headers, json={"export_ids": ["x"]}).status_code == 400
+    r = client.post('/api/archive/bundle', headers=headers, json={"export_ids": [ids['gone'], 999999]})
+    assert r.status_code == 404 and r.get_json()['not_found'] == ["export:999999"]
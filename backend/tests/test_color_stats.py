@@ -0,0 +1,118 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services import color_stats
+
+
+@pytest.fixture(autouse=True)
+def _empty_mem_cache():
+    color_stats._mem_cache.clear()
+    yield
+    color_stats._mem_cache.clear()
+
+
+def _two_tone(w=100, h=40, split=75):
+    arr = np.zeros((h, w, 3), dtype=np.uint8)
+    arr[:, :split] = (200, 16, 16)
+    arr[:, split:] = (16, 16, 200)
+    return Image.fromarray(arr, 'RGB')
+
+
+def _write(path, img):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    img.save(path, format='PNG')
+    return path
+
+
+def test_color_histogram_bins_exact_means():
+    colors, counts = color_stats.color_histogram(_two_tone())
+    assert colors.dtype == np.float32 and counts.dtype == np.int64
+    order = np.argsort(-counts)
+    assert counts[order].tolist() == [3000, 1000]
+    assert colors[order].tolist() == [[200, 16, 16], [16, 16, 200]]
+
+
+def test_color_histogram_is_deterministic_after_downscale():
+    rng = np.random.default_rng(7)
+    img = Image.fromarray(rng.integers(0, 256, size=(600, 900, 3), dtype=np.uint8), 'RGB')
+    a = color_stats.color_histogram(img)
+    b = color_stats.color_histogram(img.copy())
+    assert np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1])
+    assert a[1].sum() == 150 * 225  # reduced by 4 to fit HIST_MAX_SIDE
+    assert len(a[1]) <= 1 << (3 * color_stats.HIST_BITS)
+
+
+def test_median_cut_weights_and_order():
+    out = color_stats.median_cut(*color_stats.color_histogram(_two_tone()), 2)
+    assert [c['hex'] for c in out] == ['#c81010', '#1010c8']
+    assert [c['percent'] for c in out] == [75.0, 25.0]
+
+
+def test_median_cut_stops_when_boxes_cannot_split():
+    out = color_stats.median_cut(*color_stats.color_histogram(_two_tone()), 8)
+    assert len(out) == 2
+
+
+def test_median_cut_percent_sums_to_100():
+    rng = np.random.default_rng(3)
+    img = Image.fromarray(rng.integers(0, 256, size=(64, 64, 3), dtype=np.uint8), 'RGB')
+    out = color_stats.median_cut(*color_stats.color_histogram(img), 12)
+    assert len(out) == 12
+    assert sum(c['percent'] for c in out) == pytest.approx(100, abs=0.1)
+    assert [c['percent'] for c in out] == sorted((c['percent'] for c in out), reverse=True)
+
+
+def test_median_cut_empty_histogram():
+    assert color_stats.median_cut(np.zeros((0, 3), np.float32), np.zeros(0, np.int64), 4) == []
+
+
+def test_load_histogram_caches_by_hash_outside_image_dir(tmp_path, monkeypatch):
+    hist_dir = str(tmp_path / 'cache')
+    path = _write(str(tmp_path / 'gen' / 'a.png'), _two_tone())
+    decodes = []
+    real = color_stats.color_histogram
+    monkeypatch.setattr(color_stats, 'color_histogram', lambda im: decodes.append(1) or real(im))
+
+    first = color_stats.load_histogram(hist_dir, path)
+    assert len(decodes) == 1
+    assert os.listdir(tmp_path / 'gen') == ['a.png']
+    sha = color_stats._file_sha256(path)
+    assert os.path.exists(color_stats.hist_path(hist_dir, sha))
+
+    # memory hit: neither decoded nor re-hashed
+    monkeypatch.setattr(color_stats, '_file_sha256', lambda p: pytest.fail('re-hashed'))
+    assert color_stats.load_histogram(hist_dir, path) is first
+    monkeypatch.undo()
+    monkeypatch.setattr(color_stats, 'color_histogram', lambda im: decodes.append(1) or real(im))
+
+    # disk hit: a new process (empty memory) and a copy with the same bytes reuse it
+    color_stats._mem_cache.clear()
+    copy = shutil.copy(path, str(tmp_path / 'gen' / 'b.png'))
+    colors, counts = color_stats.load_histogram(hist_dir, copy)
+    assert len(decodes) == 1
+    assert np.array_equal(colors, first[0]) and np.array_equal(counts, first[1])
+    assert color_stats.file_dominant_colors(hist_dir, path, 2)[0]['percent'] == 75.0
+
+
+def test_changed_content_is_recomputed(tmp_path):
+    hist_dir = str(tmp_path / 'cache')
+    path = _write(str(tmp_path / 'gen' / 'a.png'), _two_tone())
+    assert color_stats.file_dominant_colors(hist_dir, path, 2)[0]['percent'] == 75.0
+    _write(path, _two_tone(split=25))
+    os.utime(path, ns=(1, 1))
+    top = color_stats.file_dominant_colors(hist_dir, path, 2)[0]
+    assert (top['hex'], top['percent']) == ('#1010c8', 75.0)
+
+
+def test_remove_image_drops_its_histogram(tmp_path):
+    hist_dir = str(tmp_path / 'cache')
+    path = _write(str(tmp_path / 'gen' / 'a.png'), _two_tone())
+    color_stats.load_histogram(hist_dir, path)
+    cached = color_stats.hist_path(hist_dir, color_stats._file_sha256(path))
+    color_stats.remove_image(hist_dir, path)
+    assert not os.path.exists(path) and not os.path.exists(cached)
+    assert not color_stats._mem_cache
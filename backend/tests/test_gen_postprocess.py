@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services import color_stats
+from services.gen_postprocess import postprocess_batch, postprocess_image
+
+
+def _write(path, size=(200, 120)):
+    rng = np.random.default_rng(1)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8), 'RGB').save(path, format='PNG')
+    return path
+
+
+def _assert_histogram_saved(hist_dir, path, monkeypatch):
+    def no_decode(*args, **kwargs):
+        raise AssertionError('histogram was not saved')
+    monkeypatch.setattr(color_stats, 'color_histogram', no_decode)
+    colors, counts = color_stats.load_histogram(hist_dir, path)
+    assert counts.sum() > 0
+    # nothing but the image and its thumbnail lands next to it
+    assert sorted(os.listdir(os.path.dirname(path))) == sorted([os.path.basename(path), 'thumbs'])
+
+
+def test_unframed(tmp_path, monkeypatch):
+    src = _write(str(tmp_path / 'gen' / 'a.png'))
+    out = postprocess_image(src, thumb_size=64, colors_k=4, hist_dir=str(tmp_path / 'hist'))
+    assert out['path'] == src and os.path.exists(src)
+    with Image.open(out['thumb_path']) as th:
+        assert th.format == 'JPEG' and max(th.size) == 64
+    assert len(out['colors']) == 4 and sum(c['percent'] for c in out['colors']) == pytest.approx(100, abs=0.1)
+    _assert_histogram_saved(str(tmp_path / 'hist'), out['path'], monkeypatch)
+
+
+# '.png' in a directory name and an upper-case extension used to defeat path.replace('.png', ...)
+@pytest.mark.parametrize('rel', ['a.png', os.path.join('batch.png', 'b.PNG')])
+def test_framed_replaces_the_raw_file(tmp_path, monkeypatch, rel):
+    src = _write(str(tmp_path / 'gen' / rel))
+    out = postprocess_image(src, frame_w=10, frame_color='#ff0000', thumb_size=64, hist_dir=str(tmp_path / 'hist'))
+    assert out['path'] == os.path.splitext(src)[0] + '_fr.png'
+    assert not os.path.exists(src)
+    with Image.open(out['path']) as im:
+        assert im.size == (220, 140)
+        assert im.convert('RGB').getpixel((0, 0)) == (255, 0, 0)
+    assert os.path.exists(out['thumb_path'])
+    assert out['colors'][0]['hex'] == '#ff0000'  # the frame is the largest single color
+    _assert_histogram_saved(str(tmp_path / 'hist'), out['path'], monkeypatch)
+
+
+def test_batch_keeps_order_and_isolates_failures(tmp_path):
+    good = [_write(str(tmp_path / f'{i}.png'), (32, 32)) for i in range(3)]
+    bad = str(tmp_path / 'broken.png')
+    with open(bad, 'wb') as f:
+        f.write(b'not a png')
+    out = postprocess_batch([good[0], bad, good[1], good[2]], workers=3)
+    assert [o['path'] for o in out] == [good[0], bad, good[1], good[2]]
+    assert 'error' in out[1] and all('error' not in o for o in (out[0], out[2], out[3]))
@@ -0,0 +1,54 @@
+import pytest
+
+PAYLOAD = {"prompt": "halı", "seed": 42, "width": 32, "height": 32}
+
+
+@pytest.fixture
+def sd(app, fake_sd, monkeypatch):
+    """start() -> FakeSD now serving; probe() refreshes the pool's view of the loaded models."""
+    from config.settings import settings
+    monkeypatch.setattr(settings, 'SD_PROBE_INTERVAL_SEC', 0)  # no probe thread: the test probes itself
+
+    def probe():
+        from api.routes import get_sd_pool
+        with app.app_context():
+            get_sd_pool().probe_all()
+
+    def start():
+        _, fake = fake_sd(latency=0.01, size=16)
+        probe()
+        return fake
+    start.probe = probe
+    return start
+
+
+def _generate(client, headers):
+    r = client.post('/api/ai/txt2img', json=PAYLOAD, headers=headers)
+    assert r.status_code == 201, r.get_json()
+    return r.get_json()['cached']
+
+
+def test_cache_key_follows_model_and_nodes(client, auth, sd):
+    headers, _ = auth
+    fake = sd()
+    assert _generate(client, headers) is False
+    assert _generate(client, headers) is True
+    fake.model = 'other.safetensors'
+    assert _generate(client, headers) is True  # not seen until the next probe
+    sd.probe()
+    assert _generate(client, headers) is False
+    assert _generate(client, headers) is True
+    sd()  # another node, same model name
+    assert _generate(client, headers) is False
+
+
+def test_cache_key_never_calls_the_nodes(app, sd, monkeypatch):
+    import services.sd_pool
+    from api.routes import _generation_cache_key
+    sd()
+
+    def no_http():
+        raise AssertionError('cache key must come from the probe state')
+    monkeypatch.setattr(services.sd_pool, 'get_session', no_http)
+    with app.app_context():
+        assert _generation_cache_key('txt2img', PAYLOAD) is not None
@@ -0,0 +1,72 @@
+import time
+from datetime import datetime, timedelta
+
+from extensions import db
+
+
+def _wait(client, headers, job_id, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        body = client.get(f'/api/ai/jobs/{job_id}', headers=headers).get_json()
+        if body['status'] in ('done', 'error'):
+            return body
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {body['status']}")
+
+
+def test_submit_runs_to_done(client, auth, fake_sd):
+    headers, _ = auth
+    fake_sd(latency=0.05, size=32)
+    r = client.post('/api/ai/jobs', json={"kind": "txt2img", "prompt": "halı", "seed": 7,
+                                          "width": 32, "height": 32}, headers=headers)
+    assert r.status_code == 202
+    job = _wait(client, headers, r.get_json()['job_id'])
+    assert job['status'] == 'done', job
+    result = client.get(f"/api/ai/jobs/{job['id']}/result", headers=headers)
+    assert result.status_code == 200
+    assert result.get_json()['results']
+
+
+def test_stale_running_job_is_requeued_and_finished(app, client, auth, fake_sd):
+    from api.models import GenerationJob
+    from api.routes import resume_generation_jobs
+    headers, _ = auth
+    fake_sd(latency=0.05, size=32)
+    with app.app_context():
+        job = GenerationJob(kind='txt2img', status='running', started_at=datetime.utcnow() - timedelta(days=1),
+                            params='{"prompt": "halı", "seed": 8, "width": 32, "height": 32}')
+        fresh = GenerationJob(kind='txt2img', status='running', started_at=datetime.utcnow(),
+                              params='{"prompt": "halı", "seed": 9, "width": 32, "height": 32}')
+        db.session.add_all([job, fresh])
+        db.session.commit()
+        stale_id, fresh_id = job.id, fresh.id
+    resume_generation_jobs(app)
+    assert _wait(client, headers, stale_id)['status'] == 'done'
+    assert client.get(f'/api/ai/jobs/{fresh_id}', headers=headers).get_json()['status'] == 'running'
+
+
+def test_concurrent_submits_run_a_job_once(app, monkeypatch):
+    import threading
+    import api.routes as routes
+    runs, release = [], threading.Event()
+
+    def run(app, job_id):
+        runs.append(job_id)
+        release.wait(5)
+    monkeypatch.setattr(routes, '_run_generation_job', run)
+    start = threading.Barrier(8)
+
+    def submit():
+        start.wait()
+        routes._submit_job(app, 424242)
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    release.set()
+    deadline = time.time() + 5
+    while routes._gen_futures and time.time() < deadline:
+        time.sleep(0.01)
+    assert runs == [424242]
+    assert not routes._gen_futures
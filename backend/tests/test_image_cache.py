@@ -0,0 +1,163 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import BACKEND
+from services import image_cache
+from services.image_cache import DecodedImageCache
+
+NBYTES = 32 * 32 * 3
+
+
+def _write(tmp_path, name, seed):
+    path = str(tmp_path / name)
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 256, size=(32, 32, 3), dtype=np.uint8), 'RGB').save(path)
+    return path
+
+
+def _segment_exists(name):
+    from multiprocessing import resource_tracker, shared_memory
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    shm.close()
+    return True
+
+
+def _no_decode(path):
+    raise AssertionError(f'decoded {path} again')
+
+
+@pytest.fixture
+def shm_caches():
+    caches = []
+
+    def make(max_bytes=10 * NBYTES):
+        c = DecodedImageCache(max_bytes, use_shm=True)
+        caches.append(c)
+        return c
+    yield make
+    for c in caches:
+        c.clear()
+
+
+def test_lru_evicts_by_byte_budget(tmp_path):
+    a, b, c, d = (_write(tmp_path, f'{n}.png', i) for i, n in enumerate('abcd'))
+    cache = DecodedImageCache(3 * NBYTES)
+    for p in (a, b, c):
+        cache.get_rgb(p)
+    cache.get_rgb(a)  # a becomes most recently used, so b is the oldest
+    cache.get_rgb(d)
+    st = cache.stats()
+    assert (st['entries'], st['bytes'], st['evictions']) == (3, 3 * NBYTES, 1)
+    assert (st['hits'], st['misses']) == (1, 4)
+    keys = [k[0] for k in cache._lru]
+    assert keys == [os.path.abspath(p) for p in (c, a, d)]
+    arr = cache.get_rgb(b)  # decoded again
+    assert cache.stats()['misses'] == 5 and not arr.flags.writeable
+    with Image.open(b) as im:
+        assert np.array_equal(arr, np.asarray(im.convert('RGB')))
+
+
+def test_image_over_budget_is_not_kept(tmp_path):
+    cache = DecodedImageCache(NBYTES - 1)
+    cache.get_rgb(_write(tmp_path, 'a.png', 0))
+    assert cache.stats()['entries'] == 0 and cache.stats()['bytes'] == 0
+
+
+def test_rewritten_file_is_a_new_key(tmp_path):
+    path = _write(tmp_path, 'a.png', 0)
+    cache = DecodedImageCache(10 * NBYTES)
+    first = cache.get_rgb(path).copy()
+    _write(tmp_path, 'a.png', 1)
+    os.utime(path, ns=(1, 1))
+    assert not np.array_equal(cache.get_rgb(path), first)
+
+
+def test_shm_publish_then_attach(tmp_path, shm_caches, monkeypatch):
+    path = _write(tmp_path, 'a.png', 0)
+    owner = shm_caches()
+    arr = owner.get_rgb(path)
+    assert owner.stats()['shm_bytes'] == NBYTES
+    assert _segment_exists(owner._shm_name(owner._key(path)))
+
+    monkeypatch.setattr(image_cache, '_decode', _no_decode)
+    reader = shm_caches()
+    attached = reader.get_rgb(path)
+    assert np.array_equal(attached, arr) and not attached.flags.writeable
+    assert reader.stats()['shm_hits'] == 1 and reader.stats()['shm_bytes'] == 0
+
+
+_ATTACH_SCRIPT = r'''
+import os, sys
+sys.path.insert(0, os.environ['BACKEND'])
+from services import image_cache
+from services.image_cache import DecodedImageCache
+def no_decode(path):
+    raise AssertionError('decoded')
+image_cache._decode = no_decode
+cache = DecodedImageCache(1 << 20, use_shm=True)
+print(int(cache.get_rgb(sys.argv[1]).sum()), cache.stats()['shm_hits'])
+'''
+
+
+def test_shm_attach_from_another_process(tmp_path, shm_caches):
+    path = _write(tmp_path, 'a.png', 0)
+    arr = shm_caches().get_rgb(path)
+    out = subprocess.run([sys.executable, '-c', _ATTACH_SCRIPT, path], env=dict(os.environ, BACKEND=BACKEND),
+                         capture_output=True, text=True, timeout=30)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split() == [str(int(arr.sum())), '1']
+    # the reader exiting must not take the owner's segment with it
+    assert _segment_exists(DecodedImageCache._shm_name(DecodedImageCache._key(path)))
+
+
+def test_eviction_unlinks_owned_segments_only(tmp_path, shm_caches):
+    a, b = _write(tmp_path, 'a.png', 0), _write(tmp_path, 'b.png', 1)
+    owner = shm_caches(max_bytes=NBYTES)
+    reader = shm_caches(max_bytes=NBYTES)
+    owner.get_rgb(a)
+    reader.get_rgb(a)
+    name_a = owner._shm_name(owner._key(a))
+    reader.get_rgb(b)  # reader publishes b and evicts its attachment to a
+    assert reader.stats()['evictions'] == 1 and _segment_exists(name_a)
+    owner.get_rgb(b)  # owner attaches to b and evicts (unlinks) a
+    assert owner.stats()['evictions'] == 1 and not _segment_exists(name_a)
+
+
+def test_clear_unlinks_segments(tmp_path, shm_caches):
+    paths = [_write(tmp_path, f'{i}.png', i) for i in range(3)]
+    cache = shm_caches()
+    for p in paths:
+        cache.get_rgb(p)
+    names = [cache._shm_name(cache._key(p)) for p in paths]
+    assert all(_segment_exists(n) for n in names)
+    cache.clear()
+    assert cache.stats()['entries'] == 0
+    assert not any(_segment_exists(n) for n in names)
+
+
+_EXIT_SCRIPT = r'''
+import os, sys
+sys.path.insert(0, os.environ['BACKEND'])
+from services.image_cache import DecodedImageCache
+cache = DecodedImageCache(1 << 20, use_shm=True)
+cache.get_rgb(sys.argv[1])
+print(cache.stats()['shm_bytes'])
+'''
+
+
+def test_segments_unlinked_at_process_exit(tmp_path):
+    path = _write(tmp_path, 'a.png', 0)
+    out = subprocess.run([sys.executable, '-c', _EXIT_SCRIPT, path], env=dict(os.environ, BACKEND=BACKEND),
+                         capture_output=True, text=True, timeout=30)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split() == [str(NBYTES)]
+    assert not _segment_exists(DecodedImageCache._shm_name(DecodedImageCache._key(path)))
@@ -0,0 +1,45 @@
+import numpy as np
+from PIL import Image
+
+from services import image_processing
+from services.ingest import IngestedImage, ingest_image
+
+
+def _source(tmp_path, size, max_side):
+    rng = np.random.default_rng(1)
+    path = str(tmp_path / 'src.png')
+    Image.fromarray(rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8), 'RGB').save(path)
+    return path, IngestedImage(ingest_image(path, str(tmp_path / 'ingest'), max_side=max_side))
+
+
+def test_downscaled_working_copy_falls_back_to_original(tmp_path):
+    path, source = _source(tmp_path, (96, 64), max_side=48)
+    assert source.downscaled and source.size == (48, 32)
+    palette = [(0, 0, 0), (255, 255, 255), (200, 30, 30), (30, 30, 200)]
+    for kwargs in ({"palette": palette, "delta_e_tolerance": 2.0}, {"palette": palette}, {"max_colors": 8}):
+        out = image_processing.quantize_to_palette(path, source=source, **kwargs)
+        ref = image_processing.quantize_to_palette(path, **kwargs)
+        assert out.size == (96, 64)
+        assert np.array_equal(np.asarray(out), np.asarray(ref))
+
+
+def test_working_copy_below_cap_matches_original(tmp_path):
+    path, source = _source(tmp_path, (40, 30), max_side=64)
+    assert not source.downscaled
+    palette = [(0, 0, 0), (255, 255, 255), (200, 30, 30)]
+    out = image_processing.quantize_to_palette(path, palette, delta_e_tolerance=2.0, source=source)
+    ref = image_processing.quantize_to_palette(path, palette, delta_e_tolerance=2.0)
+    assert np.array_equal(np.asarray(out), np.asarray(ref))
+
+
+def test_palette_over_256_colors_is_clamped(tmp_path):
+    path, source = _source(tmp_path, (40, 30), max_side=64)
+    rng = np.random.default_rng(2)
+    palette = [tuple(int(v) for v in c) for c in rng.integers(0, 256, size=(300, 3))]
+    out = image_processing.quantize_to_palette(path, palette, delta_e_tolerance=2.0, source=source)
+    ref = image_processing.quantize_to_palette(path, palette[:256], delta_e_tolerance=2.0, source=source)
+    assert np.array_equal(np.asarray(out), np.asarray(ref))
+    # every index refers to a real palette entry (no uint8 wrap-around)
+    snapped = np.asarray(out.convert('RGB')).reshape(-1, 3)
+    allowed = {tuple(c) for c in palette[:256]}
+    assert all(tuple(int(v) for v in px) in allowed for px in snapped)
@@ -0,0 +1,91 @@
+from datetime import datetime
+from urllib.parse import urlencode
+
+import pytest
+
+from extensions import db
+
+
+@pytest.fixture
+def exports(app, auth):
+    """make(fmt, n) inserts n export rows tagged with format=fmt, all at one created_at; returns their ids."""
+    from api.models import ExportJob, PatternVersion
+    _, design_id = auth
+
+    def make(fmt, n, created_at=datetime(2100, 1, 1, 12, 0, 0)):
+        with app.app_context():
+            pv = PatternVersion(design_id=design_id, created_at=created_at)
+            db.session.add(pv)
+            db.session.flush()
+            rows = [ExportJob(pattern_version_id=pv.id, format=fmt, status='done', created_at=created_at)
+                    for _ in range(n)]
+            db.session.add_all(rows)
+            db.session.commit()
+            return [r.id for r in rows]
+    return make
+
+
+def _page(app, fmt, **args):
+    from api.models import ExportJob
+    from api.routes import _keyset_page
+    with app.test_request_context('/?' + urlencode(args)):
+        rows, cursor = _keyset_page(ExportJob.query.filter_by(format=fmt), ExportJob.created_at, ExportJob.id)
+        return [r.id for r in rows], cursor
+
+
+def _walk(app, fmt, limit):
+    ids, cursors, cursor = [], [], None
+    while True:
+        args = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page, cursor = _page(app, fmt, **args)
+        ids += page
+        if not cursor:
+            return ids, cursors
+        cursors.append(cursor)
+
+
+def test_equal_created_at_pages_by_id_without_gaps(app, exports):
+    made = exports('ks-equal', 7)
+    ids, cursors = _walk(app, 'ks-equal', 2)
+    assert ids == sorted(made, reverse=True)
+    assert len(cursors) == 3 and all(c.startswith('2100-01-01T12:00:00|') for c in cursors)
+
+
+def test_cursor_at_the_last_page(app, exports):
+    made = sorted(exports('ks-last', 4), reverse=True)
+    # exactly `limit` rows left: no further cursor, and nothing after the last id
+    assert _page(app, 'ks-last', limit=4) == (made, None)
+    page, cursor = _page(app, 'ks-last', limit=2)
+    assert page == made[:2] and cursor
+    assert _page(app, 'ks-last', limit=2, cursor=cursor) == (made[2:], None)
+    assert _page(app, 'ks-last', limit=2, cursor=f"2100-01-01T12:00:00|{made[-1]}") == ([], None)
+
+
+def test_limit_is_clamped(app, exports):
+    made = exports('ks-clamp', 505)
+    page, cursor = _page(app, 'ks-clamp', limit=100000)
+    assert len(page) == 500 and cursor
+    assert _page(app, 'ks-clamp', limit=100000, cursor=cursor) == (sorted(made)[:5][::-1], None)
+    assert len(_page(app, 'ks-clamp', limit=0)[0]) == 1
+    assert len(_page(app, 'ks-clamp', limit='abc')[0]) == 100
+
+
+@pytest.mark.parametrize('cursor', ['garbage', '2100-01-01T12:00:00|x', 'yesterday|5'])
+@pytest.mark.parametrize('url', ['/api/archive/exports', '/api/archive/previews', '/api/prompts'])
+def test_invalid_cursor_is_400(client, auth, url, cursor):
+    headers, _ = auth
+    r = client.get(url, query_string={"cursor": cursor}, headers=headers)
+    assert r.status_code == 400
+    assert r.get_json() == {"error": "cursor geçersiz"}
+
+
+def test_endpoint_returns_next_cursor_header(client, auth, exports):
+    headers, _ = auth
+    made = sorted(exports('ks-http', 3, created_at=datetime(2200, 1, 1)), reverse=True)
+    r = client.get('/api/archive/exports?limit=2', headers=headers)
+    assert r.status_code == 200
+    assert [e['id'] for e in r.get_json()] == made[:2]
+    assert r.headers['X-Next-Cursor'] == f"2200-01-01T00:00:00|{made[1]}"
+    r = client.get('/api/archive/exports', query_string={"limit": 1, "cursor": r.headers['X-Next-Cursor']},
+                   headers=headers)
+    assert [e['id'] for e in r.get_json()] == made[2:]
@@ -0,0 +1,65 @@
+import re
+
+from services import metrics
+
+
+def _type_lines(text):
+    return re.findall(r'^# TYPE (\S+) ', text, flags=re.M)
+
+
+def test_render_writes_each_family_once():
+    reg = metrics.Registry()
+    reg.describe('x_cache_requests_total', 'lookups')
+    reg.inc('x_cache_requests_total', cache='generation', result='hit')
+    reg.observe('x_stage_seconds', 0.2, stage='a')
+    reg.add_collector(lambda: [
+        ('x_cache_requests_total', 'counter', {'cache': 'image', 'result': 'hit'}, 3),
+        ('x_cache_bytes', 'gauge', {}, 10),
+        ('x_cache_bytes', 'gauge', {'shard': '1'}, 5),
+        ('x_stage_seconds', 'gauge', {}, 1),  # clashes with the histogram: dropped
+    ])
+    text = reg.render()
+    types = _type_lines(text)
+    assert len(types) == len(set(types)), text
+    lines = text.splitlines()
+    start = lines.index('# TYPE x_cache_requests_total counter')
+    assert lines[start + 1:start + 3] == [
+        'x_cache_requests_total{cache="generation",result="hit"} 1',
+        'x_cache_requests_total{cache="image",result="hit"} 3',
+    ]
+    assert 'x_stage_seconds 1' not in lines
+
+
+def test_metrics_endpoint_has_no_repeated_type(app, client, auth, monkeypatch):
+    from config.settings import settings
+    headers, _ = auth
+    monkeypatch.setattr(settings, 'METRICS_ENABLED', True)
+    metrics.inc('dunyatek_cache_requests_total', cache='generation', result='miss')
+    r = client.get('/api/metrics', headers=headers)
+    assert r.status_code == 200
+    types = _type_lines(r.get_data(as_text=True))
+    assert 'dunyatek_cache_requests_total' in types
+    assert len(types) == len(set(types))
+
+
+def test_metrics_endpoint_requires_token_or_admin(app, client, auth, monkeypatch):
+    from config.settings import settings
+    headers, _ = auth
+    monkeypatch.setattr(settings, 'METRICS_ENABLED', True)
+    monkeypatch.setattr(settings, 'METRICS_TOKEN', '')
+    assert client.get('/api/metrics').status_code == 403
+    assert client.get('/api/metrics', headers={"Authorization": "Bearer "}).status_code == 403
+    assert client.get('/api/metrics', headers=headers).status_code == 200
+    monkeypatch.setattr(settings, 'METRICS_TOKEN', 's3cret')
+    assert client.get('/api/metrics', headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert client.get('/api/metrics', headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_sd_node_samples_do_not_expose_urls(app, monkeypatch):
+    import api.routes as routes
+    from services.sd_pool import SDPool
+    pool = SDPool([('http://10.0.0.5:7860', 1.0), ('http://gpu-2.internal:7860', 2.0)], probe_interval=0)
+    monkeypatch.setitem(routes._sd_pool, 'pool', pool)
+    samples = [s for s in routes._runtime_samples() if s[0].startswith('dunyatek_sd_node_')]
+    assert sorted({s[2]['node'] for s in samples}) == ['0', '1']
+    assert not any('http' in repr(s) for s in samples)
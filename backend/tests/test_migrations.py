@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+from flask import Flask
+from sqlalchemy import inspect, text
+
+import migrations
+from extensions import db
+import api.models  # noqa: F401  (registers the tables)
+
+
+def _make_app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'migrate.db'}"
+    db.init_app(app)
+    return app
+
+
+def _applied(app):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            return conn.execute(text("SELECT version FROM schema_version ORDER BY version")).scalars().all()
+
+
+def test_fresh_database_runs_each_migration_once(tmp_path):
+    app = _make_app(tmp_path)
+    logged = []
+    with app.app_context():
+        assert migrations.run_migrations(log=logged.append) == migrations.MIGRATIONS[-1][0]
+        assert migrations.run_migrations(log=logged.append) == migrations.MIGRATIONS[-1][0]
+    assert len(logged) == len(migrations.MIGRATIONS)
+    assert _applied(app) == [m[0] for m in migrations.MIGRATIONS]
+
+
+def test_existing_database_is_upgraded_idempotently(tmp_path):
+    app = _make_app(tmp_path)
+    with app.app_context():
+        # users table from before the role column; everything else already at the newest shape
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+                "email VARCHAR(120) NOT NULL UNIQUE, password_hash VARCHAR(200) NOT NULL, created_at DATETIME)"
+            ))
+            conn.execute(text("INSERT INTO users (name, email, password_hash) VALUES ('a', 'a@local', 'x')"))
+        migrations.run_migrations()
+        with db.engine.connect() as conn:
+            assert 'role' in [c['name'] for c in inspect(conn).get_columns('users')]
+            assert conn.execute(text("SELECT email FROM users")).scalars().all() == ['a@local']
+        # version table lost (restored backup): every step must tolerate being re-applied
+        with db.engine.begin() as conn:
+            conn.execute(text("DELETE FROM schema_version"))
+        migrations.run_migrations()
+    assert _applied(app) == [m[0] for m in migrations.MIGRATIONS]
+
+
+def test_concurrent_runners_are_serialized(tmp_path):
+    app = _make_app(tmp_path)
+    n = 4
+    barrier = threading.Barrier(n)
+    versions, errors = [], []
+
+    def runner():
+        try:
+            with app.app_context():
+                barrier.wait()
+                versions.append(migrations.run_migrations())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=runner) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert versions == [migrations.MIGRATIONS[-1][0]] * n
+    assert _applied(app) == [m[0] for m in migrations.MIGRATIONS]
+
+
+def test_create_app_fails_when_a_migration_fails(app, monkeypatch):
+    from app import create_app
+
+    def boom(log=None):
+        raise RuntimeError('bozuk migration')
+    monkeypatch.setattr(migrations, 'run_migrations', boom)
+    with pytest.raises(RuntimeError, match='bozuk migration'):
+        create_app(warmup=(), migrate=True, resume_jobs=False)
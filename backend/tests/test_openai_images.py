@@ -0,0 +1,51 @@
+import json
+import os
+
+from services.openai_images import OpenAIImageClient
+
+
+def test_batch_is_split_into_parallel_requests(client, auth, fake_sd):
+    headers, _ = auth
+    _, fake = fake_sd(size=16, latency=0.2)
+    r = client.post('/api/v2/ai/txt2img', json={"prompt": "halı", "n_iter": 3}, headers=headers)
+    assert r.status_code == 201, r.get_json()
+    body = r.get_json()
+    assert len(body['results']) == 3 and body['errors'] == []
+    assert fake.calls == 3
+    assert all(os.path.exists(item['path']) for item in body['results'])
+
+
+def test_progress_streams_each_image_then_summary(client, auth, fake_sd):
+    headers, _ = auth
+    fake_sd(size=16, latency=0.05)
+    r = client.post('/api/v2/ai/txt2img?progress=1', json={"prompt": "halı", "batch_size": 2}, headers=headers)
+    assert r.status_code == 200 and r.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert sorted(line['index'] for line in lines[:-1]) == [0, 1]
+    assert lines[-1]['done'] is True and len(lines[-1]['results']) == 2
+
+
+def test_partial_failure_keeps_finished_images(client, auth, fake_sd, monkeypatch):
+    from config.settings import settings
+    headers, _ = auth
+    monkeypatch.setattr(settings, 'OPENAI_IMAGE_RETRIES', 0)
+    # fake_sd fails call n when (n * 7919 % 1000) / 1000 < fail_rate: calls 1, 2 succeed, call 3 fails
+    fake_sd(size=16, latency=0.05, fail_rate=0.8)
+    r = client.post('/api/v2/ai/txt2img', json={"prompt": "halı", "n_iter": 3}, headers=headers)
+    assert r.status_code == 201
+    body = r.get_json()
+    assert len(body['results']) == 2
+    assert len(body['errors']) == 1 and 'HTTP 500' in body['errors'][0]['error']
+
+
+def test_each_image_is_retried_on_its_own(tmp_path, fake_sd):
+    url, fake = fake_sd(size=16, latency=0.01, fail_rate=1.0)
+    c = OpenAIImageClient('sk-test', url, concurrency=2, retries=2, backoff=0)
+    try:
+        events = list(c.generate_iter('gpt-image-1', 'halı', '1024x1024', 2,
+                                      lambda i, idx: str(tmp_path / f'{i}_{idx}.png')))
+    finally:
+        c.shutdown()
+    assert sorted(e['index'] for e in events) == [0, 1]
+    assert all('error' in e for e in events)
+    assert fake.calls == 2 * 3
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from services.image_processing import _rgb_to_lab
+from services.palette_extract import YarnIndex, extract_palette, kmeans_lab
+
+
+def _blobs(seed=0):
+    rng = np.random.default_rng(seed)
+    means = np.array([[20, 20, 20], [220, 30, 30], [30, 60, 210]], dtype=np.float64)
+    rgb = np.clip(np.concatenate([m + rng.normal(0, 6, size=(300, 3)) for m in means]), 0, 255)
+    counts = rng.integers(1, 50, size=len(rgb)).astype(np.int64)
+    return rgb.astype(np.float32), counts, means
+
+
+def test_kmeans_is_deterministic_for_a_seed():
+    rgb, counts, _ = _blobs()
+    lab = _rgb_to_lab(rgb.astype(np.float64))
+    c1, l1 = kmeans_lab(lab, counts.astype(np.float64), 6, seed=3)
+    c2, l2 = kmeans_lab(lab.copy(), counts.astype(np.float64), 6, seed=3)
+    assert np.array_equal(c1, c2) and np.array_equal(l1, l2)
+    assert extract_palette(rgb, counts, 6) == extract_palette(rgb, counts, 6)
+
+
+def test_kmeans_finds_separated_clusters():
+    rgb, counts, means = _blobs()
+    centers, labels = kmeans_lab(_rgb_to_lab(rgb.astype(np.float64)), counts.astype(np.float64), 3)
+    assert sorted(np.bincount(labels).tolist()) == [300, 300, 300]
+    d = np.sqrt(((centers[:, None, :] - _rgb_to_lab(means)[None, :, :]) ** 2).sum(-1))
+    assert sorted(np.argmin(d, axis=1).tolist()) == [0, 1, 2]
+    assert d.min(axis=1).max() < 5
+
+
+def test_kmeans_with_fewer_points_than_k():
+    lab = _rgb_to_lab(np.array([[0, 0, 0], [255, 255, 255]], dtype=np.float64))
+    centers, labels = kmeans_lab(lab, np.array([3.0, 1.0]), 8, batch_size=16)
+    assert len(centers) == 2 and sorted(labels.tolist()) == [0, 1]
+
+
+def _index():
+    return YarnIndex([
+        (1, 200, 20, 20, 'R-1', 'Kırmızı'),
+        (2, 230, 40, 40, 'R-2', 'Açık kırmızı'),
+        (3, 25, 25, 25, 'S-1', 'Siyah'),
+        (4, 201, 21, 21, 'R-1', 'Kırmızı (kopya)'),  # duplicate code: first row wins
+        (5, 0, 0, 255, None, 'kodsuz'),  # no yarn_code: not a yarn
+    ])
+
+
+def test_yarn_index_keeps_first_row_per_code():
+    index = _index()
+    assert len(index) == 3
+    assert [r[4] for r in index.rows] == ['R-1', 'R-2', 'S-1']
+
+
+def test_snap_gives_each_yarn_once():
+    index = _index()
+    # both centers are closest to R-1: the first takes it, the second gets the next nearest
+    centers = _rgb_to_lab(np.array([[198, 20, 20], [202, 22, 22], [10, 10, 10], [120, 120, 120]], dtype=np.float64))
+    out = index.snap(centers)
+    assert [s[0][4] for s in out[:3]] == ['R-1', 'R-2', 'S-1']
+    assert out[0][1] < out[1][1]
+    assert out[3] is None  # catalog exhausted
+    assert YarnIndex([]).snap(centers) == [None] * 4
+
+
+def test_extract_palette_snaps_to_unique_yarns():
+    rgb, counts, _ = _blobs()
+    out = extract_palette(rgb, counts, 3, _index())
+    assert sum(c['percent'] for c in out) == pytest.approx(100, abs=0.1)
+    assert [c['percent'] for c in out] == sorted((c['percent'] for c in out), reverse=True)
+    codes = [c['yarn_code'] for c in out]
+    assert len(set(codes)) == len(codes) == 3
+    for c in out:
+        row = next(r for r in _index().rows if r[4] == c['yarn_code'])
+        assert (c['color_id'], c['r'], c['g'], c['b']) == row[:4]
+        assert c['hex'] == '#%02x%02x%02x' % row[1:4]
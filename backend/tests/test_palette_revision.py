@@ -0,0 +1,28 @@
+import threading
+
+from extensions import db
+
+
+def test_concurrent_bumps_get_distinct_revisions(app):
+    from api.routes import _bump_palette_revision, _palette_revision
+
+    with app.app_context():
+        start = int(_palette_revision())
+    errors = []
+
+    def bump():
+        try:
+            with app.app_context():
+                _bump_palette_revision()
+                db.session.commit()
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=bump) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    with app.app_context():
+        assert int(_palette_revision()) == start + 8
@@ -0,0 +1,33 @@
+import os
+
+from services import profiling
+
+
+def test_profiling_is_off_by_default(client, auth):
+    headers, _ = auth
+    r = client.get('/api/ping', headers=dict(headers, **{"X-Profile": "cprofile"}))
+    assert r.status_code == 200 and 'X-Profile-Id' not in r.headers
+
+
+def test_only_the_newest_profiles_are_kept(client, auth, monkeypatch):
+    from config.settings import settings
+    headers, _ = auth
+    monkeypatch.setattr(settings, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(settings, 'PROFILE_KEEP', 3)
+    ids = []
+    for mode in ('cprofile', 'sample') * 3:
+        r = client.get('/api/ping', headers=dict(headers, **{"X-Profile": mode}))
+        ids.append(r.headers['X-Profile-Id'])
+    listed = client.get('/api/profiles', headers=headers).get_json()
+    assert sorted(p['id'] for p in listed) == sorted(ids[-3:])
+    root = os.path.join(os.environ['OUTPUT_ROOT'], 'profiles')
+    assert sorted({name.split('.', 1)[0] for name in os.listdir(root)}) == sorted(ids[-3:])
+
+
+def test_prune_keep_zero_keeps_everything(tmp_path):
+    for i in range(3):
+        (tmp_path / f'p{i}.json').write_text('{}')
+        (tmp_path / f'p{i}.prof').write_bytes(b'')
+    assert profiling.prune(str(tmp_path), 0) == 0
+    assert profiling.prune(str(tmp_path), 1) == 2
+    assert len(os.listdir(tmp_path)) == 2
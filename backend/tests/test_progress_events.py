@@ -0,0 +1,34 @@
+import json
+
+
+def _events(body: str):
+    """[(event, data)] from an SSE body; comments and the retry hint are skipped."""
+    out = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if line and not line.startswith(':'))
+        if 'data' in fields:
+            out.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return out
+
+
+def test_generation_job_streams_progress_then_done(client, auth, fake_sd):
+    headers, _ = auth
+    fake_sd(latency=0.5, size=32)
+    r = client.post('/api/ai/jobs', json={"kind": "txt2img", "prompt": "halı", "seed": 11,
+                                          "width": 32, "height": 32}, headers=headers)
+    job_id = r.get_json()['job_id']
+    token = headers['Authorization'].split()[1]
+    r = client.get(f'/api/events/generation/{job_id}?jwt={token}')
+    assert r.status_code == 200 and r.mimetype == 'text/event-stream'
+    events = _events(r.get_data(as_text=True))
+    r.close()
+    assert events[0][0] == 'progress' and events[0][1]['status'] in ('waiting', 'running')
+    assert events[-1][0] == 'done'
+    assert events[-1][1]['percent'] == 100 and events[-1][1]['job_id'] == job_id
+    assert [e for e, _ in events].count('done') == 1
+
+
+def test_invalid_progress_key_is_400(client, auth):
+    headers, _ = auth
+    assert client.get('/api/events/generation/a.b', headers=headers).status_code == 400
+    assert client.get('/api/events/nope/1', headers=headers).status_code == 400
@@ -0,0 +1,13 @@
+def test_prompt_lookup_by_id_beyond_first_page(client, auth):
+    headers, _ = auth
+    ids = []
+    for i in range(3):
+        r = client.post('/api/prompts', json={"name": f"p{i}", "prompt": f"halı {i}"}, headers=headers)
+        assert r.status_code == 201
+        ids.append(r.get_json()['id'])
+    page = client.get('/api/prompts?limit=1', headers=headers)
+    assert [p['id'] for p in page.get_json()] == [ids[-1]]
+    assert page.headers.get('X-Next-Cursor')
+    r = client.get(f'/api/prompts/{ids[0]}', headers=headers)
+    assert r.status_code == 200 and r.get_json()['name'] == 'p0'
+    assert client.get('/api/prompts/999999', headers=headers).status_code == 404
@@ -0,0 +1,106 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests
+
+from services.sd_pool import SDPool
+
+FAKE_SD = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bench', 'fake_sd.py')
+PAYLOAD = {"prompt": "halı", "seed": 1}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def node():
+    """start(port, latency) -> a bench/fake_sd.py process that the test can SIGKILL."""
+    procs = []
+
+    def start(port, latency=0.2):
+        proc = subprocess.Popen([sys.executable, FAKE_SD, '--port', str(port), '--latency', str(latency), '--size', '8'],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        procs.append(proc)
+        deadline = time.time() + 10
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                return proc
+            except OSError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.05)
+    yield start
+    for proc in procs:
+        proc.kill()
+        proc.wait()
+
+
+def _post_all(pool, n):
+    """n concurrent txt2img posts; returns the node URLs each one was dispatched to, in order."""
+    routes, errors = [[] for _ in range(n)], []
+
+    def one(i):
+        try:
+            body = pool.post('/sdapi/v1/txt2img', PAYLOAD, timeout=10, on_dispatch=routes[i].append)
+            assert body['images']
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads, routes, errors
+
+
+def _join(threads):
+    for t in threads:
+        t.join(30)
+
+
+def test_least_loaded_dispatch_failover_and_recovery(node):
+    port_a, port_b = _free_port(), _free_port()
+    url_a, url_b = f'http://127.0.0.1:{port_a}', f'http://127.0.0.1:{port_b}'
+    node(port_a, latency=1.0)
+    proc_b = node(port_b, latency=1.0)
+    pool = SDPool([(url_a, 1.0), (url_b, 1.0)], probe_interval=0, retries=1)
+
+    # Concurrent requests are spread by in-flight load; B is killed while its two are running
+    threads, routes, errors = _post_all(pool, 4)
+    time.sleep(0.4)
+    assert sorted(r[0] for r in routes) == sorted([url_a, url_a, url_b, url_b])
+    proc_b.kill()
+    proc_b.wait()
+    _join(threads)
+    assert errors == []
+    assert sorted(routes) == sorted([[url_a], [url_a], [url_b, url_a], [url_b, url_a]])
+    status = {n['url']: n for n in pool.status()}
+    assert status[url_b]['healthy'] is False and status[url_b]['failures'] >= 1
+
+    # While B is down everything goes to A without trying B first
+    threads, routes, errors = _post_all(pool, 2)
+    _join(threads)
+    assert errors == [] and routes == [[url_a], [url_a]]
+
+    # B comes back: the next probe marks it healthy and it takes load again
+    node(port_b, latency=0.2)
+    pool.probe_all()
+    assert all(n['healthy'] for n in pool.status())
+    threads, routes, errors = _post_all(pool, 2)
+    _join(threads)
+    assert errors == [] and sorted(r[0] for r in routes) == sorted([url_a, url_b])
+
+
+def test_all_nodes_down_raises(node):
+    pool = SDPool([(f'http://127.0.0.1:{_free_port()}', 1.0), (f'http://127.0.0.1:{_free_port()}', 1.0)],
+                  probe_interval=0, retries=1)
+    with pytest.raises(requests.ConnectionError):
+        pool.post('/sdapi/v1/txt2img', PAYLOAD, timeout=2)
+    assert not any(n['healthy'] for n in pool.status())
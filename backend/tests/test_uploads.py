@@ -0,0 +1,79 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from config.settings import settings
+from extensions import db
+from services import uploads
+
+
+def _png(seed=0, size=(48, 32)):
+    rng = np.random.default_rng(seed)
+    buf = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8), 'RGB').save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def _files(d):
+    return sorted(os.path.join(root, f) for root, _, names in os.walk(d) for f in names)
+
+
+def test_same_bytes_stored_once_with_two_designs(app, client, auth):
+    from api.models import Design
+    headers, _ = auth
+    body = _png(seed=11)
+    first = client.post('/api/upload-image?filename=a.png&name=ilk', data=body, content_type='image/png',
+                        headers=headers)
+    assert first.status_code == 201, first.get_json()
+    # multipart fields and raw-body query parameters are read the same way
+    second = client.post('/api/upload-image', headers=headers, content_type='multipart/form-data',
+                         data={"file": (io.BytesIO(body), 'b.png'), "name": 'ikinci', "loom_id": 'x'})
+    assert second.status_code == 201, second.get_json()
+    a, b = first.get_json(), second.get_json()
+    assert a['path'] == b['path'] and a['sha256'] == b['sha256']
+    assert (a['deduplicated'], b['deduplicated']) == (False, True)
+    assert a['design_id'] and b['design_id'] and a['design_id'] != b['design_id']
+    assert [p for p in _files(os.path.dirname(os.path.dirname(a['path']))) if a['sha256'] in p] == [a['path']]
+    with app.app_context():
+        designs = [db.session.get(Design, i) for i in (a['design_id'], b['design_id'])]
+        assert [d.name for d in designs] == ['ilk', 'ikinci']
+        assert {d.original_image for d in designs} == {a['path']}
+        assert {d.content_hash for d in designs} == {a['sha256']}
+
+
+def test_oversize_body_rejected(client, auth, monkeypatch):
+    headers, _ = auth
+    monkeypatch.setattr(settings, 'UPLOAD_MAX_MB', 1)
+    r = client.post('/api/upload-image?filename=big.png', data=b'\0' * (2 * 1024 * 1024),
+                    content_type='image/png', headers=headers)
+    assert r.status_code == 413
+
+
+def test_oversize_stream_stops_and_leaves_nothing(tmp_path):
+    # no Content-Length to go by: the limit is enforced while copying
+    with pytest.raises(uploads.UploadTooLarge):
+        uploads.store_content_addressed(io.BytesIO(_png(seed=3, size=(256, 256))), str(tmp_path), '.png',
+                                        max_bytes=4096, chunk_size=1024)
+    assert _files(tmp_path) == []
+
+
+@pytest.mark.parametrize('body', [b'not an image at all', _png(seed=5)[:-40]])
+def test_non_image_body_rejected(client, auth, body):
+    headers, _ = auth
+    before = _files(os.path.join(os.environ['OUTPUT_ROOT'], 'images', 'sha256'))
+    r = client.post('/api/upload-image?filename=x.png&name=bozuk', data=body, content_type='image/png',
+                    headers=headers)
+    assert r.status_code == 400
+    assert r.get_json()['error'] == 'Geçersiz görsel dosyası'
+    assert _files(os.path.join(os.environ['OUTPUT_ROOT'], 'images', 'sha256')) == before
+
+
+def test_empty_and_missing_file(client, auth):
+    headers, _ = auth
+    r = client.post('/api/upload-image?filename=x.png', data=b'', content_type='image/png', headers=headers)
+    assert r.status_code == 400 and r.get_json()['error'] == 'Dosya boş'
+    r = client.post('/api/upload-image', data={"name": 'x'}, headers=headers, content_type='multipart/form-data')
+    assert r.status_code == 400 and r.get_json()['error'] == 'Dosya yok'
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from conftest import BACKEND
+from config.settings import settings
+from services import profiling, workpool
+
+
+def test_run_cpu_inline_while_profiling(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'CPU_POOL_WORKERS', 1)
+    try:
+        assert workpool.run_cpu(os.getpid) != os.getpid()
+        session = profiling.ProfileSession(str(tmp_path), 'cprofile', 'test', memory=True)
+        assert session.start()
+        try:
+            with profiling.mem_stage('quantize'):
+                assert workpool.run_cpu(os.getpid) == os.getpid()
+        finally:
+            meta = session.finish(200)
+        assert 'quantize' in meta['stages']
+    finally:
+        workpool.shutdown_cpu_pool()
+
+
+def test_daemon_thread_pool_runs_and_cancels():
+    release = threading.Event()
+    pool = workpool.DaemonThreadPool(max_workers=1, thread_name_prefix='t')
+    blocked = pool.submit(release.wait, 5)
+    queued = pool.submit(lambda: 1 / 0)
+    assert all(t.daemon for t in pool._threads)
+    pool.shutdown(wait=False, cancel_futures=True)
+    assert queued.cancelled()
+    with pytest.raises(RuntimeError):
+        pool.submit(int)
+    release.set()
+    assert blocked.result(5) is True
+
+    pool = workpool.DaemonThreadPool(max_workers=2)
+    ok, bad = pool.submit(int, '7'), pool.submit(lambda: 1 / 0)
+    assert ok.result(5) == 7
+    assert isinstance(bad.exception(5), ZeroDivisionError)
+    pool.shutdown(wait=True)
+
+
+_DRAIN_SCRIPT = r'''
+import os, sys, time
+sys.path.insert(0, os.environ['BACKEND'])
+from bench.fake_sd import serve as fake_sd
+server, url, _ = fake_sd(latency=60, size=32)
+os.environ['SD_URL'] = url
+from config.settings import settings
+settings.JOB_DRAIN_TIMEOUT = 0.5
+from app import create_app
+from extensions import db
+from api.models import GenerationJob
+import api.routes as routes
+import serve
+app = create_app(warmup=(), resume_jobs=False)
+with app.app_context():
+    job = GenerationJob(kind='txt2img', status='queued', params='{"prompt": "x", "seed": 1, "width": 32, "height": 32}')
+    db.session.add(job)
+    db.session.commit()
+    job_id = job.id
+routes._submit_job(app, job_id)
+with app.app_context():
+    while db.session.get(GenerationJob, job_id).status != 'running':
+        db.session.rollback()
+        time.sleep(0.02)
+serve._drain(app)
+with app.app_context():
+    print(db.session.get(GenerationJob, job_id).status, flush=True)
+'''
+
+
+def test_drain_returns_and_process_exits_with_a_stuck_job(tmp_path):
+    env = dict(os.environ, BACKEND=BACKEND, DATABASE_URL=f"sqlite:///{tmp_path / 'drain.db'}",
+               OUTPUT_ROOT=str(tmp_path / 'out'), SD_NODES='')
+    start = time.monotonic()
+    # no os._exit: the worker returns from _drain and the interpreter exits despite the job thread
+    proc = subprocess.run([sys.executable, '-c', _DRAIN_SCRIPT], env=env, capture_output=True, text=True, timeout=30)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.split() == ['queued']
+    assert time.monotonic() - start < 20
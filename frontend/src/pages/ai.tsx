@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import axios from 'axios';
 
 interface GenItem { filename: string; path: string; url: string }
@@ -47,20 +47,26 @@ export default function AIPage() {
   const token = localStorage.getItem('token');
   const auth = token ? { Authorization: `Bearer ${token}` } : undefined;
 
+  // Apply from settings if requested (looked up by id: the list above is one page / a search)
+  const applyRequestedPrompt = async () => {
+    const ap = localStorage.getItem('apply_prompt_id');
+    if (!ap) return;
+    localStorage.removeItem('apply_prompt_id');
+    try {
+      const res = await axios.get(`http://127.0.0.1:5000/api/prompts/${Number(ap)}`, { headers: auth });
+      usePrompt(res.data);
+      setMsg(`Preset uygulandı: ${res.data.name}`);
+    } catch (e:any) {
+      setMsg(e?.response?.data?.error || 'Preset uygulanamadı');
+    }
+  };
+
   const loadPrompts = async () => {
     try {
-      const pres = await axios.get('http://127.0.0.1:5000/api/prompts', { headers: auth });
+      const q = promptFilter.trim();
+      const pres = await axios.get('http://127.0.0.1:5000/api/prompts', { headers: auth, params: q ? { q } : undefined });
       setPrompts(pres.data);
-      // Apply from settings if requested
-      try {
-        const ap = localStorage.getItem('apply_prompt_id');
-        if (ap) {
-          const pid = Number(ap);
-          const p = (pres.data as any[]).find((pp:any)=>Number(pp.id)===pid);
-          if (p) { usePrompt(p); setMsg(`Preset uygulandı: ${p.name}`); }
-          localStorage.removeItem('apply_prompt_id');
-        }
-      } catch {}
+      await applyRequestedPrompt();
     } catch (e:any) {
       if (e?.response?.status === 401) {
         setMsg('Oturum süresi doldu. Lütfen tekrar giriş yapın.');
@@ -156,6 +162,14 @@ export default function AIPage() {
     }
   };
 
+  // Server-side full-text search (debounced) as the filter changes
+  const filterMounted = useRef(false);
+  useEffect(()=>{
+    if (!filterMounted.current) { filterMounted.current = true; return; }
+    const t = setTimeout(()=>{ loadPrompts(); }, 250);
+    return ()=>clearTimeout(t);
+  }, [promptFilter]);
+
   useEffect(()=>{ loadPrompts(); loadPalettes(); loadLooms();
     try {
       const raw = localStorage.getItem('custom_presets');
@@ -531,18 +545,14 @@ export default function AIPage() {
           <button className="btn btn-ghost" type="button" onClick={()=>setPromptsOpen(v=>!v)}>{promptsOpen? '▼' : '►'} Hazır Promptlar</button>
           <div className="row" style={{ gap:8, alignItems:'center' }}>
             {promptsOpen && (
-              <input placeholder="Ara (ad/etiket)" value={promptFilter} onChange={e=>setPromptFilter(e.target.value)} />
+              <input placeholder="Ara (ad/etiket/prompt)" value={promptFilter} onChange={e=>setPromptFilter(e.target.value)} />
             )}
             <button className="btn" type="button" onClick={()=>setEditPrompt({ name:'Yeni Prompt', prompt })}>Yeni</button>
           </div>
         </div>
         {promptsOpen && (
           <div style={{ display:'grid', gap:6 }}>
-            {prompts.filter(p=>{
-              const q = (promptFilter||'').toLowerCase();
-              if (!q) return true;
-              return (`${p.name||''} ${p.tags||''}`).toLowerCase().includes(q);
-            }).map(p => (
+            {prompts.map(p => (
               <div key={p.id} className="row" style={{ justifyContent:'space-between', alignItems:'center' }}>
                 <div style={{ minWidth:0 }}>
                   <div style={{ fontWeight:600, whiteSpace:'nowrap', overflow:'hidden', textOverflow:'ellipsis' }}>{p.name}</div>
@@ -8,6 +8,8 @@ export default function Archive() {
   const [tab, setTab] = useState<'previews' | 'exports'>('previews');
   const [previews, setPreviews] = useState<PreviewItem[]>([]);
   const [exportsList, setExportsList] = useState<ExportItem[]>([]);
+  const [pvCursor, setPvCursor] = useState<string | null>(null);
+  const [exCursor, setExCursor] = useState<string | null>(null);
   const [msg, setMsg] = useState('');
   const [viewer, setViewer] = useState<string | null>(null);
   const [zoom, setZoom] = useState(1);
@@ -25,6 +27,8 @@ export default function Archive() {
       ]);
       setPreviews(pvRes.data);
       setExportsList(exRes.data);
+      setPvCursor(pvRes.headers['x-next-cursor'] || null);
+      setExCursor(exRes.headers['x-next-cursor'] || null);
     } catch (e: any) {
       setMsg(e?.response?.data?.error || 'Arşiv verileri alınamadı');
     }
@@ -32,6 +36,19 @@ export default function Archive() {
 
   useEffect(() => { load(); }, []);
 
+  const loadMore = async (kind: 'previews' | 'exports') => {
+    const cursor = kind === 'previews' ? pvCursor : exCursor;
+    if (!cursor) return;
+    try {
+      const res = await axios.get(`http://127.0.0.1:5000/api/archive/${kind}`, { headers: auth, params: { cursor } });
+      const next = res.headers['x-next-cursor'] || null;
+      if (kind === 'previews') { setPreviews(prev => [...prev, ...res.data]); setPvCursor(next); }
+      else { setExportsList(prev => [...prev, ...res.data]); setExCursor(next); }
+    } catch (e: any) {
+      setMsg(e?.response?.data?.error || 'Arşiv verileri alınamadı');
+    }
+  };
+
   const delPreview = async (id: number) => {
     if (!confirm('Önizlemeyi ve ilişkili exportları silmek istiyor musunuz?')) return;
     try {
@@ -85,6 +102,7 @@ export default function Archive() {
             </div>
           ))}
           {previews.length===0 && <div style={{ color: 'var(--muted)' }}>Önizleme yok.</div>}
+          {pvCursor && <button className="btn btn-ghost" onClick={()=>loadMore('previews')} type="button">Daha fazla yükle</button>}
         </div>
       )}
 
@@ -109,6 +127,7 @@ export default function Archive() {
             </div>
           ))}
           {exportsList.length===0 && <div style={{ color: 'var(--muted)' }}>Export yok.</div>}
+          {exCursor && <button className="btn btn-ghost" onClick={()=>loadMore('exports')} type="button">Daha fazla yükle</button>}
         </div>
       )}
       {viewer && (
@@ -19,6 +19,7 @@ export default function Pattern() {
   const [exportUrl, setExportUrl] = useState<string>('');
   const [msg, setMsg] = useState<string>('');
   const [maxColors, setMaxColors] = useState<number>(16);
+  const [progress, setProgress] = useState<string>('');
 
   const token = localStorage.getItem('token');
   const auth = token ? { Authorization: `Bearer ${token}` } : undefined;
@@ -65,15 +66,35 @@ export default function Pattern() {
     }
   };
 
+  // Live stage/percent from the SSE stream while a request runs; returns a closer
+  const watchProgress = (kind: 'pattern' | 'export', progressId: string) => {
+    const es = new EventSource(`http://127.0.0.1:5000/api/events/${kind}/${progressId}?jwt=${encodeURIComponent(token || '')}`);
+    const show = (ev: MessageEvent) => {
+      try {
+        const st = JSON.parse(ev.data);
+        if (st.status === 'running') setProgress(`${st.stage || ''} %${Math.round(st.percent || 0)}`);
+      } catch {}
+    };
+    es.addEventListener('progress', show as EventListener);
+    const close = () => { es.close(); setProgress(''); };
+    es.addEventListener('done', close);
+    es.addEventListener('error', close);
+    return close;
+  };
+  const newProgressId = (prefix: string) => `${prefix}_${Date.now().toString(36)}${Math.random().toString(36).slice(2, 8)}`;
+
   const generate = async (e: React.FormEvent) => {
     e.preventDefault(); setMsg(''); setPvId(undefined); setPreviewUrl(''); setExportJobId(undefined); setExportUrl('');
     if (designId === '') { setMsg('Design seçiniz'); return; }
+    const progressId = newProgressId('pat');
+    const stopWatching = watchProgress('pattern', progressId);
     try {
       const res = await axios.post('http://127.0.0.1:5000/api/generate-pattern', {
         design_id: designId,
         report_w: reportW,
         report_h: reportH,
         max_colors: maxColors,
+        progress_id: progressId,
       }, { headers: auth });
       const id = res.data.pattern_version_id as number;
       setPvId(id);
@@ -81,15 +102,20 @@ export default function Pattern() {
       setMsg('Önizleme hazır');
     } catch (e: any) {
       setMsg(e?.response?.data?.error || 'Pattern üretilemedi');
+    } finally {
+      stopWatching();
     }
   };
 
   const doExport = async () => {
     if (!pvId) { setMsg('Önce pattern üretiniz'); return; }
+    const progressId = newProgressId('exp');
+    const stopWatching = watchProgress('export', progressId);
     try {
       const res = await axios.post('http://127.0.0.1:5000/api/export', {
         pattern_version_id: pvId,
-        format: 'bmp8'
+        format: 'bmp8',
+        progress_id: progressId,
       }, { headers: auth });
       const jid = res.data.export_job_id as number;
       setExportJobId(jid);
@@ -97,6 +123,8 @@ export default function Pattern() {
       setMsg('Export tamamlandı');
     } catch (e: any) {
       setMsg(e?.response?.data?.error || 'Export başarısız');
+    } finally {
+      stopWatching();
     }
   };
 
@@ -163,6 +191,7 @@ export default function Pattern() {
             </div>
             <button type="submit">Pattern Üret</button>
           </form>
+          {progress && <p>İşleniyor: {progress}</p>}
           {msg && <p>{msg}</p>}
         </div>
 
@@ -46,6 +46,18 @@ export default function SettingsPage() {
   const [editPr, setEditPr] = useState<any|null>(null);
   const [savingPr, setSavingPr] = useState(false);
 
+  // /api/prompts is paginated (X-Next-Cursor); the pin list needs every template
+  const loadAllPrompts = async () => {
+    const all:any[] = [];
+    let cursor: string|null = null;
+    do {
+      const res = await axios.get('http://127.0.0.1:5000/api/prompts', { headers: auth, params: cursor ? { cursor, limit: 1000 } : { limit: 1000 } });
+      all.push(...(res.data || []));
+      cursor = res.headers['x-next-cursor'] || null;
+    } while (cursor);
+    return all;
+  };
+
   const load = async () => {
     setMsg('');
     try {
@@ -54,7 +66,7 @@ export default function SettingsPage() {
         axios.get('http://127.0.0.1:5000/api/settings/storage', { headers: auth }),
         axios.get('http://127.0.0.1:5000/api/settings/model', { headers: auth }).catch(()=>({ data:{} })),
         axios.get('http://127.0.0.1:5000/api/settings/generation', { headers: auth }).catch(()=>({ data:{} })),
-        axios.get('http://127.0.0.1:5000/api/prompts', { headers: auth }).catch(()=>({ data:[] })),
+        loadAllPrompts().catch(()=>[]),
         axios.get('http://127.0.0.1:5000/api/settings/presets', { headers: auth }).catch(()=>({ data:{ featured_prompt_ids: [] } })),
       ]);
       setRole(prot.data?.role || null);
@@ -70,7 +82,7 @@ export default function SettingsPage() {
         setPatDither(!!gen.data.pattern_default_dither);
         setPatMaxColors(gen.data.pattern_default_max_colors ?? '');
       }
-      setAllPrompts(prm.data || []);
+      setAllPrompts(prm || []);
       setFeaturedIds((pins.data?.featured_prompt_ids || []).map((x:any)=>Number(x)));
       try {
         setLoraName(localStorage.getItem('lora_name') || '');
@@ -146,8 +158,7 @@ export default function SettingsPage() {
       };
       const resp = await axios.post('http://127.0.0.1:5000/api/prompts', body, { headers: auth });
       const newId = Number(resp.data?.id);
-      const prm = await axios.get('http://127.0.0.1:5000/api/prompts', { headers: auth });
-      setAllPrompts(prm.data||[]);
+      setAllPrompts(await loadAllPrompts());
       const next = Array.from(new Set([...(featuredIds||[]), newId]));
       const pins = await axios.put('http://127.0.0.1:5000/api/settings/presets', { featured_prompt_ids: next }, { headers: auth });
       setFeaturedIds((pins.data?.featured_prompt_ids||next).map((x:any)=>Number(x)));